@@ -0,0 +1,84 @@
+"""Synthetic macros looking like real recordings, for the benchmarks.
+
+    python benchmarks/generate.py 100000 -o big.pmr
+"""
+import math
+import random
+from argparse import ArgumentParser
+from json import dumps
+
+SCREEN = (1920, 1080)
+KEYS = "abcdefghijklmnopqrstuvwxyz      ,.'"
+
+
+def mouse_path(rng, start, length):
+    """Cursor moves along a curve with hand jitter, about 125 Hz like a real mouse"""
+    x0, y0 = start
+    x1, y1 = rng.randrange(SCREEN[0]), rng.randrange(SCREEN[1])
+    bend = rng.uniform(-300, 300)
+    events = []
+    for step in range(1, length + 1):
+        t = step / length
+        ease = t * t * (3 - 2 * t)
+        x = x0 + (x1 - x0) * ease + bend * math.sin(math.pi * t) + rng.gauss(0, 0.6)
+        y = y0 + (y1 - y0) * ease + rng.gauss(0, 0.6)
+        events.append({"type": "cursorMove", "x": int(x), "y": int(y),
+                       "timestamp": rng.uniform(0.006, 0.010)})
+    return events
+
+
+def typing_burst(rng, length):
+    """Key presses and releases of typed words, 80 to 200 ms between keys"""
+    events = []
+    for _ in range(max(1, length // 2)):
+        char = rng.choice(KEYS)
+        key = "Key.space" if char == " " else char
+        events.append({"type": "keyboardEvent", "key": key, "pressed": True,
+                       "timestamp": rng.uniform(0.08, 0.2)})
+        events.append({"type": "keyboardEvent", "key": key, "pressed": False,
+                       "timestamp": rng.uniform(0.03, 0.09)})
+    return events
+
+
+def click_storm(rng, position, length):
+    """Fast clicks on the same spot, with scrolls in between"""
+    x, y = position
+    events = []
+    while len(events) < length:
+        if rng.random() < 0.2:
+            events.append({"type": "scrollEvent", "dx": 0, "dy": rng.choice((-1, 1)),
+                           "timestamp": rng.uniform(0.01, 0.05)})
+        else:
+            events.append({"type": "leftClickEvent", "x": x, "y": y, "pressed": True,
+                           "timestamp": rng.uniform(0.05, 0.15)})
+            events.append({"type": "leftClickEvent", "x": x, "y": y, "pressed": False,
+                           "timestamp": rng.uniform(0.04, 0.09)})
+    return events
+
+
+def generate_macro(event_count, seed=0):
+    """Macro of event_count events alternating mouse paths (most of the events,
+    like real recordings), typing bursts and click storms"""
+    rng = random.Random(seed)
+    events = []
+    position = (SCREEN[0] // 2, SCREEN[1] // 2)
+    while len(events) < event_count:
+        kind = rng.random()
+        if kind < 0.7:
+            events += mouse_path(rng, position, rng.randint(40, 400))
+            position = (events[-1]["x"], events[-1]["y"])
+        elif kind < 0.9:
+            events += typing_burst(rng, rng.randint(10, 80))
+        else:
+            events += click_storm(rng, position, rng.randint(6, 40))
+    return {"events": events[:event_count]}
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("events", type=int)
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    with open(args.output, "w") as macro_file:
+        macro_file.write(dumps(generate_macro(args.events, args.seed), separators=(',', ':')))
@@ -0,0 +1,228 @@
+"""Time the hot paths of PyMacroRecord on synthetic macros.
+
+    python benchmarks/run.py                          # 10k, 100k and 1M events
+    python benchmarks/run.py --sizes 10000,5000000 -o results.json
+    python benchmarks/run.py --compare old.json       # ratios against older results
+
+Benchmarks whose modules cannot be imported here (no Tk display, missing
+dependency) are reported as skipped.
+"""
+import copy
+import platform
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from json import dumps, load
+from os import path
+from statistics import mean
+from time import perf_counter, strftime
+from types import SimpleNamespace
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, path.join(ROOT, "src"))
+sys.path.insert(0, path.dirname(path.abspath(__file__)))
+
+from generate import generate_macro  # noqa: E402
+
+BENCHMARKS = []
+
+
+def benchmark(name, max_events=None):
+    """Register setup(macro_data, work_dir) returning the function to time.
+    setup runs before each repeat so the timed function can change its data."""
+    def register(setup):
+        BENCHMARKS.append((name, max_events, setup))
+        return setup
+    return register
+
+
+def _editor_data(macro_data):
+    from macro.macro_editor import MacroEditor
+    holder = SimpleNamespace(macro_events=macro_data, main_app=SimpleNamespace(macro_saved=True))
+    return MacroEditor(holder)
+
+
+@benchmark("json_save")
+def _json_save(macro_data, work_dir):
+    from utils.macro_file import write_macro_file
+    return lambda: write_macro_file(path.join(work_dir, "save.pmr"), macro_data)
+
+
+@benchmark("json_load")
+def _json_load(macro_data, work_dir):
+    from utils.macro_file import read_macro_file, write_macro_file
+    file_path = path.join(work_dir, f"load-{len(macro_data['events'])}.pmr")
+    if not path.isfile(file_path):
+        write_macro_file(file_path, macro_data)
+    return lambda: read_macro_file(file_path)
+
+
+@benchmark("build_groups")
+def _build_groups(macro_data, work_dir):
+    from windows.editor.macro_editor import build_groups
+    return lambda: build_groups(macro_data["events"])
+
+
+@benchmark("cursor_move_groups")
+def _cursor_move_groups(macro_data, work_dir):
+    return _editor_data(macro_data).get_cursor_move_groups
+
+
+@benchmark("rdp", max_events=200000)
+def _rdp(macro_data, work_dir):
+    from macro.macro_editor import MacroEditor
+    points = [(ev["x"], ev["y"]) for ev in macro_data["events"] if ev["type"] == "cursorMove"]
+    return lambda: MacroEditor._rdp(points, 2.0)
+
+
+@benchmark("simplify_path")
+def _simplify_path(macro_data, work_dir):
+    editor = _editor_data(copy.deepcopy(macro_data))
+    groups = [group for group in editor.get_cursor_move_groups() if group["kind"] == "group"]
+
+    def simplify_all():
+        for group in reversed(groups):
+            editor.simplify_path(group["start"], group["end"], 2.0)
+    return simplify_all
+
+
+@benchmark("find_replace")
+def _find_replace(macro_data, work_dir):
+    from macro.macro_editor import find_replace
+    from windows.editor.macro_editor import build_groups
+    events = copy.deepcopy(macro_data["events"])
+    groups = build_groups(events)
+    return lambda: find_replace(events, groups, "keyboardEvent", "a", "found")
+
+
+@benchmark("editor_refresh", max_events=200000)
+def _editor_refresh(macro_data, work_dir):
+    from tkinter import Tk
+
+    from windows.editor.macro_editor import MacroEditor
+    root = _tk_root(Tk)
+    editor = MacroEditor(root, {})
+    return lambda: editor.refresh(macro_data)
+
+
+_tk = {}
+
+
+def _tk_root(Tk):
+    if "root" not in _tk:
+        _tk["root"] = Tk()
+        _tk["root"].withdraw()
+    return _tk["root"]
+
+
+@benchmark("compile_plan")
+def _compile_plan(macro_data, work_dir):
+    from backends.memory_backend import MemoryBackend
+    from macro.playback_plan import compile_plan
+    return lambda: compile_plan(macro_data, MemoryBackend.special_keys, work_dir)
+
+
+@benchmark("playback_loop")
+def _playback_loop(macro_data, work_dir):
+    from backends.memory_backend import MemoryBackend
+    from macro.playback_plan import compile_plan
+    from macro.player import Player
+    backend = MemoryBackend()
+    plan = compile_plan(macro_data, backend.special_keys, work_dir)
+    player = Player(backend)
+
+    def play():
+        # No waits: measures the cost of the loop and the backend calls only
+        player.playing = True
+        player.run(plan, 1, speed=1e12)
+    return play
+
+
+def run_benchmarks(sizes, repeats, only=None):
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in sizes:
+            macro_data = generate_macro(size)
+            for name, max_events, setup in BENCHMARKS:
+                if only and name not in only:
+                    continue
+                result = {"name": name, "events": size}
+                if max_events and size > max_events:
+                    result["skipped"] = f"more than {max_events} events"
+                    results.append(result)
+                    continue
+                timings = []
+                try:
+                    for _ in range(repeats):
+                        function = setup(macro_data, work_dir)
+                        started = perf_counter()
+                        function()
+                        timings.append(perf_counter() - started)
+                except Exception as e:  # ImportError, TclError without display...
+                    result["skipped"] = f"{type(e).__name__}: {e}"
+                else:
+                    best = min(timings)
+                    result.update(best_s=round(best, 6), mean_s=round(mean(timings), 6), repeats=repeats,
+                                  events_per_s=round(size / best) if best else None)
+                results.append(result)
+                print(_format_result(result), flush=True)
+    return results
+
+
+def _format_result(result):
+    if "skipped" in result:
+        return f"{result['name']:>20} {result['events']:>9}  skipped ({result['skipped']})"
+    return (f"{result['name']:>20} {result['events']:>9}  {result['best_s'] * 1000:10.2f} ms"
+            f"  {result['events_per_s']:>12} events/s")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(previous, current):
+    """Print current/previous time ratios, above 1 is slower"""
+    old = {(r["name"], r["events"]): r for r in previous["results"] if "best_s" in r}
+    for result in current["results"]:
+        before = old.get((result["name"], result["events"]))
+        if before is None or "best_s" not in result:
+            continue
+        ratio = result["best_s"] / before["best_s"] if before["best_s"] else float("inf")
+        flag = "  SLOWER" if ratio > 1.1 else "  faster" if ratio < 0.9 else ""
+        print(f"{result['name']:>20} {result['events']:>9}  x{ratio:.2f}{flag}")
+
+
+def main(argv=None):
+    parser = ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="comma separated event counts, up to a few millions")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--only", help="comma separated benchmark names")
+    parser.add_argument("-o", "--output", help="json file for the results")
+    parser.add_argument("--compare", help="json results of an older run")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {
+        "date": strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": run_benchmarks(sizes, args.repeats, args.only.split(",") if args.only else None),
+    }
+    output = args.output or path.join(ROOT, "benchmarks", f"results-{strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as results_file:
+        results_file.write(dumps(results, indent=4))
+    print(f"results written to {output}")
+    if args.compare:
+        with open(args.compare) as previous_file:
+            compare(load(previous_file), results)
+
+
+if __name__ == "__main__":
+    main()
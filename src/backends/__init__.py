@@ -0,0 +1,16 @@
+BACKENDS = ("pynput", "xlib", "memory")
+
+
+def create_backend(name="pynput"):
+    """Return a new input backend by name. Backends are imported only when
+    asked for, so the memory backend works on machines without pynput."""
+    if name == "pynput":
+        from .pynput_backend import PynputBackend
+        return PynputBackend()
+    if name == "xlib":
+        from .xlib_backend import XlibBackend
+        return XlibBackend()
+    if name == "memory":
+        from .memory_backend import MemoryBackend
+        return MemoryBackend()
+    raise ValueError(f"Unknown input backend \"{name}\"")
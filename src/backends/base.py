@@ -0,0 +1,39 @@
+BUTTONS = ("left", "right", "middle")
+
+
+class InputBackend:
+    """Injects and listens to mouse and keyboard inputs.
+
+    Buttons are the names of BUTTONS. Keys are what resolve_key_name returns
+    with special_keys: a character, or an attribute of special_keys for keys
+    such as Key.enter. Listener callbacks get the same names as the macro
+    files: on_click(x, y, button name, pressed) and on_press(key string).
+    """
+
+    # Object whose attributes are the special keys (Key.enter -> special_keys.enter)
+    special_keys = None
+
+    def move(self, x, y):
+        raise NotImplementedError
+
+    def button(self, button, pressed):
+        raise NotImplementedError
+
+    def scroll(self, dx, dy):
+        raise NotImplementedError
+
+    def key(self, key, pressed):
+        raise NotImplementedError
+
+    def flush(self):
+        """Send the inputs injected so far, for backends that buffer them"""
+
+    def mouse_listener(self, on_move=None, on_click=None, on_scroll=None):
+        """Return a listener with start() and stop() calling the given callbacks"""
+        raise NotImplementedError
+
+    def keyboard_listener(self, on_press=None, on_release=None, ignore_injected=None):
+        """Return a listener with start() and stop() calling the given callbacks.
+        Keys sent by this software are not given to the callbacks while
+        ignore_injected() returns True, where the system tells them apart."""
+        raise NotImplementedError
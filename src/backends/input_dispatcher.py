@@ -0,0 +1,48 @@
+from threading import Lock
+
+
+class InputDispatcher:
+    """Owns the only keyboard listener of the application.
+
+    Each key is turned into its macro file name once, by the backend listener,
+    then given to the subscribers from the highest priority to the lowest.
+    A subscriber returning True consumes the key: the lower ones do not get it
+    (used while capturing a new hotkey).
+    """
+
+    def __init__(self, backend, ignore_injected=None):
+        self._subscribers = []
+        self._lock = Lock()
+        self._listener = backend.keyboard_listener(
+            on_press=self._on_press, on_release=self._on_release, ignore_injected=ignore_injected
+        )
+
+    def start(self):
+        self._listener.start()
+
+    def stop(self):
+        self._listener.stop()
+
+    def subscribe(self, on_press=None, on_release=None, priority=0):
+        """Call on_press(key) / on_release(key) for every key. Returns a token for unsubscribe()."""
+        token = (priority, on_press, on_release)
+        with self._lock:
+            # Copied so that the listener thread never iterates over a list being changed
+            subscribers = self._subscribers + [token]
+            subscribers.sort(key=lambda subscriber: -subscriber[0])
+            self._subscribers = subscribers
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers = [subscriber for subscriber in self._subscribers if subscriber is not token]
+
+    def _on_press(self, key):
+        for _, on_press, _ in self._subscribers:
+            if on_press is not None and on_press(key):
+                return
+
+    def _on_release(self, key):
+        for _, _, on_release in self._subscribers:
+            if on_release is not None and on_release(key):
+                return
@@ -0,0 +1,69 @@
+from time import perf_counter
+
+from backends.base import InputBackend
+
+
+class _SpecialKeys:
+    """Stands for the pynput Key enum: special_keys.enter is "Key.enter" """
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return f"Key.{name}"
+
+
+class MemoryListener:
+    def __init__(self, backend, callbacks):
+        self.backend = backend
+        self.callbacks = callbacks
+
+    def start(self):
+        self.backend.listeners.append(self)
+
+    def stop(self):
+        if self in self.backend.listeners:
+            self.backend.listeners.remove(self)
+
+
+class MemoryBackend(InputBackend):
+    """Injects nothing, logs every input as (perf_counter time, kind, *args).
+
+    Used to measure playback throughput and timing without a display.
+    Listeners are fed with emit(), e.g. emit("on_press", "a").
+    """
+
+    special_keys = _SpecialKeys()
+
+    def __init__(self):
+        self.log = []
+        self.listeners = []
+        self.position = (0, 0)
+
+    def move(self, x, y):
+        self.position = (x, y)
+        self.log.append((perf_counter(), "move", x, y))
+
+    def button(self, button, pressed):
+        self.log.append((perf_counter(), "button", button, pressed))
+
+    def scroll(self, dx, dy):
+        self.log.append((perf_counter(), "scroll", dx, dy))
+
+    def key(self, key, pressed):
+        self.log.append((perf_counter(), "key", key, pressed))
+
+    def clear(self):
+        self.log = []
+
+    def mouse_listener(self, on_move=None, on_click=None, on_scroll=None):
+        return MemoryListener(self, {"on_move": on_move, "on_click": on_click, "on_scroll": on_scroll})
+
+    def keyboard_listener(self, on_press=None, on_release=None, ignore_injected=None):
+        return MemoryListener(self, {"on_press": on_press, "on_release": on_release})
+
+    def emit(self, callback_name, *args):
+        """Call callback_name(*args) on every started listener having it"""
+        for listener in list(self.listeners):
+            callback = listener.callbacks.get(callback_name)
+            if callback is not None:
+                callback(*args)
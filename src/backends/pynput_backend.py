@@ -0,0 +1,63 @@
+from pynput import keyboard, mouse
+from pynput.keyboard import Key
+from pynput.mouse import Button
+
+from backends.base import InputBackend
+from utils.get_key_pressed import getKeyPressed
+
+_BUTTON_NAMES = {Button.left: "left", Button.right: "right", Button.middle: "middle"}
+
+
+class PynputBackend(InputBackend):
+    special_keys = Key
+
+    def __init__(self):
+        self.mouseControl = mouse.Controller()
+        self.keyboardControl = keyboard.Controller()
+
+    def move(self, x, y):
+        self.mouseControl.position = (x, y)
+
+    def button(self, button, pressed):
+        if pressed:
+            self.mouseControl.press(getattr(Button, button))
+        else:
+            self.mouseControl.release(getattr(Button, button))
+
+    def scroll(self, dx, dy):
+        self.mouseControl.scroll(dx, dy)
+
+    def key(self, key, pressed):
+        if pressed:
+            self.keyboardControl.press(key)
+        else:
+            self.keyboardControl.release(key)
+
+    def mouse_listener(self, on_move=None, on_click=None, on_scroll=None):
+        callbacks = {}
+        if on_move:
+            callbacks["on_move"] = on_move
+        if on_click:
+            callbacks["on_click"] = lambda x, y, button, pressed: on_click(
+                x, y, _BUTTON_NAMES.get(button, "unknown"), pressed)
+        if on_scroll:
+            callbacks["on_scroll"] = on_scroll
+        return mouse.Listener(**callbacks)
+
+    def keyboard_listener(self, on_press=None, on_release=None, ignore_injected=None):
+        listener = None
+
+        def wrap(callback):
+            if callback is None:
+                return None
+            return lambda key: callback(getKeyPressed(listener, key))
+
+        def win32_event_filter(msg, data):
+            """Detect if key is pressed by real keyboard or pynput"""
+            if data.flags == 0x10 and ignore_injected():
+                return False
+            return True
+
+        options = {"win32_event_filter": win32_event_filter} if ignore_injected else {}
+        listener = keyboard.Listener(on_press=wrap(on_press), on_release=wrap(on_release), **options)
+        return listener
@@ -0,0 +1,78 @@
+from pynput.keyboard import Key
+from Xlib import X, XK, display
+from Xlib.ext import xtest
+
+from backends.base import InputBackend
+from backends.pynput_backend import PynputBackend
+
+_BUTTONS = {"left": 1, "middle": 2, "right": 3}
+
+
+class XlibBackend(InputBackend):
+    """Linux backend sending XTest requests without flushing each of them.
+
+    pynput flushes the display after every input, which costs a round-trip
+    per cursor position. Here requests are only queued, the Player calls
+    flush() once the inputs due in the current scheduler tick are sent.
+    Listening still goes through pynput.
+    """
+
+    special_keys = Key
+
+    mouse_listener = PynputBackend.mouse_listener
+    keyboard_listener = PynputBackend.keyboard_listener
+
+    def __init__(self, display_name=None):
+        self.display = display.Display(display_name)
+        if not self.display.has_extension("XTEST"):
+            raise RuntimeError("The X server has no XTEST extension")
+        self._keycodes = {}
+        self._shift = self.display.keysym_to_keycode(XK.XK_Shift_L)
+
+    def move(self, x, y):
+        xtest.fake_input(self.display, X.MotionNotify, x=int(x), y=int(y))
+
+    def button(self, button, pressed):
+        xtest.fake_input(self.display, X.ButtonPress if pressed else X.ButtonRelease, _BUTTONS[button])
+
+    def scroll(self, dx, dy):
+        # Wheel steps are presses of buttons 4 (up), 5 (down), 6 (left) and 7 (right)
+        for amount, negative, positive in ((dy, 5, 4), (dx, 6, 7)):
+            button = positive if amount > 0 else negative
+            for _ in range(abs(int(amount))):
+                xtest.fake_input(self.display, X.ButtonPress, button)
+                xtest.fake_input(self.display, X.ButtonRelease, button)
+
+    def key(self, key, pressed):
+        keycode, shifted = self._keycode(key)
+        if keycode is None:
+            return
+        event_type = X.KeyPress if pressed else X.KeyRelease
+        if shifted and pressed:
+            xtest.fake_input(self.display, X.KeyPress, self._shift)
+        xtest.fake_input(self.display, event_type, keycode)
+        if shifted and not pressed:
+            xtest.fake_input(self.display, X.KeyRelease, self._shift)
+
+    def flush(self):
+        self.display.flush()
+
+    def _keycode(self, key):
+        """(keycode, needs shift) of a key, looked up once per key"""
+        cached = self._keycodes.get(key)
+        if cached is not None:
+            return cached
+        if isinstance(key, Key):
+            keysym = key.value.vk
+        else:
+            code = ord(key[0])
+            # Latin-1 keysyms are the code points, the others are offset
+            keysym = code if code < 0x100 else 0x01000000 | code
+        keycode = self.display.keysym_to_keycode(keysym)
+        if not keycode:
+            print(f"key {key} has no keycode on this keyboard layout, ignored")
+            result = (None, False)
+        else:
+            result = (keycode, self.display.keycode_to_keysym(keycode, 0) != keysym)
+        self._keycodes[key] = result
+        return result
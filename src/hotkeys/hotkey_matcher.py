@@ -0,0 +1,64 @@
+from utils.keys import vk_nb
+
+# Checked in this order, like the menu
+HOTKEY_ACTIONS = ("Record_Start", "Record_Stop", "Playback_Start", "Playback_Stop")
+
+
+def normalize_key(key):
+    """Numpad keys are recorded as "<96>", hotkeys store them as "0" """
+    if key is not None and ">" in key:
+        return vk_nb.get(key, key)
+    return key
+
+
+class HotkeyMatcher:
+    """Hotkeys of the settings compiled into bit masks over the keys they use.
+
+    The keys currently held are a bit mask plus a count of the held keys no
+    hotkey uses, updated on press and release whatever the release order.
+    A hotkey with a special key (Key.ctrl, Key.f3...) matches when exactly its
+    keys are held, one made of characters only when any of them is held, as
+    before.
+    """
+
+    def __init__(self, hotkeys_settings):
+        self._bits = {}
+        self._hotkeys = []
+        for action in HOTKEY_ACTIONS:
+            keys = [normalize_key(key) for key in hotkeys_settings.get(action) or []]
+            if not keys:
+                continue
+            mask = 0
+            for key in keys:
+                if key not in self._bits:
+                    self._bits[key] = 1 << len(self._bits)
+                mask |= self._bits[key]
+            exact = any("Key." in key for key in keys)
+            self._hotkeys.append((action, mask, exact))
+        self._pressed = 0
+        self._other_pressed = set()
+
+    def press(self, key):
+        """Update the held keys with key. Returns the actions whose hotkey is now held."""
+        key = normalize_key(key)
+        bit = self._bits.get(key)
+        if bit is None:
+            self._other_pressed.add(key)
+        else:
+            self._pressed |= bit
+        pressed = self._pressed
+        only_hotkey_keys = not self._other_pressed
+        return [action for action, mask, exact in self._hotkeys
+                if (pressed == mask and only_hotkey_keys if exact else pressed & mask)]
+
+    def release(self, key):
+        key = normalize_key(key)
+        bit = self._bits.get(key)
+        if bit is None:
+            self._other_pressed.discard(key)
+        else:
+            self._pressed &= ~bit
+
+    def reset(self):
+        self._pressed = 0
+        self._other_pressed.clear()
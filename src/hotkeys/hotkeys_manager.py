@@ -1,30 +1,31 @@
 from tkinter import messagebox
 
-from pynput import keyboard
-
-from utils.get_key_pressed import getKeyPressed
+from hotkeys.hotkey_matcher import HotkeyMatcher
 from utils.keys import vk_nb
 
+# Capturing a new hotkey comes first and keeps the keys for itself, then the
+# hotkeys are checked before the recorder (priority 0) gets the key.
+CAPTURE_PRIORITY = 100
+HOTKEYS_PRIORITY = 50
+
 
 class HotkeysManager:
     def __init__(self, main_app):
-        self.keyboard_listener = keyboard.Listener(
-            on_press=self.__on_press,
-            on_release=self.__on_release,
-            win32_event_filter=self.__win32_event_filter,
-        )
         self.main_app = main_app
         self.settings = main_app.settings
         self.hotkeys = []
         self.hotkey_visible = []
-        self.hotkey_detection = []
+        self.matcher = HotkeyMatcher(self.settings.settings_dict["Hotkeys"])
+        self.settings.add_listener(self.__on_settings_changed)
         self.macro = main_app.macro
         self.hotkey_button = None
         self.type_of_hotkey = None
         self.entry_to_change = None
         self.changeKey = False
         self.index_to_change = 0
-        self.keyboard_listener.start()
+        dispatcher = self.macro.input_dispatcher
+        dispatcher.subscribe(on_press=self.__on_capture_press, priority=CAPTURE_PRIORITY)
+        dispatcher.subscribe(on_press=self.__on_press, on_release=self.__on_release, priority=HOTKEYS_PRIORITY)
 
     def enable_hot_key_detection(self, type_of_hotkey, entry_to_change, index):
         self.hotkey_button = entry_to_change
@@ -34,113 +35,79 @@ class HotkeysManager:
         self.entry_to_change = entry_to_change
         self.entry_to_change.configure(text=self.main_app.text_content["options_menu"]["settings_menu"]["hotkeys_settings"]["please_key_text"])
 
+    def __on_settings_changed(self, category):
+        if category in ("Hotkeys", None):
+            self.matcher = HotkeyMatcher(self.settings.settings_dict["Hotkeys"])
+
     def clear_hot_key(self, type, entry_to_change):
         self.settings.change_settings("Hotkeys", type, None, [])
         entry_to_change.configure(text="")
 
-    def __win32_event_filter(self, msg, data):
-        """Detect if key is pressed by real keyboard or pynput"""
-        if data.flags == 0x10:
-            if self.macro.playback and not self.macro.record:
-                return False
-            else:
-                return True
-
-    def __on_press(self, key):
+    def __on_capture_press(self, keyPressed):
+        """Record the keys of the hotkey being changed. Returns True while capturing."""
+        if not self.changeKey:
+            return False
         userSettings = self.settings.settings_dict
-        if self.changeKey:
-            keyPressed = getKeyPressed(self.keyboard_listener, key)
-            if keyPressed not in self.hotkeys:
-                if ">" in keyPressed:
-                    try:
-                        keyPressed = vk_nb[keyPressed]
-                    except:
-                        pass
-                self.hotkeys.append(keyPressed)
-                keyPressed = (
-                    keyPressed.replace("Key.", "")
-                    .replace("_l", "")
-                    .replace("_r", "")
-                    .replace("_gr", "")
-                )
-                self.hotkey_visible.append(keyPressed.upper())
-            self.hotkey_button.configure(text=self.hotkey_visible)
-
-            if all(keyword not in keyPressed for keyword in ["ctrl", "alt", "shift", 'cmd']):
-                if (
-                    self.type_of_hotkey == "Record_Start"
-                    and userSettings["Hotkeys"]["Playback_Start"] == self.hotkeys
-                    or self.type_of_hotkey == "Playback_Start"
-                    and userSettings["Hotkeys"]["Record_Start"] == self.hotkeys
-                ):
-                    messagebox.showerror(
-                        self.main_app.text_content["global"]["error"],
-                        self.main_app.text_content["options_menu"]["settings_menu"]["hotkeys_settings"]["error_hotkeys"],
-                    )
-                    self.entry_to_change.configure(text=self.main_app.text_content["options_menu"]["settings_menu"]["hotkeys_settings"]["please_key_text"])
-                    self.hotkeys = []
-                    self.hotkey_visible = []
-                    return
-                self.settings.change_settings(
-                    "Hotkeys", self.type_of_hotkey, None, self.hotkeys
-                )
-                self.changeKey = False
-                self.hotkeys = []
-                self.hotkey_visible = []
-
-        if not self.changeKey and not self.main_app.prevent_record:
-            keyPressed = getKeyPressed(self.keyboard_listener, key)
+        if keyPressed not in self.hotkeys:
             if ">" in keyPressed:
                 try:
                     keyPressed = vk_nb[keyPressed]
                 except:
                     pass
-
-            for keys in userSettings["Hotkeys"]:
-                if not userSettings["Hotkeys"][keys]:
-                    userSettings["Hotkeys"][keys] = ""
-
-            if keyPressed not in self.hotkey_detection:
-                self.hotkey_detection.append(keyPressed)
-
-            by_hotkey = True
-
+            self.hotkeys.append(keyPressed)
+            keyPressed = (
+                keyPressed.replace("Key.", "")
+                .replace("_l", "")
+                .replace("_r", "")
+                .replace("_gr", "")
+            )
+            self.hotkey_visible.append(keyPressed.upper())
+        self.hotkey_button.configure(text=self.hotkey_visible)
+
+        if all(keyword not in keyPressed for keyword in ["ctrl", "alt", "shift", 'cmd']):
             if (
-                    self.__is_hotkey_triggered(userSettings["Hotkeys"]["Record_Start"], self.hotkey_detection)
-                    and not self.macro.record
-                    and not self.macro.playback
-            ):
-                self.macro.start_record(by_hotkey)
-
-            elif (
-                    self.__is_hotkey_triggered(userSettings["Hotkeys"]["Record_Stop"], self.hotkey_detection)
-                    and self.macro.record
-                    and not self.macro.playback
-            ):
-                self.macro.stop_record()
-
-            elif (
-                    self.__is_hotkey_triggered(userSettings["Hotkeys"]["Playback_Start"], self.hotkey_detection)
-                    and not self.macro.record
-                    and not self.macro.playback
-                    and self.main_app.macro_recorded
-            ):
-                self.macro.start_playback()
-
-            elif (
-                    self.__is_hotkey_triggered(userSettings["Hotkeys"]["Playback_Stop"], self.hotkey_detection)
-                    and not self.macro.record
-                    and self.macro.playback
+                self.type_of_hotkey == "Record_Start"
+                and userSettings["Hotkeys"]["Playback_Start"] == self.hotkeys
+                or self.type_of_hotkey == "Playback_Start"
+                and userSettings["Hotkeys"]["Record_Start"] == self.hotkeys
             ):
-                self.macro.stop_playback(by_hotkey)
-
-    def __on_release(self, key):
-        if len(self.hotkey_detection) != 0:
-            self.hotkey_detection.pop()
+                messagebox.showerror(
+                    self.main_app.text_content["global"]["error"],
+                    self.main_app.text_content["options_menu"]["settings_menu"]["hotkeys_settings"]["error_hotkeys"],
+                )
+                self.entry_to_change.configure(text=self.main_app.text_content["options_menu"]["settings_menu"]["hotkeys_settings"]["please_key_text"])
+                self.hotkeys = []
+                self.hotkey_visible = []
+                return True
+            self.settings.change_settings(
+                "Hotkeys", self.type_of_hotkey, None, self.hotkeys
+            )
+            self.changeKey = False
+            self.hotkeys = []
+            self.hotkey_visible = []
+        return True
+
+    def __on_press(self, keyPressed):
+        # The held keys are tracked even when hotkeys are disabled
+        triggered = self.matcher.press(keyPressed)
+        if not triggered or self.main_app.prevent_record:
+            return
+
+        by_hotkey = True
+        macro = self.macro
+        for action in triggered:
+            if action == "Record_Start" and not macro.record and not macro.playback:
+                macro.start_record(by_hotkey)
+            elif action == "Record_Stop" and macro.record and not macro.playback:
+                macro.stop_record()
+            elif (action == "Playback_Start" and not macro.record and not macro.playback
+                  and self.main_app.macro_recorded):
+                macro.start_playback()
+            elif action == "Playback_Stop" and not macro.record and macro.playback:
+                macro.stop_playback(by_hotkey)
+            else:
+                continue
+            return
 
-    def __is_hotkey_triggered(self, hotkey_config, detected_keys):
-        has_modifier = any("Key." in key for key in hotkey_config)
-        if has_modifier:
-            return set(hotkey_config) == set(detected_keys)
-        else:
-            return any(key in detected_keys for key in hotkey_config)
+    def __on_release(self, keyPressed):
+        self.matcher.release(keyPressed)
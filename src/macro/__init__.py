@@ -1 +1,7 @@
-from .macro import Macro
+def __getattr__(name):
+    # Imported lazily so the pure data modules of this package (editor, optimizer)
+    # can be used without pulling in Tk and pynput.
+    if name == "Macro":
+        from .macro import Macro
+        return Macro
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,283 @@
+"""Local HTTP API to load, play, stop and record macros from other programs.
+
+The server only listens on 127.0.0.1 and every request needs the token of
+the server in an "Authorization: Bearer <token>" header.
+
+    GET  /status                      what is playing
+    POST /load    {"path"}            compile a macro file ahead of playing it
+    POST /play    {"path", "repeat", "speed"}
+    POST /stop
+    POST /record  {"action": "start" | "stop"}
+    GET  /events                      progress as server-sent events
+
+Compiled plans are kept by a PlanCache, so playing a file already loaded
+starts injecting inputs without reading or compiling it again.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+from queue import Empty
+from secrets import compare_digest, token_urlsafe
+from threading import Event, Thread
+from time import perf_counter
+
+from macro.plan_cache import PlanCache
+from macro.player import Player
+from macro.progress import ProgressObserver
+
+KEEPALIVE = 15
+# Seconds a request waits for the window to run it
+TK_CALL_TIMEOUT = 5
+
+
+class ControlError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _read_options(request):
+    try:
+        repeat = int(request.get("repeat", 1))
+        speed = float(request.get("speed", 1))
+    except (TypeError, ValueError):
+        raise ControlError(400, "repeat and speed must be numbers")
+    if repeat < 0 or not 0 < speed <= 10:
+        raise ControlError(400, "repeat must be 0 (until stopped) or more and speed between 0.1 and 10")
+    return repeat, speed
+
+
+class HeadlessController:
+    """Plays macro files with its own Player, for the serve command"""
+
+    def __init__(self, backend, hub, idle_gap=None):
+        self.player = Player(backend)
+        self.hub = hub
+        self.idle_gap = idle_gap
+        self.plan_cache = PlanCache(backend.special_keys)
+        self.file = None
+        self.last_result = None
+        self._thread = None
+
+    def load(self, request):
+        if not request.get("path"):
+            raise ControlError(400, "path is missing")
+        started = perf_counter()
+        try:
+            macro_events, plan = self.plan_cache.get(request["path"], self.idle_gap)
+        except (OSError, ValueError) as e:
+            raise ControlError(400, str(e))
+        self.file = request["path"]
+        return {"path": self.file, "events": len(macro_events.get("events", [])), "ops": len(plan),
+                "load_ms": round((perf_counter() - started) * 1000, 3)}
+
+    def play(self, request):
+        if self.player.playing:
+            raise ControlError(409, "a macro is already playing")
+        if request.get("path"):
+            self.load(request)
+        if self.file is None:
+            raise ControlError(400, "load a macro first or give its path")
+        repeat, speed = _read_options(request)
+        try:
+            _, plan = self.plan_cache.get(self.file, self.idle_gap)
+        except (OSError, ValueError) as e:
+            raise ControlError(400, str(e))
+        self.player.playing = True
+        self._thread = Thread(target=self.__play, args=(plan, repeat or float("inf"), speed), daemon=True)
+        self._thread.start()
+        return {"path": self.file}
+
+    def __play(self, plan, repeat_times, speed):
+        observer = ProgressObserver(self.hub)
+        self.hub.publish({"event": "playback", "state": "started", "path": self.file})
+        started = perf_counter()
+        repeat_count = self.player.run(plan, repeat_times, speed, observer)
+        self.player.release_pressed()
+        self.player.playing = False
+        status = "error" if observer.error is not None else "done" if repeat_count is not None else "stopped"
+        self.last_result = {"path": self.file, "status": status, "repeats": repeat_count or 0,
+                            "duration": round(perf_counter() - started, 4)}
+        self.hub.publish({"event": "playback", "state": status, **self.last_result})
+
+    def stop(self, request):
+        playing = self.player.playing
+        self.player.stop()
+        return {"stopped": playing}
+
+    def record(self, request):
+        raise ControlError(409, "recording needs the window, use the control server of the application")
+
+    def status(self):
+        return {"playing": self.player.playing, "recording": False, "file": self.file,
+                "cached_plans": len(self.plan_cache), "last_result": self.last_result}
+
+
+class AppController:
+    """Drives the Macro of the application window. Everything touching the
+    window runs on the Tk thread, the request waits for it."""
+
+    def __init__(self, main_app):
+        self.main_app = main_app
+        self.macro = main_app.macro
+
+    def __call_in_tk(self, function, *args):
+        done = Event()
+        result = {}
+
+        def run():
+            try:
+                result["value"] = function(*args)
+            except Exception as e:
+                result["error"] = e
+            done.set()
+
+        self.main_app.after(0, run)
+        if not done.wait(TK_CALL_TIMEOUT):
+            raise ControlError(503, "the window did not answer, a dialog may be open")
+        if "error" in result:
+            raise result["error"]
+        return result.get("value")
+
+    def load(self, request):
+        if not request.get("path"):
+            raise ControlError(400, "path is missing")
+        started = perf_counter()
+        try:
+            macro_events, plan = self.macro.plan_cache.get(request["path"], self.macro.idle_gap())
+        except (OSError, ValueError) as e:
+            raise ControlError(400, str(e))
+        return {"path": request["path"], "events": len(macro_events.get("events", [])), "ops": len(plan),
+                "load_ms": round((perf_counter() - started) * 1000, 3)}
+
+    def play(self, request):
+        if self.macro.playback or self.macro.record:
+            raise ControlError(409, "a macro is already playing or recording")
+        repeat, speed = _read_options(request)
+        if request.get("path"):
+            self.load(request)
+            self.__call_in_tk(self.macro.play_file, request["path"], repeat or float("inf"), speed)
+            return {"path": request["path"]}
+        if not self.main_app.macro_recorded:
+            raise ControlError(400, "no macro is open, give its path")
+        # The macro open in the window, with the playback settings of the window
+        self.__call_in_tk(self.macro.start_playback)
+        return {"path": self.main_app.current_file}
+
+    def stop(self, request):
+        playing = self.macro.playback
+        if playing:
+            self.__call_in_tk(self.macro.stop_playback, True)
+        return {"stopped": playing}
+
+    def record(self, request):
+        action = request.get("action")
+        if action == "start":
+            if self.macro.playback or self.macro.record:
+                raise ControlError(409, "a macro is already playing or recording")
+            self.__call_in_tk(self.macro.start_record, True)
+        elif action == "stop":
+            if not self.macro.record:
+                raise ControlError(409, "nothing is being recorded")
+            self.__call_in_tk(self.macro.stop_record)
+        else:
+            raise ControlError(400, "action must be start or stop")
+        return {"recording": self.macro.record}
+
+    def status(self):
+        return {"playing": self.macro.playback, "recording": self.macro.record, "file": self.main_app.current_file,
+                "cached_plans": len(self.macro.plan_cache)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "PyMacroRecord"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if not self.__authorized():
+            return
+        if self.path == "/status":
+            self.__reply(200, self.server.controller.status())
+        elif self.path == "/events":
+            self.__stream_events()
+        else:
+            self.__reply(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if not self.__authorized():
+            return
+        actions = {"/load": "load", "/play": "play", "/stop": "stop", "/record": "record"}
+        if self.path not in actions:
+            self.__reply(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = loads(self.rfile.read(length) or b"{}") if length else {}
+            if not isinstance(request, dict):
+                raise ValueError
+        except ValueError:
+            self.__reply(400, {"error": "the body must be a json object"})
+            return
+        try:
+            self.__reply(200, getattr(self.server.controller, actions[self.path])(request))
+        except ControlError as e:
+            self.__reply(e.status, {"error": str(e)})
+
+    def __authorized(self):
+        if compare_digest(self.headers.get("Authorization", ""), f"Bearer {self.server.token}"):
+            return True
+        self.__reply(401, {"error": "missing or wrong token"})
+        return False
+
+    def __reply(self, status, body):
+        data = dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __stream_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        queue = self.server.hub.subscribe()
+        try:
+            while not self.server.closing.is_set():
+                try:
+                    message = f"data: {dumps(queue.get(timeout=KEEPALIVE))}\n\n"
+                except Empty:
+                    message = ": keepalive\n\n"
+                self.wfile.write(message.encode())
+                self.wfile.flush()
+        except OSError:
+            pass  # Subscriber gone
+        finally:
+            self.server.hub.unsubscribe(queue)
+
+
+class ControlServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, controller, hub, port=0, token=None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.controller = controller
+        self.hub = hub
+        self.token = token or token_urlsafe(24)
+        self.closing = Event()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        Thread(target=self.serve_forever, name="control-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.closing.set()
+        self.hub.publish({"event": "closing"})
+        self.shutdown()
+        self.server_close()
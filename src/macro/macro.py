@@ -1,49 +1,128 @@
 from datetime import datetime
-from os import getlogin, system
+from os import getlogin, path, system
 from sys import platform
 from threading import Thread
-from time import sleep, time
+from time import perf_counter, time
 from tkinter import DISABLED, NORMAL, messagebox
 
-from pynput import keyboard, mouse
-from pynput.keyboard import Key  # FUTURE SELF: DON'T REMOVE THIS!!
-from pynput.mouse import Button
-
-from utils.get_key_pressed import getKeyPressed
-from utils.keys import vk_nb
+from backends import create_backend
+from backends.input_dispatcher import InputDispatcher
+from macro.macro_editor import pass_text_bursts
+from macro.plan_cache import PlanCache
+from macro.playback_plan import MacroCompileError, compile_plan, plan_duration
+from macro.player import PlaybackObserver, Player
+from macro.progress import ProgressHub, ProgressObserver
+from macro.telemetry import RecordingStats, TimingRecorder, timing_report
+from macro.playlist import PlaylistPreloader, new_playlist_item
+from macro.scheduler import DailySchedule, Scheduler, load_jobs, save_jobs
+from utils.profiling import profiled
 from utils.record_file_management import RecordFileManagement
 from utils.show_toast import show_notification_minim
 from utils.warning_pop_up_save import confirm_save
 
 
+RECORDER_PRIORITY = 0
+
+
+class _MainAppObserver(PlaybackObserver):
+    """Shows the playback progress in the status bar and the editor"""
+
+    def __init__(self, macro, highlight=True):
+        self.macro = macro
+        self.main_app = macro.main_app
+        self.highlight = highlight
+
+    def on_event(self, source, repeat, repeat_times, elapsed):
+        self.main_app.status_text.configure(
+            text=f"Repeat: {repeat}/{repeat_times}, Time elapsed: {int(elapsed)}s")
+        # Highlight the active row in the editor (thread-safe via after())
+        if self.highlight:
+            self.main_app.after(0, lambda: self.main_app.editor.highlight_event(source))
+
+    def on_error(self, error):
+        messagebox.showerror("Error", f"An unexpected error occurred\n{error}")
+        self.macro.stop_playback()
+
+
 class Macro:
     """Init a new Macro"""
 
     def __init__(self, main_app):
         self.showEventsOnStatusBar = None
-        self.mouseControl = mouse.Controller()
-        self.keyboardControl = keyboard.Controller()
-        self.record = False
-        self.playback = False
-        self.macro_events = {}
         self.main_app = main_app
         self.user_settings = self.main_app.settings
+        self.backend = self.__create_backend(self.user_settings.get_str("Others", "Input_Backend", default="pynput"))
+        self.player = Player(self.backend)
+        self.record = False
+        self.macro_events = {}
         self.main_menu = self.main_app.menu
         self.macro_file_management = RecordFileManagement(self.main_app, self.main_menu)
 
         self.mouseBeingListened = None
         self.keyboardBeingListened = None
-        self.keyboard_listener = None
         self.mouse_listener = None
         self.time = time()
         self.event_delta_time=0
         self._start_event_index = 0
+        self._plan = None
+        self.playlist_items = []
+        self.playlist_results = []
+        self.last_timing = None
+        self.last_timing_report = None
+        self.recording_stats = RecordingStats()
+        # Compiled macro files and progress subscribers, shared with the control server
+        self.plan_cache = PlanCache(self.backend.special_keys)
+        self.progress = ProgressHub()
+
+        self.jobs_file = path.join(self.user_settings.get_path(), "schedules.json")
+        self.scheduled_jobs = load_jobs(self.jobs_file)
+        self.scheduler = Scheduler(self.__run_scheduled_job, on_run=lambda job: self.save_scheduled_jobs())
+        self._scheduled_start = None
+        if self.scheduled_jobs:
+            self.scheduler.set_jobs(self.scheduled_jobs)
+
+        # Shared with the hotkeys, keys played by the software do not trigger them
+        self.input_dispatcher = InputDispatcher(self.backend,
+                                                ignore_injected=lambda: self.playback and not self.record)
+        self.input_dispatcher.subscribe(on_press=self.__on_press, on_release=self.__on_release,
+                                        priority=RECORDER_PRIORITY)
+        self.input_dispatcher.start()
+
+    @property
+    def playback(self):
+        return self.player.playing
+
+    @playback.setter
+    def playback(self, playing):
+        self.player.playing = playing
+
+    @staticmethod
+    def __create_backend(name):
+        try:
+            return create_backend(name)
+        except Exception as e:  # Missing module, no X display...
+            if name == "pynput":
+                raise
+            print(f"input backend {name} unavailable ({e}), using pynput")
+            return create_backend("pynput")
+
+    def set_backend(self, name):
+        """Play the next macros with the input backend name, saved in the settings"""
+        if self.playback or self.record:
+            return
+        try:
+            backend = create_backend(name)
+        except Exception as e:
+            messagebox.showerror(self.main_app.text_content["global"]["error"],
+                                 f"{self.main_app.text_content['options_menu']['others_menu']['input_backend_error']}\n{e}")
+            self.main_menu.inputBackend.set(self.user_settings.settings_dict["Others"]["Input_Backend"])
+            return
+        self.user_settings.change_settings("Others", "Input_Backend", None, name)
+        self.backend = backend
+        self.player.backend = backend
+        self.plan_cache = PlanCache(backend.special_keys)
 
-        self.keyboard_listener = keyboard.Listener(
-                on_press=self.__on_press, on_release=self.__on_release
-            )
-        self.keyboard_listener.start()
-
+    @profiled("start_record")
     def start_record(self, by_hotkey=False):
         if self.main_app.prevent_record:
             return
@@ -55,6 +134,7 @@ class Macro:
                 elif wantToSave is None:
                     return
         self.macro_events = {"events": []}
+        self.recording_stats = RecordingStats()
         self.record = True
         self.time = time()
         self.event_delta_time=0
@@ -64,7 +144,7 @@ class Macro:
             userSettings["Recordings"]["Mouse_Move"]
             and userSettings["Recordings"]["Mouse_Click"]
         ):
-            self.mouse_listener = mouse.Listener(
+            self.mouse_listener = self.backend.mouse_listener(
                 on_move=self.__on_move,
                 on_click=self.__on_click,
                 on_scroll=self.__on_scroll,
@@ -72,13 +152,13 @@ class Macro:
             self.mouse_listener.start()
             self.mouseBeingListened = True
         elif userSettings["Recordings"]["Mouse_Move"]:
-            self.mouse_listener = mouse.Listener(
+            self.mouse_listener = self.backend.mouse_listener(
                 on_move=self.__on_move, on_scroll=self.__on_scroll
             )
             self.mouse_listener.start()
             self.mouseBeingListened = True
         elif userSettings["Recordings"]["Mouse_Click"]:
-            self.mouse_listener = mouse.Listener(
+            self.mouse_listener = self.backend.mouse_listener(
                 on_click=self.__on_click, on_scroll=self.__on_scroll
             )
             self.mouse_listener.start()
@@ -97,8 +177,10 @@ class Macro:
         if userSettings["Minimization"]["When_Recording"]:
             self.main_app.withdraw()
             Thread(target=lambda: show_notification_minim(self.main_app)).start()
+        self.progress.publish({"event": "record", "state": "started"})
         print("record started")
 
+    @profiled("stop_record")
     def stop_record(self):
         if not self.record:
             return
@@ -130,185 +212,197 @@ class Macro:
         if userSettings["Minimization"]["When_Recording"]:
             self.main_app.deiconify()
 
+        self.recording_stats.stop()
+        stats = self.recording_stats.to_dict()
+        self.macro_events["metadata"] = {"recording": stats}
+        print(f"recorded {stats['events']} events, callbacks took {stats['callback_mean_us']}us on average")
+
+        if userSettings["Recordings"]["Compress_Text"]:
+            self.macro_events["events"] = pass_text_bursts(self.macro_events["events"])[0]
+
         self.main_app.editor.refresh(self.macro_events)
         self.main_app._set_edit_delete_state("normal")
 
+        self.progress.publish({"event": "record", "state": "stopped",
+                               "events": len(self.macro_events.get("events", []))})
         print("record stopped")
 
     def start_playback(self, start_event_index=0):
+        try:
+            base_dir = path.dirname(path.abspath(self.main_app.current_file)) if self.main_app.current_file else None
+            self._plan = compile_plan(self.macro_events, self.backend.special_keys, base_dir, self.idle_gap())
+        except MacroCompileError as e:
+            messagebox.showerror(self.main_app.text_content["global"]["error"], str(e))
+            return
+        if self._plan.changed_includes and not self.__relink_includes(self._plan.changed_includes):
+            return
         self._start_event_index = start_event_index
+        userSettings = self.user_settings.settings_dict
+        self.__enter_playback_state()
+        scheduled = userSettings["Playback"]["Repeat"]["Scheduled"]
+        if scheduled > 0:
+            # Waited for on the scheduler thread, playing starts at that time
+            due = DailySchedule(scheduled).next_after(datetime.now()).timestamp()
+            self._scheduled_start = self.scheduler.call_at(
+                due, lambda: self.main_app.after(0, self.__start_playback_thread))
+        else:
+            self.__start_playback_thread()
+        print("playback started")
+
+    def __relink_includes(self, changed_includes):
+        """Ask whether to play included macros changed since they were linked.
+        When so, the includeMacro events of this macro are linked to the new content."""
+        files = "\n".join(sorted({path.basename(include_path) for _, include_path, _ in changed_includes}))
+        if not messagebox.askyesno(self.main_app.text_content["global"]["confirm"],
+                                   self.main_app.text_content["global"]["include_changed"].format(files=files)):
+            return False
+        # Includes of the included files are left to them
+        own_events = {id(event) for events in [self.macro_events.get("events", [])]
+                      + list(self.macro_events.get("subroutines", {}).values()) for event in events}
+        for event, _, digest in changed_includes:
+            if id(event) in own_events:
+                event["sha256"] = digest
+                self.main_app.macro_saved = False
+        return True
+
+    def idle_gap(self, threshold=None, cap=None):
+        """(threshold, cap) of the Compress_Idle setting, or of the given values, None when off"""
+        if threshold is None:
+            threshold = self.user_settings.get_float("Playback", "Compress_Idle", "Threshold", default=0)
+            cap = self.user_settings.get_float("Playback", "Compress_Idle", "Cap", default=1)
+        return (threshold, min(cap, threshold)) if threshold > 0 else None
+
+    def estimate_duration(self, speed, idle_gap=None):
+        """Seconds one repeat of the current macro lasts at speed, None if it cannot be compiled"""
+        base_dir = path.dirname(path.abspath(self.main_app.current_file)) if self.main_app.current_file else None
+        try:
+            plan = compile_plan(self.macro_events, self.backend.special_keys, base_dir, idle_gap)
+        except MacroCompileError:
+            return None
+        return plan_duration(plan, speed, self.user_settings.get_float("Others", "Fixed_timestamp", default=0))
+
+    def __start_playback_thread(self):
+        self._scheduled_start = None
+        if not self.playback:
+            return
+        userSettings = self.user_settings.settings_dict
+        if userSettings["Playback"]["Repeat"]["Interval"] > 0:
+            Thread(target=self.__play_interval).start()
+        elif userSettings["Playback"]["Repeat"]["For"] > 0:
+            Thread(target=self.__play_for).start()
+        elif userSettings["Playback"]["Repeat"]["For"] > 0 and userSettings["Playback"]["Repeat"]["Interval"] > 0:
+            Thread(target=self.__play_interval).start()
+        else:
+            Thread(target=self.__play_events).start()
+
+    def start_playlist(self, items):
+        """Play the macro files of items one after the other, each with its own repeat and speed."""
+        if self.playback or self.record or not items:
+            return
+        self.playlist_results = []
+        self.__enter_playback_state()
+        Thread(target=self.__play_playlist, args=(items,)).start()
+        print("playlist started")
+
+    def play_file(self, file_path, repeat=1, speed=1):
+        """Play a macro file without opening it, its compiled plan is reused while the file is unchanged"""
+        self.start_playlist([new_playlist_item(file_path, repeat, speed)])
+
+    def __enter_playback_state(self):
         userSettings = self.user_settings.settings_dict
         self.playback = True
         self.main_app.playBtn.configure(
-            image=self.main_app.stopImg, command=lambda: self.stop_playback(True)
+            image=self.main_app.stopImg, command=lambda: self.stop_playback(True), state=NORMAL
         )
         self.main_menu.file_menu.entryconfig(self.main_app.text_content["file_menu"]["save_text"], state=DISABLED)
         self.main_menu.file_menu.entryconfig(self.main_app.text_content["file_menu"]["save_as_text"], state=DISABLED)
         self.main_menu.file_menu.entryconfig(self.main_app.text_content["file_menu"]["new_text"], state=DISABLED)
         self.main_menu.file_menu.entryconfig(self.main_app.text_content["file_menu"]["load_text"], state=DISABLED)
         self.main_app.recordBtn.configure(state=DISABLED)
+        self.progress.publish({"event": "playback", "state": "started", "path": self.main_app.current_file})
         if userSettings["Minimization"]["When_Playing"]:
             self.main_app.withdraw()
             Thread(target=lambda: show_notification_minim(self.main_app)).start()
-        if userSettings["Playback"]["Repeat"]["Interval"] > 0:
-            Thread(target=self.__play_interval).start()
-        elif userSettings["Playback"]["Repeat"]["For"] > 0:
-            Thread(target=self.__play_for).start()
-        elif userSettings["Playback"]["Repeat"]["For"] > 0 and userSettings["Playback"]["Repeat"]["Interval"] > 0:
-            Thread(target=self.__play_interval).start()
-        else:
-            Thread(target=self.__play_events).start()
-        print("playback started")
+
+    def __play_playlist(self, items):
+        userSettings = self.user_settings.settings_dict
+        observer = ProgressObserver(self.progress, _MainAppObserver(self, highlight=False))
+        preloader = PlaylistPreloader(items, self.backend.special_keys, self.idle_gap(), self.plan_cache)
+        try:
+            for index, item in enumerate(items):
+                if not self.playback:
+                    break
+                result = {"path": item["path"], "repeat": item["repeat"], "speed": item["speed"]}
+                self.playlist_results.append(result)
+                waited = time()
+                try:
+                    _, plan = preloader.get(index)
+                except (OSError, ValueError) as e:
+                    result.update(status="error", error=str(e))
+                    print(f"playlist item {item['path']} skipped: {e}")
+                    continue
+                result["load_wait"] = time() - waited
+                started = time()
+                repeat_count = self.__run_plan(plan, item["repeat"], item["speed"], observer)
+                result["duration"] = time() - started
+                result["repeats_done"] = repeat_count or 0
+                result["status"] = "done" if repeat_count is not None else "stopped"
+                print(f"playlist item {item['path']}: {result['status']} in {result['duration']:.3f}s "
+                      f"(waited {result['load_wait'] * 1000:.1f}ms for loading)")
+                if repeat_count is None:
+                    return
+        finally:
+            preloader.close()
+        self.player.release_pressed()
+        if self.playback:
+            self.stop_playback()
+            if userSettings["Minimization"]["When_Playing"]:
+                self.main_app.deiconify()
 
     def __play_interval(self):
         userSettings = self.user_settings.settings_dict
-        if userSettings["Playback"]["Repeat"]["For"] > 0:
-            self.__play_for()
-        else:
-            self.__play_events()
-        timer = time()
+        # Each run starts Interval seconds after the end of the previous one,
+        # the wait ends at once when the playback is stopped
         while self.playback:
-            sleep(1)
-            if time() - timer >= userSettings["Playback"]["Repeat"]["Interval"]:
-                if userSettings["Playback"]["Repeat"]["For"] > 0:
-                    self.__play_for()
-                else:
-                    self.__play_events()
-                timer = time()
-
+            if userSettings["Playback"]["Repeat"]["For"] > 0:
+                self.__play_for()
+            else:
+                self.__play_events()
+            self.player.wait(userSettings["Playback"]["Repeat"]["Interval"])
 
     def __play_for(self):
         userSettings = self.user_settings.settings_dict
-        debut = time()
-        while self.playback and (time() - debut) < userSettings["Playback"]["Repeat"]["For"]:
-            self.__play_events()
-        if userSettings["Playback"]["Repeat"]["Interval"] == 0:
+        # Repeats until the deadline, which can stop the macro in the middle
+        self.__play_events(end_at=perf_counter() + userSettings["Playback"]["Repeat"]["For"])
+        if userSettings["Playback"]["Repeat"]["Interval"] == 0 and self.playback:
             self.stop_playback()
 
-    def __play_events(self):
-        global keyToPress
+    @profiled("play_events")
+    def __play_events(self, end_at=None):
         userSettings = self.user_settings.settings_dict
-        click_func = {
-            "leftClickEvent": Button.left,
-            "rightClickEvent": Button.right,
-            "middleClickEvent": Button.middle,
-        }
-        keyToUnpress = []
 
         is_infinite = userSettings["Playback"]["Repeat"].get("Infinite", False)
 
-        if userSettings["Playback"]["Repeat"]["For"] > 0:
-            repeat_times = 1
+        if end_at is not None:
+            repeat_times = float('inf')
         elif is_infinite:
             repeat_times = float('inf')
         else:
             repeat_times = userSettings["Playback"]["Repeat"]["Times"]
 
-        if userSettings["Playback"]["Repeat"]["Scheduled"] > 0:
-            now = datetime.now()
-            seconds_since_midnight = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
-            secondsToWait = userSettings["Playback"]["Repeat"]["Scheduled"] - seconds_since_midnight
-            if secondsToWait < 0:
-                secondsToWait = 86400 + secondsToWait  # 86400 + -secondsToWait. Meaning it will happen tomorrow
-            sleep(secondsToWait)
-
-        repeat_count = 0
-        now = time()
-
-        while self.playback and (is_infinite or repeat_count < repeat_times):
-            # First repeat can start mid-macro (play from selected row)
-            start_idx = self._start_event_index if repeat_count == 0 else 0
-            for events in range(start_idx, len(self.macro_events["events"])):
-                elapsed_time = int(time() - now)
-                self.main_app.status_text.configure(
-                    text=f"Repeat: {repeat_count + 1}/{repeat_times}, Time elapsed: {elapsed_time}s")
-                if not self.playback:
-                    self.unPressEverything(keyToUnpress)
-                    return
-
-                if userSettings["Others"]["Fixed_timestamp"] > 0:
-                    timeSleep = userSettings["Others"]["Fixed_timestamp"]
-                else:
-                    timeSleep = (
-                            self.macro_events["events"][events]["timestamp"]
-                            * (1 / userSettings["Playback"]["Speed"])
-                    )
-                if timeSleep < 0:
-                    timeSleep = abs(timeSleep)
-                sleep(timeSleep)
-                event_type = self.macro_events["events"][events]["type"]
-
-                # Skip disabled events
-                if self.macro_events["events"][events].get("disabled", False):
-                    continue
-
-                # Highlight the active row in the editor (thread-safe via after())
-                self.main_app.after(
-                    0, lambda i=events: self.main_app.editor.highlight_event(i)
-                )
-
-                if event_type == "delayEvent":  # Pure delay — already slept above
-                    continue
+        timing = TimingRecorder()
+        repeat_count = self.__run_plan(self._plan, repeat_times, userSettings["Playback"]["Speed"],
+                                       ProgressObserver(self.progress, _MainAppObserver(self)),
+                                       self._start_event_index, timing, end_at)
+        self.last_timing = timing
+        self.last_timing_report = timing_report(timing)
+        if self.last_timing_report is not None:
+            print(f"playback lateness: mean {self.last_timing_report['mean_ms']}ms, "
+                  f"p99 {self.last_timing_report['p99_ms']}ms, max {self.last_timing_report['max_ms']}ms")
+        if repeat_count is None:
+            return
 
-                if event_type == "cursorMove":  # Cursor Move
-                    self.mouseControl.position = (
-                        self.macro_events["events"][events]["x"],
-                        self.macro_events["events"][events]["y"],
-                    )
-
-                elif event_type in click_func:  # Mouse Click
-                    self.mouseControl.position = (
-                        self.macro_events["events"][events]["x"],
-                        self.macro_events["events"][events]["y"],
-                    )
-                    if self.macro_events["events"][events]["pressed"]:
-                        self.mouseControl.press(click_func[event_type])
-                    else:
-                        self.mouseControl.release(click_func[event_type])
-
-                elif event_type == "scrollEvent":
-                    self.mouseControl.scroll(
-                        self.macro_events["events"][events]["dx"],
-                        self.macro_events["events"][events]["dy"],
-                    )
-
-                elif event_type == "keyboardEvent":  # Keyboard Press,Release
-                    if self.macro_events["events"][events]["key"] is not None:
-                        try:
-                            if "Key." not in self.macro_events["events"][events]["key"]:
-                                keyToPress = self.macro_events["events"][events]["key"]
-                            else:
-                                keyToPress = eval(self.macro_events["events"][events]["key"])
-                            if isinstance(keyToPress, str):
-                                if ">" in keyToPress:
-                                    try:
-                                        keyToPress = vk_nb[keyToPress]
-                                    except:
-                                        keyToPress = None
-                            if self.playback:
-                                if keyToPress is not None:
-                                    if self.macro_events["events"][events]["pressed"]:
-                                        self.keyboardControl.press(keyToPress)
-                                        if keyToPress not in keyToUnpress:
-                                            keyToUnpress.append(keyToPress)
-                                    else:
-                                        self.keyboardControl.release(keyToPress)
-                        except ValueError as e:
-                            messagebox.showerror("Error",
-                                                 f"Error during playback \"{e}\". Please open an issue on Github.")
-                            self.stop_playback()
-                        except Exception as e:
-                            messagebox.showerror("Error",
-                                                 f"An unexpected error occurred\n{e}")
-                            self.stop_playback()
-
-            repeat_count += 1
-
-            if userSettings["Playback"]["Repeat"]["Delay"] > 0:
-                if is_infinite or repeat_count < repeat_times:
-                    sleep(userSettings["Playback"]["Repeat"]["Delay"])
-
-        self.unPressEverything(keyToUnpress)
+        self.player.release_pressed()
         # Clear the playing highlight only on natural completion
         self.main_app.after(0, self.main_app.editor.clear_highlight)
         if userSettings["Playback"]["Repeat"]["Interval"] == 0 and userSettings["Playback"]["Repeat"]["For"] == 0 and repeat_count:
@@ -316,22 +410,53 @@ class Macro:
             if userSettings["Minimization"]["When_Playing"]:
                 self.main_app.deiconify()
 
-    def unPressEverything(self, keyToUnpress):
-        for key in keyToUnpress:
-            self.keyboardControl.release(key)
-        self.mouseControl.release(Button.left)
-        self.mouseControl.release(Button.middle)
+    def __run_plan(self, plan, repeat_times, speed, observer, start_event_index=0, timing=None, end_at=None):
+        """Play plan with the playback settings.
+        Returns the number of completed repeats, or None when the playback was stopped."""
+        userSettings = self.user_settings.settings_dict
+        # The repeat delay is not used by For, which runs the macro back to back
+        repeat_delay = userSettings["Playback"]["Repeat"]["Delay"] if end_at is None else 0
+        return self.player.run(plan, repeat_times, speed, observer, start_event_index,
+                               userSettings["Others"]["Fixed_timestamp"], repeat_delay, timing, end_at)
+
+    def set_scheduled_jobs(self, jobs):
+        """Replace the scheduled jobs, saved in schedules.json next to the settings"""
+        self.scheduled_jobs = jobs
+        self.save_scheduled_jobs()
+        self.scheduler.set_jobs(jobs)
+
+    def save_scheduled_jobs(self):
+        try:
+            save_jobs(self.jobs_file, self.scheduled_jobs)
+        except OSError as e:
+            print(f"cannot save the scheduled jobs: {e}")
+
+    def __run_scheduled_job(self, job):
+        # Called from the scheduler thread
+        self.main_app.after(0, lambda: self.__start_scheduled_job(job))
+
+    def __start_scheduled_job(self, job):
+        if self.playback or self.record:
+            print(f"scheduled job {job['path']} skipped: a macro is playing or recording")
+            return
+        print(f"scheduled job {job['path']} started")
+        self.start_playlist([new_playlist_item(job["path"], job["repeat"], job["speed"])])
 
     def stop_playback(self, playback_stopped_manually=False):
         self.playback = False
+        if self._scheduled_start is not None:
+            self.scheduler.cancel(self._scheduled_start)
+            self._scheduled_start = None
         if not playback_stopped_manually:
             print("playback stopped")
         else:
             print("playback stopped manually")
+        self.progress.publish({"event": "playback", "state": "stopped" if playback_stopped_manually else "done"})
         userSettings = self.user_settings.settings_dict
         self.main_app.recordBtn.configure(state=NORMAL)
         self.main_app.playBtn.configure(
-            image=self.main_app.playImg, command=self.start_playback
+            image=self.main_app.playImg, command=self.start_playback,
+            state=NORMAL if self.main_app.macro_recorded else DISABLED
         )
         self.main_menu.file_menu.entryconfig(self.main_app.text_content["file_menu"]["save_text"], state=NORMAL)
         self.main_menu.file_menu.entryconfig(self.main_app.text_content["file_menu"]["save_as_text"], state=NORMAL)
@@ -384,23 +509,33 @@ class Macro:
         self.event_delta_time = timenow - self.time
         self.time=timenow
 
+    def __show_event(self, text):
+        started = perf_counter()
+        self.main_app.status_text.configure(text=text)
+        self.recording_stats.add_status(perf_counter() - started)
+
     def __on_move(self, x, y):
+        started = perf_counter()
         self.__get_event_delta_time()
         self.__record_event(
             {"type": "cursorMove", "x": x, "y": y}
         )
         if self.showEventsOnStatusBar:
-            self.main_app.status_text.configure(text=f"cursorMove {x} {y}")
+            self.__show_event(f"cursorMove {x} {y}")
+        self.recording_stats.add("cursorMove", perf_counter() - started)
 
     def __on_click(self, x, y, button, pressed):
+        started = perf_counter()
         self.__get_event_delta_time()
         button_event = "unknownButtonClickEvent"
-        if button == Button.left:
+        if button == "left":
             button_event = "leftClickEvent"
-        elif button == Button.right:
+        elif button == "right":
             button_event = "rightClickEvent"
-        elif button == Button.middle:
+        elif button == "middle":
             button_event = "middleClickEvent"
+        else:
+            self.recording_stats.drop()
         self.__record_event(
             {
                 "type": button_event,
@@ -410,20 +545,25 @@ class Macro:
             }
         )
         if self.showEventsOnStatusBar:
-            self.main_app.status_text.configure(text=f"{button_event} {x} {y} {pressed}")
+            self.__show_event(f"{button_event} {x} {y} {pressed}")
+        self.recording_stats.add(button_event, perf_counter() - started)
 
     def __on_scroll(self, x, y, dx, dy):
+        started = perf_counter()
         self.__get_event_delta_time()
         self.__record_event(
             {"type": "scrollEvent", "dx": dx, "dy": dy}
         )
         if self.showEventsOnStatusBar:
-            self.main_app.status_text.configure(text=f"scrollEvent {dx} {dy}")
+            self.__show_event(f"scrollEvent {dx} {dy}")
+        self.recording_stats.add("scrollEvent", perf_counter() - started)
 
-    def __on_press(self, key):
+    def __on_press(self, keyPressed):
+        started = perf_counter()
         self.__get_event_delta_time()
-        keyPressed = getKeyPressed(self.keyboard_listener, key)
         if self.keyboardBeingListened:
+            if keyPressed is None:
+                self.recording_stats.drop()
             self.__record_event(
                 {
                     "type": "keyboardEvent",
@@ -432,12 +572,16 @@ class Macro:
                 }
             )
         if self.showEventsOnStatusBar:
-            self.main_app.status_text.configure(text=f"keyboardEvent {keyPressed} pressed")
+            self.__show_event(f"keyboardEvent {keyPressed} pressed")
+        if self.keyboardBeingListened:
+            self.recording_stats.add("keyboardEvent", perf_counter() - started)
 
-    def __on_release(self, key):
+    def __on_release(self, keyPressed):
+        started = perf_counter()
         self.__get_event_delta_time()
-        keyPressed = getKeyPressed(self.keyboard_listener, key)
         if self.keyboardBeingListened:
+            if keyPressed is None:
+                self.recording_stats.drop()
             self.__record_event(
                 {
                     "type": "keyboardEvent",
@@ -446,4 +590,6 @@ class Macro:
                 }
             )
         if self.showEventsOnStatusBar:
-            self.main_app.status_text.configure(text=f"keyboardEvent {keyPressed} released")
+            self.__show_event(f"keyboardEvent {keyPressed} released")
+        if self.keyboardBeingListened:
+            self.recording_stats.add("keyboardEvent", perf_counter() - started)
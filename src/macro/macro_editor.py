@@ -1,6 +1,11 @@
 import copy
 import math
 
+from utils.profiling import profiled
+
+CLICK_TYPES = ("leftClickEvent", "rightClickEvent", "middleClickEvent")
+BLOCK_TYPES = ("loopStart", "loopEnd", "callSubroutine", "includeMacro")
+
 
 class MacroEditor:
     """Pure data-layer for editing macro events.
@@ -205,6 +210,7 @@ class MacroEditor:
             # All intermediate points are within tolerance, keep only endpoints
             return [0, len(points) - 1]
 
+    @profiled("simplify_path")
     def simplify_path(self, start_idx, end_idx, tolerance):
         """Apply RDP simplification to cursorMove events[start_idx..end_idx].
 
@@ -272,3 +278,464 @@ class MacroEditor:
 
     def _mark_unsaved(self):
         self.macro.main_app.macro_saved = False
+
+    # ── Optimizer ────────────────────────────────────────────────────
+
+    def optimize(self, passes=None):
+        """Run the optimizer pipeline in place on the events and every subroutine.
+        Returns the per-pass report of optimize_events(), summed over all of them."""
+        report = optimize_macro(self.macro.macro_events, passes)
+        if report["events_removed"]:
+            self._mark_unsaved()
+        return report
+
+    # ── Loops and subroutines ────────────────────────────────────────
+
+    @property
+    def subroutines(self):
+        return self.macro.macro_events.get("subroutines", {})
+
+    @staticmethod
+    def _whole_loops(body):
+        """True when every loop opened in body is closed in it and the other way round"""
+        depth = 0
+        for event in body:
+            depth += {"loopStart": 1, "loopEnd": -1}.get(event.get("type"), 0)
+            if depth < 0:
+                return False
+        return depth == 0
+
+    def wrap_in_loop(self, start_idx, end_idx, times):
+        """Repeat events[start_idx..end_idx] times times at playback.
+        Returns False when the range would split a loop."""
+        if not self._whole_loops(self.events[start_idx:end_idx + 1]):
+            return False
+        self.events.insert(end_idx + 1, {"type": "loopEnd", "timestamp": 0})
+        self.events.insert(start_idx, {"type": "loopStart", "times": times, "timestamp": 0})
+        self._mark_unsaved()
+        return True
+
+    def extract_subroutine(self, start_idx, end_idx, name):
+        """Move events[start_idx..end_idx] into the subroutine name and call it in their place.
+        The events are appended to the subroutine when it already exists.
+        Returns False when the range would split a loop."""
+        body = self.events[start_idx:end_idx + 1]
+        if not self._whole_loops(body):
+            return False
+        subroutines = self.macro.macro_events.setdefault("subroutines", {})
+        subroutines.setdefault(name, []).extend(body)
+        self.events[start_idx:end_idx + 1] = [{"type": "callSubroutine", "name": name, "timestamp": 0}]
+        self._mark_unsaved()
+        return True
+
+    def rename_subroutine(self, old_name, new_name):
+        """Rename the subroutine old_name and every call to it, from the events and
+        from the other subroutines. Returns False when old_name does not exist or
+        new_name is taken."""
+        subroutines = self.subroutines
+        if old_name not in subroutines or not new_name or new_name in subroutines:
+            return False
+        subroutines[new_name] = subroutines.pop(old_name)
+        for events in [self.events] + list(subroutines.values()):
+            for event in events:
+                if event.get("type") == "callSubroutine" and event.get("name") == old_name:
+                    event["name"] = new_name
+        self._mark_unsaved()
+        return True
+
+
+def display_value(ev):
+    """Value of an event as matched by find & replace"""
+    etype = ev.get("type", "")
+    if etype == "cursorMove":
+        return f"({ev.get('x',0)},{ev.get('y',0)})"
+    if etype in CLICK_TYPES:
+        return f"({ev.get('x',0)},{ev.get('y',0)})"
+    if etype == "scrollEvent":
+        return f"dx={ev.get('dx',0)}, dy={ev.get('dy',0)}"
+    if etype == "keyboardEvent":
+        return str(ev.get("key", ""))
+    if etype == "typeText":
+        return ev.get("text", "")
+    if etype == "waitFor":
+        region = ",".join(str(value) for value in ev.get("region", ()))
+        return f"{ev.get('image') or ev.get('color', '')} in ({region}), {ev.get('timeout', 30)} s"
+    return ""
+
+
+def set_wait_for(ev, region, target, tolerance=0, timeout=30):
+    """Fill a waitFor event from the editor texts: region "x,y,w,h", target a
+    #rrggbb colour or an image path. Raises ValueError on invalid texts."""
+    values = [int(float(value)) for value in region.replace(" ", "").split(",")]
+    if len(values) != 4 or values[2] <= 0 or values[3] <= 0:
+        raise ValueError(region)
+    target = target.strip()
+    if not target:
+        raise ValueError(target)
+    ev.pop("color", None)
+    ev.pop("image", None)
+    ev["color" if target.startswith("#") else "image"] = target
+    ev["region"] = values
+    ev["tolerance"] = int(float(tolerance))
+    ev["timeout"] = float(timeout)
+    return ev
+
+
+def find_replace(events, groups, type_filter=None, find_val="", repl_comment="",
+                 repl_delay=None, key_from="", key_to=""):
+    """Apply find & replace to the editor groups (see build_groups) matching
+    type_filter and whose value contains find_val. Returns the number of
+    groups changed."""
+    replaced = 0
+    find_val = find_val.lower()
+
+    for group in groups:
+        # Collect events for this group
+        if group["kind"] == "move_group":
+            ev_indices = range(group["start"], group["end"] + 1)
+        else:
+            ev_indices = (group["index"],)
+
+        # Check type filter — use representative event
+        rep = events[ev_indices[0]]
+        if type_filter is not None and rep["type"] != type_filter:
+            continue
+
+        # Check value contains filter (against display value of first event)
+        if find_val and find_val not in display_value(rep).lower():
+            continue
+
+        # Apply replacements
+        matched = False
+        for idx in ev_indices:
+            ev = events[idx]
+
+            if repl_delay is not None:
+                ev["timestamp"] = repl_delay
+                matched = True
+
+            if repl_comment:
+                ev["comment"] = repl_comment
+                matched = True
+
+            if key_from and key_to and ev.get("type") == "keyboardEvent":
+                if ev.get("key") == key_from:
+                    ev["key"] = key_to
+                    matched = True
+
+        if matched:
+            replaced += 1
+    return replaced
+
+
+def find_block_partner(events, index):
+    """Index of the loopEnd closing the loopStart at index (or the reverse), None otherwise."""
+    event_type = events[index].get("type")
+    if event_type not in ("loopStart", "loopEnd"):
+        return None
+    step = 1 if event_type == "loopStart" else -1
+    depth = 0
+    i = index
+    while 0 <= i < len(events):
+        other_type = events[i].get("type")
+        if other_type in ("loopStart", "loopEnd"):
+            depth += 1 if other_type == event_type else -1
+            if depth == 0:
+                return i
+        i += step
+    return None
+
+
+# ── Optimizer passes ─────────────────────────────────────────────────
+#
+# A pass takes a list of events and returns (new_events, time_merged). Events
+# are never mutated in place, changed events are copied. Dropped events never
+# lose their wait: their timestamp is carried onto the next kept event (or onto
+# a trailing delayEvent), so the total playback time is unchanged.
+# time_merged is the number of seconds of waits that no longer need a sleep of
+# their own. optimize_events() checks each pass against playback_signature()
+# and reverts any pass that would change what gets replayed.
+
+def _fold_dropped(events, drop):
+    """Rebuild events without the indices in drop, moving their delay forward."""
+    result = []
+    pending = 0.0
+    merged = 0.0
+    for i, ev in enumerate(events):
+        if i in drop:
+            pending += abs(ev.get("timestamp", 0))
+            continue
+        if pending:
+            ev = dict(ev)
+            ev["timestamp"] = abs(ev.get("timestamp", 0)) + pending
+            merged += pending
+            pending = 0.0
+        result.append(ev)
+    if pending:
+        result.append({"type": "delayEvent", "timestamp": pending})
+    return result, merged
+
+
+def _is_active(ev):
+    return not ev.get("disabled", False)
+
+
+def pass_disabled_moves(events):
+    """Drop disabled cursorMove events, they are never replayed."""
+    drop = {i for i, ev in enumerate(events)
+            if ev.get("type") == "cursorMove" and not _is_active(ev) and not ev.get("comment")}
+    return _fold_dropped(events, drop)
+
+
+def pass_zero_moves(events):
+    """Drop cursorMove events that do not change the cursor position."""
+    drop = set()
+    position = None
+    for i, ev in enumerate(events):
+        etype = ev.get("type")
+        if not _is_active(ev) or (etype != "cursorMove" and etype not in CLICK_TYPES):
+            continue
+        point = (ev.get("x"), ev.get("y"))
+        if etype == "cursorMove" and point == position and not ev.get("comment"):
+            drop.add(i)
+        position = point
+    return _fold_dropped(events, drop)
+
+
+def pass_move_before_click(events):
+    """Drop a cursorMove immediately followed by a click at the same coordinates,
+    the click positions the cursor itself."""
+    drop = set()
+    for i in range(len(events) - 1):
+        ev, nxt = events[i], events[i + 1]
+        if (ev.get("type") == "cursorMove" and nxt.get("type") in CLICK_TYPES
+                and _is_active(ev) and _is_active(nxt) and not ev.get("comment")
+                and (ev.get("x"), ev.get("y")) == (nxt.get("x"), nxt.get("y"))):
+            drop.add(i)
+    return _fold_dropped(events, drop)
+
+
+def pass_merge_delays(events):
+    """Merge runs of delayEvent into the first delay of the run."""
+    result = []
+    merged = 0.0
+    for ev in events:
+        prev = result[-1] if result else None
+        if (prev is not None and ev.get("type") == "delayEvent"
+                and prev.get("type") == "delayEvent" and not ev.get("comment")
+                and prev.get("keep_delay", False) == ev.get("keep_delay", False)):
+            result[-1] = dict(prev)
+            result[-1]["timestamp"] = abs(prev.get("timestamp", 0)) + abs(ev.get("timestamp", 0))
+            merged += abs(ev.get("timestamp", 0))
+        else:
+            result.append(ev)
+    return result, merged
+
+
+def pass_coalesce_scrolls(events, max_gap=0.05):
+    """Merge scroll ticks in the same direction that follow each other within max_gap seconds."""
+    def same_direction(a, b):
+        return all((a.get(k, 0) >= 0) == (b.get(k, 0) >= 0) for k in ("dx", "dy"))
+
+    result = []
+    drop = set()
+    head = None
+    for i, ev in enumerate(events):
+        if (head is not None and ev.get("type") == "scrollEvent" and _is_active(ev)
+                and not ev.get("comment") and abs(ev.get("timestamp", 0)) <= max_gap
+                and same_direction(result[head], ev)):
+            result[head] = dict(result[head])
+            result[head]["dx"] = result[head].get("dx", 0) + ev.get("dx", 0)
+            result[head]["dy"] = result[head].get("dy", 0) + ev.get("dy", 0)
+            drop.add(i)
+        else:
+            is_scroll = ev.get("type") == "scrollEvent" and _is_active(ev)
+            head = len(result) if is_scroll else None
+        result.append(ev)
+    return _fold_dropped(result, drop)
+
+
+def typed_char(ev):
+    """Return the character a keyboardEvent types, or None for special keys."""
+    key = ev.get("key")
+    if key == "Key.space":
+        return " "
+    if isinstance(key, str) and len(key) == 1 and key.isprintable():
+        return key
+    return None
+
+
+def expand_type_text(ev):
+    """Turn a typeText event back into its keyboardEvent press/release pairs."""
+    text = ev.get("text", "")
+    timings = ev.get("timings") or [[0.0, 0.0]] * len(text)
+    expanded = []
+    for i, (char, (gap, hold)) in enumerate(zip(text, timings)):
+        key = "Key.space" if char == " " else char
+        press = {"type": "keyboardEvent", "key": key, "pressed": True,
+                 "timestamp": ev.get("timestamp", 0) if i == 0 else gap}
+        release = {"type": "keyboardEvent", "key": key, "pressed": False, "timestamp": hold}
+        if ev.get("disabled"):
+            press["disabled"] = release["disabled"] = True
+        expanded += [press, release]
+    return expanded
+
+
+def pass_text_bursts(events, min_chars=2):
+    """Collapse runs of printable key press/release pairs into typeText events.
+
+    The typeText keeps the wait before its first press as timestamp and, when
+    any wait is non zero, a timings list of [wait before press, wait before
+    release] per character (the first wait before press is always 0).
+    """
+    def is_pair(press, release):
+        return (press.get("type") == "keyboardEvent" and release.get("type") == "keyboardEvent"
+                and press.get("pressed") and not release.get("pressed")
+                and press.get("key") == release.get("key") and typed_char(press) is not None
+                and _is_active(press) and _is_active(release)
+                and not press.get("comment") and not release.get("comment"))
+
+    result = []
+    i = 0
+    while i < len(events):
+        j = i
+        chars = []
+        timings = []
+        while j + 1 < len(events) and is_pair(events[j], events[j + 1]):
+            gap = abs(events[j].get("timestamp", 0)) if chars else 0.0
+            chars.append(typed_char(events[j]))
+            timings.append([gap, abs(events[j + 1].get("timestamp", 0))])
+            j += 2
+        if len(chars) >= min_chars:
+            burst = {"type": "typeText", "text": "".join(chars),
+                     "timestamp": abs(events[i].get("timestamp", 0))}
+            if any(gap or hold for gap, hold in timings):
+                burst["timings"] = timings
+            result.append(burst)
+            i = j
+        else:
+            result.append(events[i])
+            i += 1
+    return result, 0.0
+
+
+OPTIMIZER_PASSES = {
+    "disabled_moves": pass_disabled_moves,
+    "zero_moves": pass_zero_moves,
+    "move_before_click": pass_move_before_click,
+    "merge_delays": pass_merge_delays,
+    "coalesce_scrolls": pass_coalesce_scrolls,
+    "text_bursts": pass_text_bursts,
+}
+
+
+def playback_signature(events):
+    """Summarise what playing events does: final cursor position, the ordered
+    press/release sequence (clicks with their coordinates), the net scroll
+    and the total duration."""
+    position = None
+    inputs = []
+    scroll = [0, 0]
+    duration = 0.0
+    for ev in events:
+        duration += abs(ev.get("timestamp", 0))
+        if ev.get("type") == "typeText":
+            duration += sum(gap + hold for gap, hold in ev.get("timings") or [])
+            if _is_active(ev):
+                inputs += [("keyboardEvent", key_ev["key"], key_ev["pressed"])
+                           for key_ev in expand_type_text(ev)]
+            continue
+        if not _is_active(ev):
+            continue
+        etype = ev.get("type")
+        if etype == "cursorMove":
+            position = (ev.get("x"), ev.get("y"))
+        elif etype in CLICK_TYPES:
+            position = (ev.get("x"), ev.get("y"))
+            inputs.append((etype, position, ev.get("pressed")))
+        elif etype == "keyboardEvent":
+            inputs.append((etype, ev.get("key"), ev.get("pressed")))
+        elif etype == "scrollEvent":
+            scroll[0] += ev.get("dx", 0)
+            scroll[1] += ev.get("dy", 0)
+    return {"cursor": position, "inputs": inputs, "scroll": tuple(scroll), "duration": duration}
+
+
+def _same_signature(a, b):
+    return (a["cursor"] == b["cursor"] and a["inputs"] == b["inputs"]
+            and a["scroll"] == b["scroll"] and abs(a["duration"] - b["duration"]) < 1e-6)
+
+
+def _run_pass(optimizer_pass, events):
+    """Run a pass separately on each stretch of events between loop and
+    subroutine markers, so nothing is folded or merged across a block edge."""
+    result = []
+    merged = 0.0
+    segment = []
+    for ev in events + [None]:
+        if ev is not None and ev.get("type") not in BLOCK_TYPES:
+            segment.append(ev)
+            continue
+        if segment:
+            optimized, segment_merged = optimizer_pass(segment)
+            result += optimized
+            merged += segment_merged
+            segment = []
+        if ev is not None:
+            result.append(ev)
+    return result, merged
+
+
+def _combine_reports(reports):
+    combined = {key: sum(report[key] for report in reports)
+                for key in ("events_before", "events_after", "events_removed", "time_merged")}
+    combined["passes"] = []
+    for i, result in enumerate(reports[0]["passes"]):
+        combined["passes"].append({
+            "name": result["name"],
+            "events_removed": sum(report["passes"][i]["events_removed"] for report in reports),
+            "time_merged": sum(report["passes"][i]["time_merged"] for report in reports),
+            "reverted": any(report["passes"][i]["reverted"] for report in reports),
+        })
+    return combined
+
+
+def optimize_events(events, passes=None):
+    """Run the optimizer passes (names from OPTIMIZER_PASSES, all by default) over events.
+
+    The input list is left untouched. Returns (optimized_events, report) where
+    report holds the totals and, for each pass, the events removed and the
+    seconds of waits merged into neighbouring events.
+    """
+    if passes is None:
+        passes = list(OPTIMIZER_PASSES)
+    current = list(events)
+    reference = playback_signature(current)
+    report = {"events_before": len(current), "passes": []}
+    for name in passes:
+        optimized, merged = _run_pass(OPTIMIZER_PASSES[name], current)
+        reverted = not _same_signature(reference, playback_signature(optimized))
+        if reverted:
+            optimized, merged = current, 0.0
+        report["passes"].append({
+            "name": name,
+            "events_removed": len(current) - len(optimized),
+            "time_merged": merged,
+            "reverted": reverted,
+        })
+        current = optimized
+    report["events_after"] = len(current)
+    report["events_removed"] = report["events_before"] - report["events_after"]
+    report["time_merged"] = sum(p["time_merged"] for p in report["passes"])
+    return current, report
+
+
+def optimize_macro(macro_events, passes=None):
+    """Optimize the events and every subroutine of macro_events in place.
+    Returns the report of optimize_events() summed over all of them."""
+    reports = []
+    for events in [macro_events.get("events", [])] + list(macro_events.get("subroutines", {}).values()):
+        optimized, report = optimize_events(events, passes)
+        events[:] = optimized
+        reports.append(report)
+    return _combine_reports(reports)
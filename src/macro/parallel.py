@@ -0,0 +1,184 @@
+"""Play one macro in several processes at once, each on its own X display.
+
+Every row of parameters is played once by the first free worker, with its
+{{name}} placeholders replaced in the typed texts. Each worker process has
+its own input backend bound to its DISPLAY, usually an Xvfb server started
+here, so the workers do not share a mouse or a keyboard and run on separate
+cores.
+"""
+from copy import deepcopy
+from csv import DictReader
+from json import load
+from multiprocessing import get_context
+from os import environ, path
+from re import compile as compile_regex
+from shutil import which
+from subprocess import DEVNULL, Popen
+from time import perf_counter, sleep, time
+
+XVFB_SCREEN = "1280x1024x24"
+XVFB_START_TIMEOUT = 10
+
+_PLACEHOLDER = compile_regex(r"\{\{\s*(\w+)\s*\}\}")
+
+
+def load_params(file_path):
+    """Rows of parameters from a .csv file with a header line or a .json list of objects"""
+    if file_path.lower().endswith(".json"):
+        with open(file_path, encoding="utf-8") as params_file:
+            rows = load(params_file)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("the parameters file must be a list of objects")
+        return rows
+    with open(file_path, newline="", encoding="utf-8") as params_file:
+        return list(DictReader(params_file))
+
+
+def substitute(macro_events, params):
+    """Copy of macro_events with the {{name}} of its typed texts replaced by params[name].
+    Raises KeyError for a placeholder missing from params."""
+    def replace(match):
+        return str(params[match.group(1)])
+
+    def substitute_events(events):
+        for event in events:
+            if event.get("type") == "typeText" and "{{" in event.get("text", ""):
+                text = _PLACEHOLDER.sub(replace, event["text"])
+                if len(text) != len(event["text"]):
+                    event.pop("timings", None)  # Recorded per character, they no longer line up
+                event["text"] = text
+
+    macro_events = deepcopy(macro_events)
+    substitute_events(macro_events.get("events", []))
+    for events in macro_events.get("subroutines", {}).values():
+        substitute_events(events)
+    return macro_events
+
+
+def start_xvfb(display, screen=XVFB_SCREEN):
+    """Start an Xvfb server on display (":99") and wait until it accepts clients"""
+    if which("Xvfb") is None:
+        raise OSError("Xvfb is not installed")
+    server = Popen(["Xvfb", display, "-screen", "0", screen, "-nolisten", "tcp"], stdout=DEVNULL, stderr=DEVNULL)
+    socket = f"/tmp/.X11-unix/X{display.lstrip(':').split('.')[0]}"
+    give_up = perf_counter() + XVFB_START_TIMEOUT
+    while not path.exists(socket):
+        if server.poll() is not None or perf_counter() > give_up:
+            server.kill()
+            raise OSError(f"Xvfb could not start on {display}")
+        sleep(0.05)
+    return server
+
+
+# State of a worker process, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(displays, macro_events, base_dir, backend_name, speed, repeat):
+    from backends import create_backend
+
+    display = displays.get()
+    if display:
+        # Read by the backends when they connect to the X server
+        environ["DISPLAY"] = display
+    _worker.update(display=display, macro_events=macro_events, base_dir=base_dir, speed=speed, repeat=repeat,
+                   backend=create_backend(backend_name))
+
+
+def _play_row(task):
+    from macro.playback_plan import compile_plan
+    from macro.player import PlaybackObserver, Player
+    from macro.telemetry import TimingRecorder, timing_report
+
+    class ErrorObserver(PlaybackObserver):
+        error = None
+
+        def on_error(self, error):
+            self.error = error
+
+    row_index, params = task
+    backend = _worker["backend"]
+    result = {"row": row_index, "display": _worker["display"], "params": params}
+    started = perf_counter()
+    try:
+        plan = compile_plan(substitute(_worker["macro_events"], params), backend.special_keys, _worker["base_dir"])
+    except (KeyError, ValueError) as e:
+        result.update(status="error", error=f"missing parameter {e}" if isinstance(e, KeyError) else str(e),
+                      duration=0)
+        return result
+    player = Player(backend)
+    observer = ErrorObserver()
+    timing = TimingRecorder()
+    player.playing = True
+    repeat_count = player.run(plan, _worker["repeat"], _worker["speed"], observer, timing=timing)
+    player.release_pressed()
+    result["duration"] = round(perf_counter() - started, 4)
+    result["repeats"] = repeat_count or 0
+    if observer.error is not None:
+        result.update(status="error", error=str(observer.error))
+    else:
+        result["status"] = "done" if repeat_count is not None else "stopped"
+    result["timing"] = timing_report(timing)
+    if hasattr(backend, "log"):
+        result["injected"] = len(backend.log)
+        backend.clear()
+    return result
+
+
+def summarize(results, duration):
+    """Totals of the row results of a run lasting duration seconds"""
+    done = [result for result in results if result["status"] == "done"]
+    reports = [result["timing"] for result in results if result.get("timing")]
+    summary = {
+        "rows": len(results),
+        "done": len(done),
+        "failed": len(results) - len(done),
+        "duration": round(duration, 4),
+        "rows_per_second": round(len(done) / duration, 3) if duration > 0 else None,
+    }
+    samples = sum(report["samples"] for report in reports)
+    if samples:
+        summary["lateness_ms"] = {
+            "mean": round(sum(report["mean_ms"] * report["samples"] for report in reports) / samples, 3),
+            "worst_p99": max(report["p99_ms"] for report in reports),
+            "max": max(report["max_ms"] for report in reports),
+        }
+    return summary
+
+
+def run_parallel(macro_events, rows, workers, base_dir=None, backend_name="xlib", displays=None, xvfb=False,
+                 first_display=99, speed=1, repeat=1, on_result=None):
+    """Play macro_events once per row of rows, on workers processes.
+
+    Each worker uses one of displays (":1", ...), or its own Xvfb server
+    started from :first_display when xvfb is set, or no display at all (for
+    the memory backend). on_result(result) is called in this process as soon
+    as each row is played. Returns (results sorted by row, summary).
+    """
+    if displays is None:
+        displays = [f":{first_display + index}" for index in range(workers)] if xvfb else [None] * workers
+    elif len(displays) < workers:
+        raise ValueError(f"{workers} workers need {workers} displays, {len(displays)} given")
+    servers = []
+    context = get_context("spawn")  # Nothing of this process, X connections included, is inherited
+    try:
+        if xvfb:
+            servers = [start_xvfb(display) for display in displays[:workers]]
+        display_queue = context.Queue()
+        for display in displays[:workers]:
+            display_queue.put(display)
+        results = []
+        started = time()
+        with context.Pool(workers, _init_worker,
+                          (display_queue, macro_events, base_dir, backend_name, speed, repeat)) as pool:
+            for result in pool.imap_unordered(_play_row, enumerate(rows)):
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        duration = time() - started
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+    results.sort(key=lambda result: result["row"])
+    return results, summarize(results, duration)
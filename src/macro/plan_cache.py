@@ -0,0 +1,37 @@
+from os import path
+from threading import Lock
+
+from macro.playback_plan import compile_plan
+from utils.macro_file import load_include, read_macro_file
+
+
+class PlanCache:
+    """Compiled plans of macro files, so playing the same file again starts at once.
+
+    A plan is compiled again only when its file or one of the macros it
+    includes changes on disk (checked with a stat of each, see load_include).
+    """
+
+    def __init__(self, special_keys):
+        self.special_keys = special_keys
+        self._plans = {}  # absolute path: (sha256, idle_gap, macro_events, plan)
+        self._lock = Lock()
+
+    def get(self, file_path, idle_gap=None):
+        """(macro_events, plan) of file_path. macro_events is shared, do not modify it.
+        Raises OSError or ValueError (MacroCompileError included)."""
+        file_path = path.abspath(file_path)
+        _, digest = load_include(file_path)
+        with self._lock:
+            cached = self._plans.get(file_path)
+        if (cached is not None and cached[0] == digest and cached[1] == idle_gap
+                and all(load_include(dep_path)[1] == dep_digest for dep_path, dep_digest in cached[3].dependencies)):
+            return cached[2], cached[3]
+        macro_events = read_macro_file(file_path)
+        plan = compile_plan(macro_events, self.special_keys, path.dirname(file_path), idle_gap)
+        with self._lock:
+            self._plans[file_path] = (digest, idle_gap, macro_events, plan)
+        return macro_events, plan
+
+    def __len__(self):
+        return len(self._plans)
@@ -0,0 +1,246 @@
+from os import getcwd, path
+
+from utils.keys import vk_nb
+from utils.macro_file import load_include
+
+# Opcodes of a compiled playback plan. Every op is a tuple
+# (opcode, delay, source, *args) where delay is the recorded wait before the op
+# and source the index of the top-level event it comes from (used to highlight
+# the editor row and to start playback from a row).
+OP_WAIT = 0         # delayEvent, only waits
+OP_SKIP = 1         # disabled event, only waits and is not highlighted
+OP_MOVE = 2         # x, y
+OP_CLICK = 3        # x, y, button event type, pressed
+OP_SCROLL = 4       # dx, dy
+OP_KEY = 5          # resolved key, pressed
+OP_TYPE = 6         # typeText event
+OP_LOOP = 7         # times, index of the matching OP_END_LOOP
+OP_END_LOOP = 8
+OP_WAIT_FOR = 9     # ScreenCondition, timeout, stop playback on timeout
+
+# Defaults of waitFor events
+WAIT_FOR_TIMEOUT = 30
+
+CLICK_TYPES = ("leftClickEvent", "rightClickEvent", "middleClickEvent")
+
+
+class MacroCompileError(ValueError):
+    """Raised when macro events cannot be turned into a playback plan"""
+
+
+class PlaybackPlan:
+    """Flat list of ops built once per playback from the macro events.
+
+    Loops are kept as jumps so a loop of 10,000 iterations costs two ops, and
+    subroutine calls are inlined so the player never has to look them up.
+    dependencies are the (path, sha256) of the included macro files.
+    changed_includes are the (includeMacro event, path, sha256) of the included
+    files whose content changed since the event linked them.
+    """
+
+    def __init__(self, ops, start_ops, dependencies=(), changed_includes=()):
+        self.ops = ops
+        self._start_ops = start_ops
+        self.dependencies = list(dependencies)
+        self.changed_includes = list(changed_includes)
+
+    def first_op(self, event_index):
+        """Index of the first op to run when starting playback at event_index"""
+        if event_index <= 0:
+            return 0
+        if event_index < len(self._start_ops):
+            return self._start_ops[event_index]
+        return len(self.ops)
+
+    def __len__(self):
+        return len(self.ops)
+
+
+def resolve_key_name(key, special_keys):
+    """Turn a recorded key string into what the keyboard controller expects.
+    special_keys is the pynput Key enum (or anything with the same attributes).
+    Returns None for keys that cannot be replayed."""
+    if key is None:
+        return None
+    if "Key." in key:
+        try:
+            return getattr(special_keys, key.split("Key.", 1)[1])
+        except AttributeError:
+            raise MacroCompileError(f"Unknown key \"{key}\"")
+    if ">" in key:
+        return vk_nb.get(key)
+    return key
+
+
+def compile_plan(macro_events, special_keys, base_dir=None, idle_gap=None):
+    """Compile macro_events ({"events": [...], "subroutines": {...}}) to a PlaybackPlan.
+    base_dir is the folder relative includeMacro paths are resolved from.
+    idle_gap is None or (threshold, cap): every wait longer than threshold
+    seconds is shortened to cap, except on events with "keep_delay"."""
+    events = macro_events.get("events", [])
+    compiler = _PlanCompiler(special_keys, idle_gap)
+    ops = []
+    start_ops = [None] * len(events)
+    for index, event in enumerate(events):
+        start_ops[index] = len(ops)
+        compiler.compile_event(event, index, ops, macro_events.get("subroutines", {}),
+                               base_dir or getcwd(), (), ())
+    _link_loops(ops)
+    return PlaybackPlan(ops, start_ops, compiler.dependencies, compiler.changed_includes)
+
+
+def plan_duration(plan, speed=1, fixed_timestamp=0):
+    """Seconds one repeat of plan lasts, counting loops and typed text.
+    waitFor events are counted as if the screen matched at once."""
+    total = 0
+    open_loops = []  # (times, total before the loop)
+    for op in plan.ops:
+        delay = fixed_timestamp if fixed_timestamp > 0 else abs(op[1]) / speed
+        if op[0] == OP_LOOP:
+            open_loops.append((op[3], total + delay))
+            total = 0
+        elif op[0] == OP_END_LOOP and open_loops:
+            times, before = open_loops.pop()
+            total = before + (total + delay) * max(times, 0)
+        elif op[0] == OP_TYPE:
+            total += delay
+            characters = len(op[3].get("text", ""))
+            if fixed_timestamp > 0:
+                total += fixed_timestamp * max(2 * characters - 1, 0)
+            else:
+                total += sum(gap + hold for gap, hold in op[3].get("timings") or ()) / speed
+        else:
+            total += delay
+    return total
+
+
+# Ops of included macros, keyed by (absolute path, sha256), with the
+# (path, sha256) of the macros they include themselves and the includes among
+# them that changed since they were linked. The ops are stored with
+# no source and unlinked loops, both are filled in when inlined. Shortened
+# waits are part of the ops, so they are also keyed by the idle gap.
+_compiled_includes = {}
+
+
+class _PlanCompiler:
+    def __init__(self, special_keys, idle_gap=None):
+        self.special_keys = special_keys
+        self.idle_gap = idle_gap
+        self.dependencies = []
+        self.changed_includes = []
+
+    def compile_event(self, event, source, ops, subroutines, base_dir, call_stack, include_stack):
+        event_type = event.get("type")
+        delay = event.get("timestamp", 0)
+        if self.idle_gap is not None and abs(delay) > self.idle_gap[0] and not event.get("keep_delay", False):
+            delay = self.idle_gap[1]
+        if event.get("disabled", False):
+            if event_type == "loopStart":
+                ops.append((OP_LOOP, delay, source, 1, None))
+            elif event_type == "loopEnd":
+                ops.append((OP_END_LOOP, delay, source))
+            else:
+                ops.append((OP_SKIP, delay, source))
+        elif event_type == "cursorMove":
+            ops.append((OP_MOVE, delay, source, event["x"], event["y"]))
+        elif event_type in CLICK_TYPES:
+            ops.append((OP_CLICK, delay, source, event["x"], event["y"], event_type, event["pressed"]))
+        elif event_type == "scrollEvent":
+            ops.append((OP_SCROLL, delay, source, event["dx"], event["dy"]))
+        elif event_type == "keyboardEvent":
+            key = resolve_key_name(event.get("key"), self.special_keys)
+            if key is None:
+                ops.append((OP_SKIP, delay, source))
+            else:
+                ops.append((OP_KEY, delay, source, key, event["pressed"]))
+        elif event_type == "typeText":
+            ops.append((OP_TYPE, delay, source, event))
+        elif event_type == "waitFor":
+            # Pillow is only imported by macros waiting for the screen
+            from macro.screen_match import ScreenCondition
+            try:
+                condition = ScreenCondition.from_event(event, base_dir)
+            except ValueError as e:
+                raise MacroCompileError(f"Event {source}: {e}")
+            ops.append((OP_WAIT_FOR, delay, source, condition, float(event.get("timeout", WAIT_FOR_TIMEOUT)),
+                        event.get("on_timeout", "continue") == "stop"))
+        elif event_type == "loopStart":
+            ops.append((OP_LOOP, delay, source, int(event.get("times", 1)), None))
+        elif event_type == "loopEnd":
+            ops.append((OP_END_LOOP, delay, source))
+        elif event_type == "callSubroutine":
+            name = event.get("name")
+            if name not in subroutines:
+                raise MacroCompileError(f"Unknown subroutine \"{name}\"")
+            if name in call_stack:
+                raise MacroCompileError(f"Subroutine \"{name}\" calls itself")
+            _check_loops_balanced(subroutines[name], name)
+            ops.append((OP_WAIT, delay, source))
+            for sub_event in subroutines[name]:
+                self.compile_event(sub_event, source, ops, subroutines, base_dir,
+                                   call_stack + (name,), include_stack)
+        elif event_type == "includeMacro":
+            ops.append((OP_WAIT, delay, source))
+            for op in self.compile_include(event, base_dir, include_stack):
+                ops.append(op[:2] + (source,) + op[3:])
+        else:
+            ops.append((OP_WAIT, delay, source))
+
+    def compile_include(self, event, base_dir, include_stack):
+        """Ops of an included macro file, compiled once per file content"""
+        include_path = path.normpath(path.join(base_dir, event.get("path", "")))
+        if include_path in include_stack:
+            raise MacroCompileError(f"\"{path.basename(include_path)}\" includes itself")
+        try:
+            included, digest = load_include(include_path)
+        except (OSError, ValueError) as e:
+            raise MacroCompileError(f"Cannot include \"{event.get('path')}\": {e}")
+        if event.get("sha256") and event["sha256"] != digest:
+            self.changed_includes.append((event, include_path, digest))
+        key = (include_path, digest)
+        cached = _compiled_includes.get((key, self.idle_gap))
+        if cached is not None and all(load_include(dep_path)[1] == dep_digest
+                                      for dep_path, dep_digest in cached[1]):
+            self.dependencies += cached[1] + [key]
+            self.changed_includes += cached[2]
+            return cached[0]
+        first_dependency = len(self.dependencies)
+        first_changed = len(self.changed_includes)
+        ops = []
+        include_dir = path.dirname(include_path)
+        _check_loops_balanced(included.get("events", []), path.basename(include_path))
+        for sub_event in included.get("events", []):
+            self.compile_event(sub_event, None, ops, included.get("subroutines", {}), include_dir,
+                               (), include_stack + (include_path,))
+        _compiled_includes[(key, self.idle_gap)] = (ops, self.dependencies[first_dependency:],
+                                                     self.changed_includes[first_changed:])
+        self.dependencies.append(key)
+        return ops
+
+
+def _check_loops_balanced(events, name):
+    depth = 0
+    for event in events:
+        if event.get("type") == "loopStart":
+            depth += 1
+        elif event.get("type") == "loopEnd":
+            depth -= 1
+        if depth < 0:
+            break
+    if depth != 0:
+        raise MacroCompileError(f"Loops of \"{name}\" are not closed")
+
+
+def _link_loops(ops):
+    """Store in each OP_LOOP the index of its OP_END_LOOP"""
+    open_loops = []
+    for index, op in enumerate(ops):
+        if op[0] == OP_LOOP:
+            open_loops.append(index)
+        elif op[0] == OP_END_LOOP:
+            if not open_loops:
+                raise MacroCompileError("\"End loop\" without a matching loop")
+            start = open_loops.pop()
+            ops[start] = ops[start][:4] + (index,)
+    if open_loops:
+        raise MacroCompileError("Loop without a matching \"End loop\"")
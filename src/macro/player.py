@@ -0,0 +1,270 @@
+from threading import Event
+from time import perf_counter, sleep, time
+
+from backends import create_backend
+from macro.playback_plan import (
+    OP_CLICK,
+    OP_END_LOOP,
+    OP_KEY,
+    OP_LOOP,
+    OP_MOVE,
+    OP_SCROLL,
+    OP_SKIP,
+    OP_TYPE,
+    OP_WAIT,
+    OP_WAIT_FOR,
+)
+
+# Inputs due less than this many seconds apart are sent without waiting and
+# with a single backend flush.
+SCHEDULER_TICK = 0.002
+# Longer waits are done on an event so that stop() ends them at once, the last
+# SLEEP_MARGIN seconds are slept for a precise wake up
+SLEEP_MARGIN = 0.02
+# Seconds between two checks of the screen by a waitFor event
+WAIT_FOR_POLL = 0.05
+
+CLICK_BUTTONS = {
+    "leftClickEvent": "left",
+    "rightClickEvent": "right",
+    "middleClickEvent": "middle",
+}
+
+
+class PlaybackObserver:
+    """Receives the progress of a Player. Every method is called from the
+    playback thread and does nothing by default, override the ones you need."""
+
+    def on_repeat(self, repeat, repeat_times):
+        """A repeat starts, repeat counts from 1"""
+
+    def on_event(self, source, repeat, repeat_times, elapsed):
+        """The op coming from the top-level event source was just played"""
+
+    def on_error(self, error):
+        """Replaying an input failed, the playback is stopped after this call"""
+
+
+class Player:
+    """Playback engine: replays a compiled PlaybackPlan through an InputBackend.
+
+    It knows nothing about the UI, progress is reported to a PlaybackObserver,
+    so it can run inside the main window or from the command line.
+    The plan must be compiled with backend.special_keys.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or create_backend()
+        self._stopped = Event()
+        self.playing = False
+        self.pressed_keys = []
+
+    @property
+    def playing(self):
+        return self._playing
+
+    @playing.setter
+    def playing(self, playing):
+        self._playing = playing
+        if playing:
+            self._stopped.clear()
+        else:
+            self._stopped.set()
+
+    def stop(self):
+        self.playing = False
+
+    def wait(self, seconds):
+        """Wait seconds, less if the playback is stopped meanwhile. Returns True when still playing."""
+        if seconds > SLEEP_MARGIN:
+            self._stopped.wait(seconds - SLEEP_MARGIN)
+            seconds = SLEEP_MARGIN
+        if self.playing and seconds > 0:
+            sleep(seconds)
+        return self.playing
+
+    def run(self, plan, repeat_times=1, speed=1, observer=None, start_event_index=0,
+            fixed_timestamp=0, repeat_delay=0, timing=None, end_at=None):
+        """Play plan repeat_times times (float('inf') for infinite).
+        Returns the number of completed repeats, or None when the playback was stopped.
+        playing must be set first, stop() from another thread ends the run.
+        timing is an optional TimingRecorder receiving the scheduled and actual
+        time of every played op.
+        end_at is a perf_counter() time where the run ends even in the middle of
+        the macro, held keys and buttons are then released."""
+        observer = observer or PlaybackObserver()
+        backend = self.backend
+        ops = plan.ops
+        repeat_count = 0
+        now = time()
+        # Ops are timed against a deadline rather than by sleeping each delay,
+        # so the time spent sending inputs does not add up over the macro.
+        deadline = perf_counter()
+        if end_at is None:
+            end_at = float("inf")
+
+        while self.playing and repeat_count < repeat_times:
+            observer.on_repeat(repeat_count + 1, repeat_times)
+            # First repeat can start mid-macro (play from selected row)
+            pc = plan.first_op(start_event_index) if repeat_count == 0 else 0
+            loops = []  # [first op of the loop body, iterations left]
+            while pc < len(ops):
+                op = ops[pc]
+                op_code = op[0]
+                if not self.playing:
+                    self.release_pressed()
+                    return None
+
+                if fixed_timestamp > 0:
+                    deadline += fixed_timestamp
+                else:
+                    deadline += abs(op[1]) / speed
+                if deadline > end_at:
+                    return self.__end_at(end_at, repeat_count)
+                wait = deadline - perf_counter()
+                if wait > SCHEDULER_TICK:
+                    backend.flush()
+                    if not self.wait(wait):
+                        continue
+                pc += 1
+
+                # Skip disabled events
+                if op_code == OP_SKIP:
+                    continue
+
+                if timing is not None:
+                    timing.record(deadline, perf_counter())
+
+                observer.on_event(op[2], repeat_count + 1, repeat_times, time() - now)
+
+                if op_code == OP_WAIT:  # Pure delay — already slept above
+                    continue
+
+                if op_code == OP_MOVE:  # Cursor Move
+                    backend.move(op[3], op[4])
+
+                elif op_code == OP_CLICK:  # Mouse Click
+                    backend.move(op[3], op[4])
+                    backend.button(CLICK_BUTTONS[op[5]], op[6])
+
+                elif op_code == OP_SCROLL:
+                    backend.scroll(op[3], op[4])
+
+                elif op_code == OP_TYPE:
+                    backend.flush()
+                    if not self.type_text(op[3], speed, fixed_timestamp, end_at) and self.playing:
+                        return self.__end_at(end_at, repeat_count)
+                    deadline = perf_counter()
+
+                elif op_code == OP_KEY:  # Keyboard Press,Release
+                    try:
+                        backend.key(op[3], op[4])
+                        if op[4] and op[3] not in self.pressed_keys:
+                            self.pressed_keys.append(op[3])
+                    except Exception as e:
+                        self.playing = False
+                        observer.on_error(e)
+
+                elif op_code == OP_WAIT_FOR:
+                    backend.flush()
+                    try:
+                        if not self.__wait_for(op[3], op[4], end_at) and self.playing and op[5]:
+                            raise TimeoutError(f"the screen did not match within {op[4]}s")
+                    except Exception as e:
+                        self.playing = False
+                        observer.on_error(e)
+                    # The wait has no fixed length, the next ops are timed from its end
+                    deadline = perf_counter()
+
+                elif op_code == OP_LOOP:
+                    if op[3] <= 0:
+                        pc = op[4] + 1
+                    else:
+                        loops.append([pc, op[3] - 1])
+
+                elif op_code == OP_END_LOOP:
+                    # Playback started inside the loop when there is nothing to close
+                    if loops:
+                        if loops[-1][1] > 0:
+                            loops[-1][1] -= 1
+                            pc = loops[-1][0]
+                        else:
+                            loops.pop()
+
+            repeat_count += 1
+            backend.flush()
+
+            if repeat_delay > 0 and repeat_count < repeat_times:
+                if perf_counter() + repeat_delay > end_at:
+                    return self.__end_at(end_at, repeat_count)
+                self.wait(repeat_delay)
+                deadline = perf_counter()
+
+        if not self.playing:
+            self.release_pressed()
+            return None
+        return repeat_count
+
+    def __wait_for(self, condition, timeout, end_at):
+        """Check condition every WAIT_FOR_POLL seconds. Returns True once it matches,
+        False after timeout, at end_at or when stopped."""
+        give_up = min(perf_counter() + timeout, end_at)
+        while self.playing:
+            if condition.matches():
+                return True
+            remaining = give_up - perf_counter()
+            if remaining <= 0:
+                return False
+            self.wait(min(WAIT_FOR_POLL, remaining))
+        return False
+
+    def __end_at(self, end_at, repeat_count):
+        self.backend.flush()
+        playing = self.wait(end_at - perf_counter())
+        self.release_pressed()
+        return repeat_count if playing else None
+
+    def __wait_before(self, seconds, end_at):
+        """wait(seconds) cut short at end_at. Returns True when it is over and still playing."""
+        if perf_counter() + seconds > end_at:
+            self.wait(end_at - perf_counter())
+            return False
+        return self.wait(seconds)
+
+    def type_text(self, event, speed, fixed_timestamp=0, end_at=float("inf")):
+        """Type a typeText event, pressing and releasing each character with its recorded waits.
+        Returns False when the playback is stopped or end_at (a perf_counter() time) comes
+        before the end of the text, the character being held is then released."""
+        key = self.backend.key
+        space = self.backend.special_keys.space
+        keys = [space if char == " " else char for char in event["text"]]
+        if fixed_timestamp > 0:
+            scale = 1
+            timings = [[fixed_timestamp, fixed_timestamp]] * len(keys)
+            timings[0] = [0, fixed_timestamp]
+        else:
+            scale = 1 / speed
+            timings = event.get("timings") or [[0, 0]] * len(keys)
+        for char, (gap, hold) in zip(keys, timings):
+            if not self.playing:
+                return False
+            if gap and not self.__wait_before(gap * scale, end_at):
+                return False
+            key(char, True)
+            if hold:
+                self.backend.flush()
+                if not self.__wait_before(hold * scale, end_at):
+                    key(char, False)
+                    self.backend.flush()
+                    return False
+            key(char, False)
+            self.backend.flush()
+        return True
+
+    def release_pressed(self):
+        for key in self.pressed_keys:
+            self.backend.key(key, False)
+        self.pressed_keys = []
+        self.backend.button("left", False)
+        self.backend.button("middle", False)
+        self.backend.flush()
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps, load
+from os import path
+
+from macro.playback_plan import compile_plan
+from utils.macro_file import read_macro_file
+
+
+def new_playlist_item(file_path, repeat=1, speed=1):
+    return {"path": file_path, "repeat": repeat, "speed": speed}
+
+
+def load_playlist(file_path):
+    """Read a .pmrl playlist. Item paths are stored relative to the playlist."""
+    with open(file_path, "r") as playlist_file:
+        items = load(playlist_file).get("items", [])
+    base_dir = path.dirname(path.abspath(file_path))
+    return [new_playlist_item(path.normpath(path.join(base_dir, item["path"])),
+                              item.get("repeat", 1), item.get("speed", 1))
+            for item in items]
+
+
+def save_playlist(file_path, items):
+    base_dir = path.dirname(path.abspath(file_path))
+    stored = []
+    for item in items:
+        try:
+            item_path = path.relpath(item["path"], base_dir)
+        except ValueError:  # Not on the same drive
+            item_path = item["path"]
+        stored.append(new_playlist_item(item_path, item["repeat"], item["speed"]))
+    with open(file_path, "w") as playlist_file:
+        playlist_file.write(dumps({"items": stored}, indent=4))
+
+
+def prepare_item(item, special_keys, idle_gap=None, plan_cache=None):
+    """Read and compile the macro of a playlist item. Returns (macro_events, plan).
+    With a PlanCache, an unchanged macro is not compiled again."""
+    if plan_cache is not None:
+        return plan_cache.get(item["path"], idle_gap)
+    macro_events = read_macro_file(item["path"])
+    plan = compile_plan(macro_events, special_keys, path.dirname(path.abspath(item["path"])), idle_gap)
+    return macro_events, plan
+
+
+class PlaylistPreloader:
+    """Prepare playlist items one step ahead on a background thread.
+
+    get(i) returns the prepared item i (waiting for it if needed) and starts
+    preparing item i + 1, so the next macro is parsed and compiled while the
+    current one plays.
+    """
+
+    def __init__(self, items, special_keys, idle_gap=None, plan_cache=None):
+        self.items = items
+        self.special_keys = special_keys
+        self.idle_gap = idle_gap
+        self.plan_cache = plan_cache
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playlist-preload")
+        self._pending = {}
+        self._submit(0)
+
+    def _submit(self, index):
+        if index < len(self.items) and index not in self._pending:
+            self._pending[index] = self._executor.submit(prepare_item, self.items[index], self.special_keys,
+                                                         self.idle_gap, self.plan_cache)
+
+    def get(self, index):
+        self._submit(index)
+        future = self._pending.pop(index)
+        self._submit(index + 1)
+        return future.result()
+
+    def close(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._executor.shutdown(wait=False)
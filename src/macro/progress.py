@@ -0,0 +1,61 @@
+from queue import Full, Queue
+from threading import Lock
+
+from macro.player import PlaybackObserver
+
+# Messages kept for a subscriber reading slower than they are published, the
+# newest ones are dropped beyond that
+SUBSCRIBER_QUEUE = 1000
+
+
+class ProgressHub:
+    """Sends the progress messages (dicts) to every subscribed queue"""
+
+    def __init__(self):
+        self.subscribers = []
+        self._lock = Lock()
+
+    def subscribe(self):
+        queue = Queue(SUBSCRIBER_QUEUE)
+        with self._lock:
+            self.subscribers = self.subscribers + [queue]
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self.subscribers = [subscriber for subscriber in self.subscribers if subscriber is not queue]
+
+    def publish(self, message):
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(message)
+            except Full:
+                pass
+
+
+class ProgressObserver(PlaybackObserver):
+    """Publishes the progress of a playback to a ProgressHub"""
+
+    def __init__(self, hub, next_observer=None):
+        self.hub = hub
+        self.next_observer = next_observer or PlaybackObserver()
+        self.error = None
+
+    def on_repeat(self, repeat, repeat_times):
+        if self.hub.subscribers:
+            self.hub.publish({"event": "repeat", "repeat": repeat, "of": json_count(repeat_times)})
+        self.next_observer.on_repeat(repeat, repeat_times)
+
+    def on_event(self, source, repeat, repeat_times, elapsed):
+        if self.hub.subscribers:
+            self.hub.publish({"event": "progress", "index": source, "repeat": repeat, "elapsed": round(elapsed, 4)})
+        self.next_observer.on_event(source, repeat, repeat_times, elapsed)
+
+    def on_error(self, error):
+        self.error = error
+        self.hub.publish({"event": "error", "error": str(error)})
+        self.next_observer.on_error(error)
+
+
+def json_count(count):
+    return None if count == float("inf") else count
@@ -0,0 +1,253 @@
+from datetime import datetime, timedelta
+from heapq import heapify, heappop, heappush
+from itertools import count
+from json import dumps, load
+from os import replace
+from threading import Condition, Thread
+from time import time
+
+# What to do at startup with a run missed while the application was closed
+MISSED_POLICIES = ("skip", "run_once")
+# The timer thread wakes up at least this often (seconds), so that a changed
+# system clock or a computer waking up from sleep only delays a job this much
+MAX_WAIT = 60
+
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+class ScheduleError(ValueError):
+    pass
+
+
+class IntervalSchedule:
+    """every 30m: runs every interval, counted from the previous run"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def next_after(self, moment):
+        return moment + timedelta(seconds=self.seconds)
+
+
+class DailySchedule:
+    """at 14:30 or at 14:30:15: runs every day at that time"""
+
+    def __init__(self, seconds_since_midnight):
+        self.seconds = seconds_since_midnight
+
+    def next_after(self, moment):
+        run = moment.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(seconds=self.seconds)
+        return run if run > moment else run + timedelta(days=1)
+
+
+class CronSchedule:
+    """minute hour day-of-month month day-of-week, as in crontab (0 or 7 is Sunday)"""
+
+    def __init__(self, fields):
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_cron_field(field, low, high) for field, (low, high) in zip(fields, _CRON_RANGES)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        # As in cron, a day matches either field when both are restricted
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, day):
+        in_month = day.day in self.days
+        in_week = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment):
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        # Five years cover every day of month and weekday combination, leap days included
+        for _ in range(5 * 366):
+            if day.month in self.months and self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        run = day.replace(hour=hour, minute=minute)
+                        if run >= start:
+                            return run
+            day += timedelta(days=1)
+        raise ScheduleError("this cron expression never runs")
+
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            first, last = low, high
+        elif "-" in part:
+            first, last = (int(value) for value in part.split("-", 1))
+        else:
+            first = last = int(part)
+            if step != 1:
+                last = high
+        if not low <= first <= last <= high or step < 1:
+            raise ScheduleError(f"{field} is out of range {low}-{high}")
+        values.update(range(first, last + 1, step))
+    return sorted(values)
+
+
+def parse_schedule(expression):
+    """Schedule of "every <number><s|m|h|d>", "at HH:MM[:SS]" or a 5 fields cron expression"""
+    words = expression.strip().lower().split()
+    try:
+        if len(words) == 2 and words[0] == "every":
+            unit = _INTERVAL_UNITS.get(words[1][-1])
+            seconds = float(words[1][:-1]) * unit if unit else float(words[1])
+            if seconds <= 0:
+                raise ScheduleError("the interval must be more than 0")
+            return IntervalSchedule(seconds)
+        if len(words) == 2 and words[0] == "at":
+            parts = [int(part) for part in words[1].split(":")]
+            if not 2 <= len(parts) <= 3:
+                raise ValueError
+            hour, minute, second = (parts + [0])[:3]
+            if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+                raise ScheduleError(f"{words[1]} is not a time of the day")
+            return DailySchedule(hour * 3600 + minute * 60 + second)
+        if len(words) == 5:
+            return CronSchedule(words)
+    except ScheduleError:
+        raise
+    except ValueError:
+        pass
+    raise ScheduleError(f"invalid schedule: {expression}")
+
+
+def new_job(file_path, schedule, repeat=1, speed=1, missed="skip", enabled=True):
+    return {"path": file_path, "schedule": schedule, "repeat": repeat, "speed": speed,
+            "missed": missed, "enabled": enabled, "last_run": None}
+
+
+def load_jobs(file_path):
+    try:
+        with open(file_path, "r") as jobs_file:
+            return load(jobs_file).get("jobs", [])
+    except (OSError, ValueError):
+        return []
+
+
+def save_jobs(file_path, jobs):
+    with open(file_path + ".tmp", "w") as jobs_file:
+        jobs_file.write(dumps({"jobs": jobs}, indent=4))
+    replace(file_path + ".tmp", file_path)
+
+
+class Scheduler:
+    """Runs the scheduled jobs and the one-off calls from a single timer thread.
+
+    Due times are kept in a heap: the thread sleeps on a condition until the
+    first one (or a change of the jobs) and uses no CPU meanwhile. It is only
+    started once there is something to wait for. run_job(job) is called from
+    the timer thread when a job is due, then on_run(job) once job["last_run"]
+    is updated (to save the jobs).
+    """
+
+    def __init__(self, run_job, on_run=None):
+        self.run_job = run_job
+        self.on_run = on_run
+        self._heap = []
+        self._order = count()
+        self._cancelled = set()
+        self._condition = Condition()
+        self._thread = None
+        self._running = False
+        self._jobs = []
+
+    def set_jobs(self, jobs, now=None):
+        """Replace the scheduled jobs. Invalid or disabled jobs are left out."""
+        now = datetime.now() if now is None else now
+        with self._condition:
+            self._heap = [entry for entry in self._heap if entry[2] == "call"]
+            self._jobs = jobs
+            for job in jobs:
+                due = self.first_run(job, now)
+                if due is not None:
+                    self._heap.append((due.timestamp(), next(self._order), "job", job))
+            heapify(self._heap)
+            self.__wake()
+
+    def call_at(self, timestamp, callback):
+        """Call callback() from the timer thread at timestamp. Returns a handle for cancel()."""
+        with self._condition:
+            handle = next(self._order)
+            heappush(self._heap, (timestamp, handle, "call", callback))
+            self.__wake()
+        return handle
+
+    def cancel(self, handle):
+        with self._condition:
+            self._cancelled.add(handle)
+
+    def next_runs(self):
+        """{id(job): datetime of its next run}"""
+        with self._condition:
+            return {id(entry[3]): datetime.fromtimestamp(entry[0]) for entry in self._heap if entry[2] == "job"}
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+    @staticmethod
+    def first_run(job, now):
+        """Next run of job when the jobs are (re)loaded at now, applying its missed run policy"""
+        if not job.get("enabled", True):
+            return None
+        try:
+            schedule = parse_schedule(job["schedule"])
+        except ScheduleError as e:
+            print(f"scheduled job {job.get('path')} ignored: {e}")
+            return None
+        last_run = job.get("last_run")
+        due = schedule.next_after(datetime.fromtimestamp(last_run)) if last_run else schedule.next_after(now)
+        if due <= now:
+            due = now if job.get("missed", "skip") == "run_once" else schedule.next_after(now)
+        return due
+
+    def __wake(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = Thread(target=self.__run, name="scheduler", daemon=True)
+            self._thread.start()
+        self._condition.notify()
+
+    def __run(self):
+        while True:
+            with self._condition:
+                while self._running:
+                    if self._heap and self._heap[0][0] <= time():
+                        break
+                    timeout = min(MAX_WAIT, self._heap[0][0] - time()) if self._heap else None
+                    self._condition.wait(timeout)
+                if not self._running:
+                    self._thread = None
+                    return
+                _, handle, kind, target = heappop(self._heap)
+                if handle in self._cancelled:
+                    self._cancelled.discard(handle)
+                    continue
+                if kind == "job":
+                    ran_at = datetime.now()
+                    target["last_run"] = ran_at.timestamp()
+                    due = parse_schedule(target["schedule"]).next_after(ran_at)
+                    heappush(self._heap, (due.timestamp(), next(self._order), "job", target))
+            # Called outside the lock so that the callbacks can change the schedule
+            try:
+                if kind == "job":
+                    self.run_job(target)
+                    if self.on_run is not None:
+                        self.on_run(target)
+                else:
+                    target()
+            except Exception as e:
+                print(f"scheduled run failed: {e}")
@@ -0,0 +1,102 @@
+from os import path
+
+from PIL import Image, ImageChops, ImageColor, ImageGrab
+
+# Template positions fully compared per check, in the order found. Each one
+# is a candidate because its anchor pixel matches, a region full of that colour
+# gives up there rather than slowing the playback down.
+MAX_CANDIDATES = 2000
+
+
+def grab_region(region):
+    """RGB image of the screen region (x, y, width, height)"""
+    x, y, width, height = region
+    return ImageGrab.grab(bbox=(x, y, x + width, y + height)).convert("RGB")
+
+
+def _close_mask(image, color, tolerance):
+    """L image, 255 where every channel of image is within tolerance of color"""
+    difference = ImageChops.difference(image, Image.new("RGB", image.size, color))
+    red, green, blue = difference.split()
+    worst = ImageChops.lighter(ImageChops.lighter(red, green), blue)
+    return worst.point(lambda value: 255 if value <= tolerance else 0)
+
+
+def find_color(image, color, tolerance=0):
+    """True when a pixel of image is color, give or take tolerance per channel"""
+    return _close_mask(image, color, tolerance).getbbox() is not None
+
+
+def _anchor(template):
+    """(x, y) of the first pixel of the least common colour of template. Its
+    corners are often the background the template is found on, this is not."""
+    _, color = min(template.getcolors(template.width * template.height))
+    pixels, wanted = template.tobytes(), bytes(color)
+    index = next(index for index in range(0, len(pixels), 3) if pixels[index:index + 3] == wanted) // 3
+    return index % template.width, index // template.width
+
+
+def find_template(image, template, tolerance=0):
+    """Position (x, y) of template in image, give or take tolerance per channel, None if absent.
+
+    Every comparison is done by Pillow on whole images: positions whose anchor
+    pixel matches are found from one mask, then each is compared at once.
+    """
+    template_width, template_height = template.size
+    width = image.width - template_width + 1
+    height = image.height - template_height + 1
+    if width <= 0 or height <= 0:
+        return None
+    anchor_x, anchor_y = _anchor(template)
+    anchors = _close_mask(image.crop((anchor_x, anchor_y, anchor_x + width, anchor_y + height)),
+                          template.getpixel((anchor_x, anchor_y)), tolerance).tobytes()
+    index = anchors.find(b"\xff")
+    for _ in range(MAX_CANDIDATES):
+        if index == -1:
+            return None
+        x, y = index % width, index // width
+        window = image.crop((x, y, x + template_width, y + template_height))
+        if all(high <= tolerance for _, high in ImageChops.difference(window, template).getextrema()):
+            return x, y
+        index = anchors.find(b"\xff", index + 1)
+    return None
+
+
+class ScreenCondition:
+    """What a waitFor event waits for: a colour or an image in a region of the screen.
+
+    Only the region is captured, grab(region) can be replaced to check
+    synthetic screens.
+    """
+
+    def __init__(self, region, color=None, template=None, tolerance=0, grab=grab_region):
+        self.region = tuple(int(value) for value in region)
+        self.color = color
+        self.template = template
+        self.tolerance = tolerance
+        self.grab = grab
+
+    @classmethod
+    def from_event(cls, event, base_dir):
+        """Condition of a waitFor event, its image path is relative to base_dir.
+        Raises ValueError when the event is incomplete."""
+        region = event.get("region")
+        if not region or len(region) != 4 or region[2] <= 0 or region[3] <= 0:
+            raise ValueError("waitFor needs a region [x, y, width, height]")
+        tolerance = int(event.get("tolerance", 0))
+        if event.get("image"):
+            try:
+                with Image.open(path.join(base_dir, event["image"])) as image:
+                    template = image.convert("RGB")
+            except OSError as e:
+                raise ValueError(f"cannot read {event['image']}: {e}")
+            return cls(region, template=template, tolerance=tolerance)
+        if event.get("color"):
+            return cls(region, color=ImageColor.getrgb(event["color"])[:3], tolerance=tolerance)
+        raise ValueError("waitFor needs a color or an image")
+
+    def matches(self):
+        image = self.grab(self.region)
+        if self.template is not None:
+            return find_template(image, self.template, self.tolerance) is not None
+        return find_color(image, self.color, self.tolerance)
@@ -0,0 +1,422 @@
+"""Export a macro as a standalone Python script replaying it without PyMacroRecord.
+
+The macro is compiled to a playback plan first (subroutines and includes
+inlined, loops as jumps), then its ops are written as packed arrays the
+script decodes at import. The script plays them with the loop of Player.run,
+so the timing and repeat settings behave as in the application.
+"""
+from array import array
+from base64 import b64encode
+from datetime import datetime
+from string import Template
+from sys import byteorder
+
+from backends.memory_backend import MemoryBackend
+from macro.playback_plan import (
+    OP_CLICK,
+    OP_END_LOOP,
+    OP_KEY,
+    OP_LOOP,
+    OP_MOVE,
+    OP_SCROLL,
+    OP_SKIP,
+    OP_TYPE,
+    OP_WAIT,
+    OP_WAIT_FOR,
+    compile_plan,
+)
+from macro.player import CLICK_BUTTONS, SCHEDULER_TICK
+
+BUTTONS = ("left", "right", "middle")
+# Characters of base64 per line of the packed arrays
+LINE_LENGTH = 96
+
+
+class ExportError(ValueError):
+    pass
+
+
+def playback_options(settings):
+    """Options of export_script from a settings dict ({"Playback": ..., "Others": ...})"""
+    playback = settings.get("Playback", {})
+    repeat = playback.get("Repeat", {})
+    return {
+        "repeat": 0 if repeat.get("Infinite", False) else repeat.get("Times", 1),
+        "speed": playback.get("Speed", 1),
+        "delay": repeat.get("Delay", 0),
+        "for_seconds": repeat.get("For", 0),
+        "interval": repeat.get("Interval", 0),
+        "fixed_timestamp": settings.get("Others", {}).get("Fixed_timestamp", 0),
+    }
+
+
+def _integer(value):
+    # Coordinates are floats on macOS and in edited files, the script packs integers
+    try:
+        return int(round(value))
+    except (TypeError, ValueError):
+        raise ExportError(f"{value!r} is not a number")
+
+
+def _pack(values, typecode):
+    data = array(typecode, values)
+    if data.itemsize > 1 and byteorder == "big":
+        data.byteswap()  # Stored little-endian
+    text = b64encode(data.tobytes()).decode()
+    lines = [text[start:start + LINE_LENGTH] for start in range(0, len(text), LINE_LENGTH)] or [""]
+    return "(\n" + "\n".join(f'    "{line}"' for line in lines) + "\n)"
+
+
+def export_script(macro_events, base_dir=None, options=None, idle_gap=None, name="macro"):
+    """Source of a Python script replaying macro_events. options are the default
+    playback options of the script (see playback_options), idle_gap as in compile_plan.
+    Raises ExportError for what the script cannot play, MacroCompileError for invalid macros."""
+    options = {**playback_options({}), **(options or {})}
+    # Compiled with the string names of the memory backend: "Key.enter", "a"
+    plan = compile_plan(macro_events, MemoryBackend.special_keys, base_dir, idle_gap)
+    codes, delays, args = [], [], []
+    strings, string_index = [], {}
+    texts = []
+
+    def intern(value):
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+
+    for op in plan.ops:
+        code = op[0]
+        op_args = (0, 0, 0)
+        if code == OP_MOVE or code == OP_SCROLL:
+            op_args = (_integer(op[3]), _integer(op[4]), 0)
+        elif code == OP_CLICK:
+            op_args = (_integer(op[3]), _integer(op[4]), BUTTONS.index(CLICK_BUTTONS[op[5]]) * 2 + bool(op[6]))
+        elif code == OP_KEY:
+            op_args = (intern(op[3]), bool(op[4]), 0)
+        elif code == OP_TYPE:
+            texts.append((op[3]["text"], tuple(tuple(pair) for pair in op[3].get("timings") or ())))
+            op_args = (len(texts) - 1, 0, 0)
+        elif code == OP_LOOP:
+            op_args = (op[3], op[4], 0)
+        elif code == OP_WAIT_FOR:
+            raise ExportError(f"event {op[2]} waits for the screen, exported scripts cannot")
+        elif code == OP_SKIP:
+            code = OP_WAIT  # Nothing to highlight in a script
+        codes.append(code)
+        delays.append(abs(op[1]))
+        args.extend(op_args)
+
+    return _SCRIPT.substitute(
+        name=name,
+        date=datetime.now().strftime("%Y-%m-%d %H:%M"),
+        events=len(macro_events.get("events", [])),
+        ops=len(codes),
+        options=repr(options),
+        codes=_pack(codes, "B"),
+        delays=_pack(delays, "d"),
+        args=_pack(args, "i"),
+        strings=repr(tuple(strings)),
+        texts=repr(tuple(texts)),
+        tick=SCHEDULER_TICK,
+        OP_WAIT=OP_WAIT, OP_MOVE=OP_MOVE, OP_CLICK=OP_CLICK, OP_SCROLL=OP_SCROLL, OP_KEY=OP_KEY,
+        OP_TYPE=OP_TYPE, OP_LOOP=OP_LOOP, OP_END_LOOP=OP_END_LOOP,
+    )
+
+
+def _rounded(values):
+    return tuple(_integer(value) if isinstance(value, float) else value for value in values)
+
+
+def load_script(file_path, module_name="exported_macro"):
+    """Import an exported script as a module, to play it with another backend"""
+    from importlib.util import module_from_spec, spec_from_file_location
+
+    spec = spec_from_file_location(module_name, file_path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def compare_timing(script_module, macro_events, base_dir=None, options=None, idle_gap=None):
+    """Play the exported script and the application Player on memory backends.
+    Returns the number of inputs and the offsets (ms) between the inputs of
+    both, relative to their first input. Raises ExportError when they differ."""
+    from macro.player import Player
+
+    options = {**playback_options({}), **(options or {})}
+    if options["repeat"] == 0 or options["interval"] > 0 or options["for_seconds"] > 0:
+        raise ExportError("compare with a number of repeats, without For or Interval")
+    script_backend = MemoryBackend()
+    script_module.play(script_backend, options["repeat"], options["speed"], options["fixed_timestamp"],
+                       options["delay"])
+    player_backend = MemoryBackend()
+    player = Player(player_backend)
+    player.playing = True
+    player.run(compile_plan(macro_events, player_backend.special_keys, base_dir, idle_gap), options["repeat"],
+               options["speed"], fixed_timestamp=options["fixed_timestamp"], repeat_delay=options["delay"])
+    script_log, player_log = script_backend.log, player_backend.log
+    if [entry[1:] for entry in script_log] != [_rounded(entry[1:]) for entry in player_log]:
+        raise ExportError("the script does not send the same inputs as the application")
+    if not script_log:
+        return {"inputs": 0}
+    offsets = sorted(abs((script[0] - script_log[0][0]) - (played[0] - player_log[0][0])) * 1000
+                     for script, played in zip(script_log, player_log))
+    return {
+        "inputs": len(offsets),
+        "mean_ms": round(sum(offsets) / len(offsets), 3),
+        "p99_ms": round(offsets[min(len(offsets) - 1, int(0.99 * len(offsets)))], 3),
+        "max_ms": round(offsets[-1], 3),
+    }
+
+
+_SCRIPT = Template('''#!/usr/bin/env python3
+"""$name, exported from PyMacroRecord on $date ($events events, $ops ops).
+
+Plays the macro with pynput, without PyMacroRecord:
+
+    python $name.py --repeat 3 --speed 2
+
+--dry-run only counts the inputs. play() can also be given any object with
+move, button, scroll, key, flush and special_keys, like the backends of
+PyMacroRecord.
+"""
+from array import array
+from base64 import b64decode
+from sys import byteorder
+from time import perf_counter, sleep
+
+OPTIONS = $options
+
+TICK = $tick
+BUTTONS = ("left", "right", "middle")
+
+
+def _unpack(typecode, text):
+    data = array(typecode, b64decode("".join(text)))
+    if byteorder == "big" and data.itemsize > 1:
+        data.byteswap()
+    return data
+
+
+# One op per index: code, wait before it (s) and three integer arguments
+CODES = _unpack("B", $codes)
+DELAYS = _unpack("d", $delays)
+ARGS = _unpack("i", $args)
+STRINGS = $strings
+TEXTS = $texts
+
+
+class PynputBackend:
+    def __init__(self):
+        from pynput import keyboard, mouse
+
+        self.special_keys = keyboard.Key
+        self.buttons = mouse.Button
+        self.mouse = mouse.Controller()
+        self.keyboard = keyboard.Controller()
+
+    def move(self, x, y):
+        self.mouse.position = (x, y)
+
+    def button(self, button, pressed):
+        (self.mouse.press if pressed else self.mouse.release)(getattr(self.buttons, button))
+
+    def scroll(self, dx, dy):
+        self.mouse.scroll(dx, dy)
+
+    def key(self, key, pressed):
+        (self.keyboard.press if pressed else self.keyboard.release)(key)
+
+    def flush(self):
+        pass
+
+
+class _KeyNames:
+    def __getattr__(self, name):
+        return "Key." + name
+
+
+class DryRunBackend:
+    special_keys = _KeyNames()
+
+    def __init__(self):
+        self.inputs = 0
+
+    def move(self, x, y):
+        self.inputs += 1
+
+    def button(self, button, pressed):
+        self.inputs += 1
+
+    def scroll(self, dx, dy):
+        self.inputs += 1
+
+    def key(self, key, pressed):
+        self.inputs += 1
+
+    def flush(self):
+        pass
+
+
+def _resolve_keys(special_keys):
+    return [getattr(special_keys, key[4:]) if key.startswith("Key.") else key for key in STRINGS]
+
+
+def _wait(seconds, end_at):
+    """Sleep seconds, False when end_at comes first (after sleeping until it)"""
+    if perf_counter() + seconds > end_at:
+        sleep(max(0.0, end_at - perf_counter()))
+        return False
+    if seconds > 0:
+        sleep(seconds)
+    return True
+
+
+def _type_text(backend, text, timings, speed, fixed_timestamp, space, end_at=float("inf")):
+    """False when end_at comes before the end of the text, the held character is released"""
+    keys = [space if char == " " else char for char in text]
+    if fixed_timestamp > 0:
+        scale = 1
+        timings = [(fixed_timestamp, fixed_timestamp)] * len(keys)
+        if timings:
+            timings[0] = (0, fixed_timestamp)
+    else:
+        scale = 1 / speed
+        timings = timings or [(0, 0)] * len(keys)
+    for char, (gap, hold) in zip(keys, timings):
+        if gap and not _wait(gap * scale, end_at):
+            return False
+        backend.key(char, True)
+        if hold:
+            backend.flush()
+            if not _wait(hold * scale, end_at):
+                backend.key(char, False)
+                backend.flush()
+                return False
+        backend.key(char, False)
+        backend.flush()
+    return True
+
+
+def play(backend, repeat=1, speed=1, fixed_timestamp=0, repeat_delay=0, end_at=float("inf"), pressed=None,
+         buttons=None):
+    """Play the macro repeat times (float("inf") for infinite) until end_at (a perf_counter() time).
+    Returns the number of completed repeats. Keys left pressed are added to pressed, buttons to buttons."""
+    keys = _resolve_keys(backend.special_keys)
+    space = backend.special_keys.space
+    pressed = [] if pressed is None else pressed
+    buttons = [] if buttons is None else buttons
+    count = len(CODES)
+    repeat_count = 0
+    deadline = perf_counter()
+    while repeat_count < repeat:
+        pc = 0
+        loops = []  # [first op of the loop body, iterations left]
+        while pc < count:
+            code = CODES[pc]
+            deadline += fixed_timestamp if fixed_timestamp > 0 else DELAYS[pc] / speed
+            if deadline > end_at:
+                backend.flush()
+                _wait(end_at - perf_counter(), end_at)
+                return repeat_count
+            wait = deadline - perf_counter()
+            if wait > TICK:
+                backend.flush()
+                sleep(wait)
+            first, second, third = ARGS[3 * pc], ARGS[3 * pc + 1], ARGS[3 * pc + 2]
+            pc += 1
+            if code == $OP_WAIT:
+                continue
+            if code == $OP_MOVE:
+                backend.move(first, second)
+            elif code == $OP_CLICK:
+                backend.move(first, second)
+                button = BUTTONS[third >> 1]
+                backend.button(button, bool(third & 1))
+                if third & 1:
+                    if button not in buttons:
+                        buttons.append(button)
+                elif button in buttons:
+                    buttons.remove(button)
+            elif code == $OP_SCROLL:
+                backend.scroll(first, second)
+            elif code == $OP_KEY:
+                backend.key(keys[first], bool(second))
+                if second and keys[first] not in pressed:
+                    pressed.append(keys[first])
+            elif code == $OP_TYPE:
+                backend.flush()
+                if not _type_text(backend, TEXTS[first][0], TEXTS[first][1], speed, fixed_timestamp, space,
+                                  end_at):
+                    return repeat_count
+                deadline = perf_counter()
+            elif code == $OP_LOOP:
+                if first <= 0:
+                    pc = second + 1
+                else:
+                    loops.append([pc, first - 1])
+            elif code == $OP_END_LOOP and loops:
+                if loops[-1][1] > 0:
+                    loops[-1][1] -= 1
+                    pc = loops[-1][0]
+                else:
+                    loops.pop()
+        repeat_count += 1
+        backend.flush()
+        if repeat_delay > 0 and repeat_count < repeat:
+            if not _wait(repeat_delay, end_at):
+                return repeat_count
+            deadline = perf_counter()
+    return repeat_count
+
+
+def run(backend, repeat=1, speed=1, fixed_timestamp=0, repeat_delay=0, for_seconds=0, interval=0):
+    """Play with the repeat settings of PyMacroRecord: For plays back to back
+    until its time is over, Interval starts again that long after each run"""
+    pressed, buttons = [], []
+    try:
+        while True:
+            if for_seconds > 0:
+                play(backend, float("inf"), speed, fixed_timestamp, 0, perf_counter() + for_seconds, pressed, buttons)
+            else:
+                play(backend, repeat or float("inf"), speed, fixed_timestamp, repeat_delay, pressed=pressed,
+                     buttons=buttons)
+            if interval <= 0:
+                break
+            sleep(interval)
+    finally:
+        # Keys and buttons held when stopped mid-macro, like a drag cut by the For deadline or Ctrl+C
+        for key in pressed:
+            backend.key(key, False)
+        for button in buttons:
+            backend.button(button, False)
+        backend.flush()
+
+
+def main(argv=None):
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=OPTIONS["repeat"], help="0 repeats until Ctrl+C")
+    parser.add_argument("--speed", type=float, default=OPTIONS["speed"])
+    parser.add_argument("--delay", type=float, default=OPTIONS["delay"], help="seconds between repeats")
+    parser.add_argument("--for-seconds", type=float, default=OPTIONS["for_seconds"])
+    parser.add_argument("--interval", type=float, default=OPTIONS["interval"])
+    parser.add_argument("--fixed-timestamp", type=float, default=OPTIONS["fixed_timestamp"])
+    parser.add_argument("--dry-run", action="store_true", help="send nothing, only count the inputs")
+    args = parser.parse_args(argv)
+    if args.speed <= 0 or args.repeat < 0:
+        parser.error("--speed must be more than 0 and --repeat 0 or more")
+    backend = DryRunBackend() if args.dry_run else PynputBackend()
+    started = perf_counter()
+    try:
+        run(backend, args.repeat, args.speed, args.fixed_timestamp, args.delay, args.for_seconds, args.interval)
+    except KeyboardInterrupt:
+        pass
+    if args.dry_run:
+        print(f"{backend.inputs} inputs in {perf_counter() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
+''')
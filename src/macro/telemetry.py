@@ -0,0 +1,183 @@
+from array import array
+from bisect import bisect_left
+from json import dumps
+from time import perf_counter
+
+# Upper bounds (ms) of the lateness histogram bins, the last bin takes the rest
+HISTOGRAM_BOUNDS = (0.5, 1, 2, 5, 10, 20, 50, 100)
+DRIFT_POINTS = 20
+
+
+class TimingRecorder:
+    """Scheduled and actual times of the played ops, in perf_counter seconds.
+
+    Both buffers are allocated once. When they are full, every other sample
+    is dropped and only one op out of stride is recorded from then on, so a
+    long or infinite playback keeps a sample spread over its whole length.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.scheduled = array("d", bytes(8 * capacity))
+        self.actual = array("d", bytes(8 * capacity))
+        self.count = 0
+        self.stride = 1
+        self._skip = 0
+
+    def record(self, scheduled, actual):
+        if self._skip:
+            self._skip -= 1
+            return
+        self._skip = self.stride - 1
+        if self.count == self.capacity:
+            self._decimate()
+        self.scheduled[self.count] = scheduled
+        self.actual[self.count] = actual
+        self.count += 1
+
+    def _decimate(self):
+        half = self.count // 2
+        self.scheduled[:half] = self.scheduled[0:self.count:2]
+        self.actual[:half] = self.actual[0:self.count:2]
+        self.count = half
+        self.stride *= 2
+
+    def samples(self):
+        """[(seconds since the first scheduled op, lateness in ms)]"""
+        if not self.count:
+            return []
+        start = self.scheduled[0]
+        return [(self.scheduled[i] - start, (self.actual[i] - self.scheduled[i]) * 1000)
+                for i in range(self.count)]
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def timing_report(recorder):
+    """Lateness statistics (ms) of a TimingRecorder, None when nothing was played"""
+    samples = recorder.samples()
+    if not samples:
+        return None
+    lateness = sorted(late for _, late in samples)
+    histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+    for late in lateness:
+        bin_index = 0
+        while bin_index < len(HISTOGRAM_BOUNDS) and late > HISTOGRAM_BOUNDS[bin_index]:
+            bin_index += 1
+        histogram[bin_index] += 1
+    # Drift: mean lateness of DRIFT_POINTS consecutive slices of the playback
+    slice_size = max(1, len(samples) // DRIFT_POINTS)
+    drift = []
+    for first in range(0, len(samples), slice_size):
+        part = samples[first:first + slice_size]
+        drift.append([round(part[0][0], 3), round(sum(late for _, late in part) / len(part), 3)])
+    return {
+        "samples": len(samples),
+        "sample_stride": recorder.stride,
+        "duration": round(samples[-1][0], 3),
+        "mean_ms": round(sum(lateness) / len(lateness), 3),
+        "p50_ms": round(_percentile(lateness, 0.5), 3),
+        "p99_ms": round(_percentile(lateness, 0.99), 3),
+        "max_ms": round(lateness[-1], 3),
+        "histogram": {
+            "bounds_ms": list(HISTOGRAM_BOUNDS),
+            "counts": histogram,
+        },
+        "drift": drift,
+    }
+
+
+def format_histogram(report, width=30):
+    """Text bars of the lateness histogram"""
+    counts = report["histogram"]["counts"]
+    bounds = report["histogram"]["bounds_ms"]
+    labels = [f"<= {bound} ms" for bound in bounds] + [f"> {bounds[-1]} ms"]
+    most = max(counts) or 1
+    return "\n".join(f"{label:>10} {'#' * round(count * width / most):<{width}} {count}"
+                     for label, count in zip(labels, counts))
+
+
+def export_timing_csv(recorder, file_path):
+    with open(file_path, "w") as csv_file:
+        csv_file.write("time_s,lateness_ms\n")
+        for time_s, late in recorder.samples():
+            csv_file.write(f"{time_s:.6f},{late:.4f}\n")
+
+
+def export_timing_json(report, file_path):
+    with open(file_path, "w") as json_file:
+        json_file.write(dumps(report, indent=4))
+
+
+# Upper bounds (microseconds) of the recording callback latency histogram bins
+LATENCY_BOUNDS_US = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class RecordingStats:
+    """Counters of a recording, cheap enough to stay on for every callback.
+
+    Latency is the time spent inside a listener callback: while it runs the
+    listener cannot deliver the next input. Status bar updates are also timed
+    on their own as they are the slowest part of a callback. Dropped inputs are
+    received but cannot be replayed (unknown mouse button or key).
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.stopped = None
+        self.counts = {}
+        self.dropped = 0
+        self.latency_counts = [0] * (len(LATENCY_BOUNDS_US) + 1)
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.status_updates = 0
+        self.status_time = 0.0
+        self.peak_rate = 0
+        self._second = 0
+        self._second_count = 0
+
+    def add(self, kind, duration):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        self.latency_total += duration
+        if duration > self.latency_max:
+            self.latency_max = duration
+        self.latency_counts[bisect_left(LATENCY_BOUNDS_US, duration * 1e6)] += 1
+        second = int(perf_counter() - self.started)
+        if second != self._second:
+            self._second = second
+            self._second_count = 0
+        self._second_count += 1
+        if self._second_count > self.peak_rate:
+            self.peak_rate = self._second_count
+
+    def add_status(self, duration):
+        self.status_updates += 1
+        self.status_time += duration
+
+    def drop(self):
+        self.dropped += 1
+
+    def stop(self):
+        self.stopped = perf_counter()
+
+    def to_dict(self):
+        events = sum(self.counts.values())
+        duration = (self.stopped or perf_counter()) - self.started
+        return {
+            "duration": round(duration, 3),
+            "events": events,
+            "events_by_type": dict(self.counts),
+            "dropped": self.dropped,
+            "rate_per_s": round(events / duration, 1) if duration > 0 else 0,
+            "peak_rate_per_s": self.peak_rate,
+            "callback_mean_us": round(self.latency_total / events * 1e6, 1) if events else 0,
+            "callback_max_us": round(self.latency_max * 1e6, 1),
+            "callback_histogram": {
+                "bounds_us": list(LATENCY_BOUNDS_US),
+                "counts": list(self.latency_counts),
+            },
+            "status_bar_updates": self.status_updates,
+            "status_bar_mean_us": round(self.status_time / self.status_updates * 1e6, 1) if self.status_updates else 0,
+        }
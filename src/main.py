@@ -1,7 +1,10 @@
 from sys import platform
 
+from utils.startup_timeline import mark
 from windows import MainApp
 
+mark("imports")
+
 if platform.lower() == "win32":
     import ctypes
     PROCESS_PER_MONITOR_DPI_AWARE = 2
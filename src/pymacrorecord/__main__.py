@@ -0,0 +1,300 @@
+"""Command line entry point, run from the src directory:
+
+    python -m pymacrorecord optimize macro.pmr -o macro.min.pmr
+    python -m pymacrorecord play macro.pmr --repeat 3 --speed 2
+    python -m pymacrorecord parallel macro.pmr --params rows.csv --workers 4 --xvfb
+    python -m pymacrorecord serve --port 8765 --load macro.pmr
+    python -m pymacrorecord export macro.pmr -o macro.py --check
+
+Only the modules a command needs are imported, playing a macro does not load Tk.
+"""
+from argparse import ArgumentParser
+from json import dumps
+from os import path
+from sys import stdout
+from time import time
+
+from backends import BACKENDS
+from macro.macro_editor import OPTIMIZER_PASSES, optimize_macro
+from utils.macro_file import read_macro_file, write_macro_file
+
+
+def format_optimize_report(report):
+    lines = []
+    for result in report["passes"]:
+        line = f"{result['name']}: -{result['events_removed']} events, {result['time_merged']:.3f}s merged"
+        if result["reverted"]:
+            line += " (reverted)"
+        lines.append(line)
+    lines.append(f"total: {report['events_before']} -> {report['events_after']} events, "
+                 f"{report['time_merged']:.3f}s merged")
+    return "\n".join(lines)
+
+
+def optimize_command(args):
+    macro_data = read_macro_file(args.file)
+    passes = args.passes.split(",") if args.passes else None
+    unknown = [name for name in passes or [] if name not in OPTIMIZER_PASSES]
+    if unknown:
+        raise SystemExit(f"unknown optimizer passes: {', '.join(unknown)}")
+    report = optimize_macro(macro_data, passes)
+    if not args.dry_run:
+        write_macro_file(args.output or args.file, macro_data, not args.indent)
+    print(dumps(report) if args.json else format_optimize_report(report))
+
+
+def _emit(message):
+    stdout.write(dumps(message) + "\n")
+    stdout.flush()
+
+
+def play_command(args):
+    # Imported here so that the other commands do not need an input backend
+    from backends import create_backend
+    from macro.playback_plan import MacroCompileError, compile_plan, plan_duration
+    from macro.player import PlaybackObserver, Player
+    from macro.telemetry import TimingRecorder, export_timing_csv, export_timing_json, timing_report
+
+    class JsonProgress(PlaybackObserver):
+        """Writes one json object per line on stdout"""
+
+        def __init__(self, all_events):
+            self.all_events = all_events
+            self.error = None
+
+        def on_repeat(self, repeat, repeat_times):
+            _emit({"event": "repeat", "repeat": repeat, "of": _json_count(repeat_times)})
+
+        def on_event(self, source, repeat, repeat_times, elapsed):
+            if self.all_events:
+                _emit({"event": "progress", "index": source, "repeat": repeat, "elapsed": round(elapsed, 4)})
+
+        def on_error(self, error):
+            self.error = error
+
+    if args.repeat < 0 or args.speed <= 0:
+        raise SystemExit("--repeat must be 0 or more and --speed more than 0")
+    idle_gap = None
+    if args.compress_idle:
+        threshold, cap = args.compress_idle
+        if threshold <= 0 or cap < 0:
+            raise SystemExit("--compress-idle needs a threshold more than 0 and a cap of 0 or more")
+        idle_gap = (threshold, min(cap, threshold))
+    backend = create_backend("memory" if args.estimate else args.backend)
+    try:
+        macro_data = read_macro_file(args.file)
+        plan = compile_plan(macro_data, backend.special_keys, path.dirname(path.abspath(args.file)), idle_gap)
+    except (OSError, ValueError) as e:
+        _emit({"event": "error", "error": str(e)})
+        raise SystemExit(1)
+    for _, include_path, _ in plan.changed_includes:
+        _emit({"event": "warning", "warning": f"{include_path} changed since it was linked"})
+    if args.estimate:
+        duration = plan_duration(plan, args.speed, args.fixed_timestamp)
+        recorded = plan_duration(compile_plan(macro_data, backend.special_keys, path.dirname(path.abspath(args.file))))
+        _emit({"event": "estimate", "recorded": round(recorded, 4), "duration": round(duration, 4),
+               "total": None if args.repeat == 0 else round(duration * args.repeat + args.delay * (args.repeat - 1), 4)})
+        return
+    repeat_times = args.repeat or float("inf")
+    observer = JsonProgress(args.events)
+    player = Player(backend)
+    _emit({"event": "start", "file": args.file, "events": len(macro_data.get("events", [])),
+           "ops": len(plan), "repeat": _json_count(repeat_times), "speed": args.speed})
+    timing = TimingRecorder()
+    started = time()
+    player.playing = True
+    try:
+        repeat_count = player.run(plan, repeat_times, args.speed, observer,
+                                  fixed_timestamp=args.fixed_timestamp, repeat_delay=args.delay, timing=timing)
+    except KeyboardInterrupt:
+        player.stop()
+        player.release_pressed()
+        repeat_count = None
+    duration = round(time() - started, 4)
+    report = timing_report(timing)
+    if args.timing and report is not None:
+        if args.timing.lower().endswith(".csv"):
+            export_timing_csv(timing, args.timing)
+        else:
+            export_timing_json(report, args.timing)
+    if observer.error is not None:
+        _emit({"event": "error", "error": str(observer.error), "duration": duration})
+        raise SystemExit(1)
+    if repeat_count is None:
+        _emit({"event": "stopped", "duration": duration})
+        raise SystemExit(130)
+    player.release_pressed()
+    done = {"event": "done", "repeats": repeat_count, "duration": duration}
+    if report is not None:
+        done["lateness_ms"] = {key: report[key + "_ms"] for key in ("mean", "p50", "p99", "max")}
+    if hasattr(backend, "log"):
+        done["injected"] = len(backend.log)
+    _emit(done)
+
+
+def parallel_command(args):
+    from macro.parallel import load_params, run_parallel
+
+    def emit_result(result):
+        line = {"event": "result", **{key: value for key, value in result.items() if key != "timing"}}
+        if result.get("timing"):
+            line["lateness_ms"] = {key: result["timing"][key + "_ms"] for key in ("mean", "p99", "max")}
+        _emit(line)
+
+    if args.workers < 1 or args.speed <= 0 or args.repeat < 1:
+        raise SystemExit("--workers and --repeat must be 1 or more and --speed more than 0")
+    try:
+        macro_data = read_macro_file(args.file)
+        rows = load_params(args.params) if args.params else [{}] * args.rows
+    except (OSError, ValueError) as e:
+        _emit({"event": "error", "error": str(e)})
+        raise SystemExit(1)
+    displays = args.displays.split(",") if args.displays else None
+    _emit({"event": "start", "file": args.file, "rows": len(rows), "workers": args.workers})
+    try:
+        results, summary = run_parallel(macro_data, rows, args.workers, path.dirname(path.abspath(args.file)),
+                                        args.backend, displays, args.xvfb, args.first_display, args.speed,
+                                        args.repeat, emit_result)
+    except (OSError, ValueError) as e:
+        _emit({"event": "error", "error": str(e)})
+        raise SystemExit(1)
+    if args.results:
+        with open(args.results, "w") as results_file:
+            results_file.write(dumps({"summary": summary, "results": results}, indent=4))
+    _emit({"event": "done", **summary})
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+def serve_command(args):
+    from threading import Event
+
+    from backends import create_backend
+    from macro.control_server import ControlError, ControlServer, HeadlessController
+    from macro.progress import ProgressHub
+
+    hub = ProgressHub()
+    controller = HeadlessController(create_backend(args.backend), hub)
+    for file_path in args.load or ():
+        try:
+            _emit({"event": "loaded", **controller.load({"path": file_path})})
+        except ControlError as e:
+            _emit({"event": "error", "error": str(e)})
+            raise SystemExit(1)
+    try:
+        server = ControlServer(controller, hub, args.port, args.token).start()
+    except OSError as e:
+        _emit({"event": "error", "error": str(e)})
+        raise SystemExit(1)
+    _emit({"event": "listening", "port": server.port, "token": server.token})
+    try:
+        Event().wait()
+    except KeyboardInterrupt:
+        controller.stop({})
+        server.stop()
+
+
+def export_command(args):
+    from macro.script_export import compare_timing, export_script, load_script, playback_options
+
+    try:
+        macro_data = read_macro_file(args.file)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"cannot read {args.file}: {e}")
+    output = args.output or path.splitext(args.file)[0] + ".py"
+    options = playback_options(macro_data.get("settings", {}))
+    for option in ("repeat", "speed", "delay"):
+        if getattr(args, option) is not None:
+            options[option] = getattr(args, option)
+    base_dir = path.dirname(path.abspath(args.file))
+    try:
+        source = export_script(macro_data, base_dir, options, name=path.splitext(path.basename(output))[0])
+    except ValueError as e:
+        raise SystemExit(f"cannot export {args.file}: {e}")
+    with open(output, "w", encoding="utf-8") as script_file:
+        script_file.write(source)
+    print(f"{output}: {len(source)} bytes")
+    if args.check:
+        # Both played on the memory backend, once, so that it ends
+        check_options = {**options, "repeat": 1, "for_seconds": 0, "interval": 0}
+        try:
+            report = compare_timing(load_script(output), macro_data, base_dir, check_options)
+        except ValueError as e:
+            raise SystemExit(f"check failed: {e}")
+        print(f"check: {report['inputs']} inputs identical" + (
+            f", timing differs by {report['mean_ms']}ms on average, {report['max_ms']}ms at most"
+            if report["inputs"] else ""))
+
+
+def _json_count(count):
+    return None if count == float("inf") else count
+
+
+def build_parser():
+    parser = ArgumentParser(prog="pymacrorecord")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    optimize = commands.add_parser("optimize", help="remove redundant events from a macro")
+    optimize.add_argument("file")
+    optimize.add_argument("-o", "--output", help="write here instead of overwriting the file")
+    optimize.add_argument("--passes", help="comma separated passes: " + ", ".join(OPTIMIZER_PASSES))
+    optimize.add_argument("--dry-run", action="store_true", help="only print the report")
+    optimize.add_argument("--indent", action="store_true", help="write indented json")
+    optimize.add_argument("--json", action="store_true", help="print the report as json")
+    optimize.set_defaults(func=optimize_command)
+
+    play = commands.add_parser("play", help="play a macro without opening the window")
+    play.add_argument("file")
+    play.add_argument("--repeat", type=int, default=1, help="number of repeats, 0 repeats until stopped")
+    play.add_argument("--speed", type=float, default=1)
+    play.add_argument("--delay", type=float, default=0, help="seconds to wait between repeats")
+    play.add_argument("--fixed-timestamp", type=float, default=0, help="play every event after this delay")
+    play.add_argument("--compress-idle", type=float, nargs=2, metavar=("THRESHOLD", "CAP"),
+                      help="play the waits longer than THRESHOLD seconds as CAP seconds")
+    play.add_argument("--estimate", action="store_true", help="only print how long the playback would last")
+    play.add_argument("--events", action="store_true", help="also print a line for every played event")
+    play.add_argument("--timing", help="write the timing of every event to this .csv or .json file")
+    play.add_argument("--backend", choices=BACKENDS, default="pynput",
+                      help="xlib batches inputs on Linux, memory only logs them to measure playback without a display")
+    play.set_defaults(func=play_command)
+
+    parallel = commands.add_parser("parallel", help="play a macro in several processes, each on its own X display")
+    parallel.add_argument("file")
+    parallel.add_argument("--params", help=".csv (with a header) or .json rows, {{column}} in typed texts is replaced")
+    parallel.add_argument("--rows", type=int, default=1, help="number of plays without --params")
+    parallel.add_argument("--workers", type=int, default=2)
+    parallel.add_argument("--xvfb", action="store_true", help="start one Xvfb server per worker")
+    parallel.add_argument("--first-display", type=int, default=99, help="display number of the first Xvfb server")
+    parallel.add_argument("--displays", help="comma separated displays of the workers, e.g. :1,:2")
+    parallel.add_argument("--repeat", type=int, default=1, help="repeats of each row")
+    parallel.add_argument("--speed", type=float, default=1)
+    parallel.add_argument("--results", help="write every result and its timing to this .json file")
+    parallel.add_argument("--backend", choices=BACKENDS, default="xlib")
+    parallel.set_defaults(func=parallel_command)
+
+    serve = commands.add_parser("serve", help="play macros asked for through the local control API")
+    serve.add_argument("--port", type=int, default=0, help="port on 127.0.0.1, 0 picks a free one")
+    serve.add_argument("--token", help="token the clients must send, a random one by default")
+    serve.add_argument("--load", action="append", help="compile this macro file at start, can be repeated")
+    serve.add_argument("--backend", choices=BACKENDS, default="pynput")
+    serve.set_defaults(func=serve_command)
+
+    export = commands.add_parser("export", help="write a python script playing the macro without PyMacroRecord")
+    export.add_argument("file")
+    export.add_argument("-o", "--output", help="script path, the macro path with .py by default")
+    export.add_argument("--repeat", type=int, help="default repeat of the script, else the one saved in the macro")
+    export.add_argument("--speed", type=float)
+    export.add_argument("--delay", type=float, help="default seconds between repeats")
+    export.add_argument("--check", action="store_true",
+                        help="play the script and the macro on the memory backend and compare their inputs and timing")
+    export.set_defaults(func=export_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
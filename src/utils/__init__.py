@@ -1,3 +1,13 @@
-from .not_windows import NotWindows
-from .user_settings import UserSettings
-from .version import Version
+def __getattr__(name):
+    # Imported lazily so the helpers of this package used for playback
+    # (keys, macro files) can be imported without pulling in Tk and requests.
+    if name == "NotWindows":
+        from .not_windows import NotWindows
+        return NotWindows
+    if name == "UserSettings":
+        from .user_settings import UserSettings
+        return UserSettings
+    if name == "Version":
+        from .version import Version
+        return Version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
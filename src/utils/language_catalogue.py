@@ -0,0 +1,96 @@
+from copy import deepcopy
+from json import dump, load
+from os import listdir, makedirs, path, replace, stat
+
+from utils.get_file import resource_path
+
+CACHE_FORMAT = 1
+
+
+def deepcopy_dict_missing_entries(dst: dict, src: dict):
+    # recursively copy entries that are in src but not in dst
+    for k, v in src.items():
+        if k not in dst:
+            dst[k] = deepcopy(v)
+        elif isinstance(v, dict) and isinstance(dst[k], dict):
+            deepcopy_dict_missing_entries(dst[k], v)
+
+
+class LanguageCatalogue:
+    """Texts of every language with the missing entries taken from English.
+
+    The merged texts of each language and the list of languages are written to
+    cache_directory the first time, then read from there as long as the files
+    of the langs folder keep the same modification time and size. Languages
+    already loaded are kept in memory, so switching back is free.
+    """
+
+    def __init__(self, cache_directory):
+        self.langs_directory = resource_path("langs")
+        self.cache_directory = cache_directory
+        self._texts = {}
+        self._index = self.__load_index()
+
+    def languages(self):
+        """{short name: long name} of the available languages"""
+        return self._index["languages"]
+
+    def texts(self, lang):
+        """Texts of lang, English for an unknown language. Shared, do not modify."""
+        if lang not in self._index["languages"]:
+            lang = "en"
+        if lang not in self._texts:
+            try:
+                with open(path.join(self.cache_directory, lang + ".json"), encoding="utf-8") as f:
+                    self._texts[lang] = load(f)
+            except (OSError, ValueError):
+                self.__build()
+        return self._texts[lang]
+
+    def __sources(self):
+        return {
+            file: [info.st_mtime_ns, info.st_size]
+            for file in sorted(listdir(self.langs_directory)) if file.endswith(".json")
+            for info in (stat(path.join(self.langs_directory, file)),)
+        }
+
+    def __load_index(self):
+        try:
+            with open(path.join(self.cache_directory, "index.json"), encoding="utf-8") as f:
+                index = load(f)
+            if index.get("format") == CACHE_FORMAT and index.get("sources") == self.__sources():
+                return index
+        except (OSError, ValueError):
+            pass
+        return self.__build()
+
+    def __build(self):
+        """Parse every language file and write the cache, kept in memory only when it cannot be written"""
+        contents = {}
+        languages = {}
+        for file in self.__sources():
+            with open(path.join(self.langs_directory, file), encoding="utf-8") as f:
+                language = load(f)
+            short = language["information"]["lang_short"]
+            languages[short] = language["information"]["lang_long"]
+            contents[short] = language["content"]
+        for short, content in contents.items():
+            if short != "en":
+                deepcopy_dict_missing_entries(content, contents["en"])
+        index = {"format": CACHE_FORMAT, "sources": self.__sources(), "languages": languages}
+        try:
+            makedirs(self.cache_directory, exist_ok=True)
+            for short, content in contents.items():
+                self.__write(short + ".json", content)
+            self.__write("index.json", index)  # Last, the cache is only valid once complete
+        except OSError as e:
+            print(f"cannot write the language cache: {e}")
+        self._texts = contents
+        self._index = index
+        return index
+
+    def __write(self, file, content):
+        file_path = path.join(self.cache_directory, file)
+        with open(file_path + ".tmp", "w", encoding="utf-8") as f:
+            dump(content, f, ensure_ascii=False, separators=(",", ":"))
+        replace(file_path + ".tmp", file_path)
@@ -0,0 +1,56 @@
+from hashlib import sha256
+from json import dumps, load, loads
+from os import path, stat
+
+# Parsed included macros, keyed by absolute path:
+# ((mtime, size), parsed content, sha256 of the file)
+_include_cache = {}
+
+
+def read_macro_file(file_path):
+    """Parse a macro file. The result belongs to the caller and can be edited."""
+    with open(file_path, "r") as macro_file:
+        return load(macro_file)
+
+
+def write_macro_file(file_path, macro_data, compact=True):
+    with open(file_path, "w") as macro_file:
+        if compact:
+            macro_file.write(dumps(macro_data, separators=(',', ':')))
+        else:
+            macro_file.write(dumps(macro_data, indent=4))
+
+
+def rebase_includes(macro_data, old_dir, new_dir):
+    """Make the relative includeMacro paths of macro_data (events and subroutines)
+    relative to new_dir instead of old_dir, for a macro saved elsewhere"""
+    for events in [macro_data.get("events", [])] + list(macro_data.get("subroutines", {}).values()):
+        for event in events:
+            if event.get("type") != "includeMacro" or path.isabs(event.get("path", "")):
+                continue
+            include_path = path.normpath(path.join(old_dir, event["path"]))
+            try:
+                event["path"] = path.relpath(include_path, new_dir)
+            except ValueError:  # Not on the same drive
+                event["path"] = include_path
+
+
+def load_include(file_path):
+    """Return (parsed content, sha256) of a macro used through includeMacro.
+
+    The result is shared between every macro including the same file and must
+    not be modified. It is parsed again only when the file changes on disk, so
+    a playlist reusing the same include reads it once.
+    """
+    file_path = path.abspath(file_path)
+    info = stat(file_path)
+    signature = (info.st_mtime_ns, info.st_size)
+    cached = _include_cache.get(file_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1], cached[2]
+    with open(file_path, "rb") as macro_file:
+        raw = macro_file.read()
+    content = loads(raw)
+    digest = sha256(raw).hexdigest()
+    _include_cache[file_path] = (signature, content, digest)
+    return content, digest
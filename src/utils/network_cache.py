@@ -0,0 +1,68 @@
+from json import dumps, load
+from os import replace
+from threading import Lock
+from time import time
+
+# First wait after a failed request, doubled after each new failure
+BACKOFF_START = 60
+BACKOFF_MAX = 7 * 24 * 3600
+
+
+class NetworkCache:
+    """Bodies of the web requests of the application, kept in a json file.
+
+    A body younger than ttl seconds is used without any request. After a
+    failed request the next one waits BACKOFF_START seconds, doubled at each
+    failure, and the last body received (if any) is used meanwhile.
+    """
+
+    def __init__(self, file_path, ttl):
+        self.file_path = file_path
+        self.ttl = ttl
+        self._lock = Lock()
+        try:
+            with open(file_path, encoding="utf-8") as cache_file:
+                self._entries = load(cache_file)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def cached(self, name):
+        """Last body received for name, None if there is none"""
+        entry = self._entries.get(name)
+        return entry.get("body") if entry else None
+
+    def is_fresh(self, name):
+        entry = self._entries.get(name)
+        return bool(entry) and "body" in entry and time() - entry.get("fetched_at", 0) < self.ttl
+
+    def should_fetch(self, name):
+        """True when the body of name is too old (or missing) and no failure is being waited out"""
+        if self.is_fresh(name):
+            return False
+        return time() >= self._entries.get(name, {}).get("retry_at", 0)
+
+    def fetch(self, name, url, timeout=10):
+        """Request url and keep the body under name. Returns the body, None on failure."""
+        from requests import RequestException, get  # Slow to import, only needed here
+        try:
+            response = get(url, timeout=timeout)
+            body = response.text if response.status_code == 200 else None
+        except RequestException:
+            body = None
+        with self._lock:
+            entry = self._entries.setdefault(name, {})
+            if body is None:
+                entry["failures"] = entry.get("failures", 0) + 1
+                entry["retry_at"] = time() + min(BACKOFF_MAX, BACKOFF_START * 2 ** (entry["failures"] - 1))
+            else:
+                entry.update(body=body, fetched_at=time(), failures=0, retry_at=0)
+            self.__save()
+        return body
+
+    def __save(self):
+        try:
+            with open(self.file_path + ".tmp", "w", encoding="utf-8") as cache_file:
+                cache_file.write(dumps(self._entries))
+            replace(self.file_path + ".tmp", self.file_path)
+        except OSError as e:
+            print(f"cannot write the network cache: {e}")
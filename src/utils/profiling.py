@@ -0,0 +1,83 @@
+import tracemalloc
+from functools import wraps
+from io import StringIO
+from os import environ, listdir, makedirs, path, remove
+from threading import local
+from time import strftime, time
+
+# Set to 1 to profile without changing the settings
+PROFILE_ENV = "PYMACRORECORD_PROFILE"
+# Profiles kept per operation, older ones are deleted
+PROFILE_RETENTION = 10
+
+_config = {"enabled": environ.get(PROFILE_ENV, "") not in ("", "0"), "directory": None}
+_active = local()
+
+
+def configure_profiling(enabled, settings_directory):
+    """Enable the profiled() hooks (always enabled by the environment variable).
+    Profiles are written to a "profiles" folder in settings_directory."""
+    _config["enabled"] = enabled or environ.get(PROFILE_ENV, "") not in ("", "0")
+    _config["directory"] = path.join(settings_directory, "profiles")
+
+
+def profiling_enabled():
+    return _config["enabled"]
+
+
+def profiled(name):
+    """Decorator writing a cProfile and tracemalloc report of each call of the
+    function when profiling is enabled. When it is not, the only cost is one
+    dict lookup per call."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            # Nested profiled calls are part of the outer profile
+            if not _config["enabled"] or getattr(_active, "running", False):
+                return function(*args, **kwargs)
+            from cProfile import Profile  # Only needed once profiling is on
+            _active.running = True
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            profile = Profile()
+            started = time()
+            try:
+                return profile.runcall(function, *args, **kwargs)
+            finally:
+                duration = time() - started
+                peak = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+                _active.running = False
+                try:
+                    _write_profile(name, profile, duration, peak)
+                except OSError as e:
+                    print(f"cannot write profile of {name}: {e}")
+        return wrapper
+    return decorator
+
+
+def _write_profile(name, profile, duration, peak_memory):
+    from pstats import Stats
+    directory = _config["directory"] or path.join(path.abspath("."), "profiles")
+    makedirs(directory, exist_ok=True)
+    base = path.join(directory, f"{name}-{strftime('%Y%m%d-%H%M%S')}-{int(time() * 1000) % 1000:03d}")
+    profile.dump_stats(base + ".prof")
+    summary = StringIO()
+    summary.write(f"{name}: {duration:.3f}s, peak memory {peak_memory / 1024:.1f} KiB\n\n")
+    Stats(profile, stream=summary).sort_stats("cumulative").print_stats(30)
+    with open(base + ".txt", "w") as summary_file:
+        summary_file.write(summary.getvalue())
+    print(f"profile of {name} written to {base}.prof")
+    _apply_retention(directory, name)
+
+
+def _apply_retention(directory, name):
+    runs = sorted({path.splitext(file)[0] for file in listdir(directory)
+                   if file.startswith(name + "-") and file.endswith((".prof", ".txt"))})
+    for run in runs[:-PROFILE_RETENTION]:
+        for extension in (".prof", ".txt"):
+            if path.isfile(path.join(directory, run + extension)):
+                remove(path.join(directory, run + extension))
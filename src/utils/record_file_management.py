@@ -1,7 +1,8 @@
-from json import dumps, load
+from os import path
 from tkinter import DISABLED, NORMAL, filedialog, messagebox
 
-from utils import UserSettings
+from utils.macro_file import load_include, read_macro_file, rebase_includes, write_macro_file
+from utils.profiling import profiled
 from utils.warning_pop_up_save import confirm_save
 
 
@@ -22,35 +23,58 @@ class RecordFileManagement:
             defaultextension=".pmr",
         )
         if macroSaved is not None:
+            if self.main_app.current_file is not None:
+                # Includes are linked relative to the macro file, keep them pointing to the same files
+                rebase_includes(self.main_app.macro.macro_events, path.dirname(path.abspath(self.main_app.current_file)),
+                                path.dirname(path.abspath(macroSaved.name)))
             self.main_app.current_file = macroSaved.name
             self.save_macro()
             self.main_app.macro_saved = True
         self.main_app.prevent_record = False
 
+    @profiled("save_macro")
     def save_macro(self, event=None):
         if not self.main_app.macro_recorded or self.main_app.macro.playback:
             return
         if self.main_app.current_file is not None:
-            with open(self.main_app.current_file, "w") as current_file:
-                compactJson = UserSettings(self.main_app).settings_dict["Saving"]["Compact_json"]
-                userSettings = self.main_app.settings.settings_dict
-                macroSettings = {"settings": {
-                    "Playback": userSettings["Playback"],
-                    "Minimization": userSettings["Minimization"],
-                    "After_Playback": userSettings["After_Playback"]
-                }}
-                macroData = {
-                    **macroSettings,
-                    **self.main_app.macro.macro_events
-                }
-                if compactJson:
-                    json_macroEvents = dumps(macroData, separators=(',', ':'))
-                else:
-                    json_macroEvents = dumps(macroData, indent=4)
-                current_file.write(json_macroEvents)
+            compactJson = self.main_app.settings.get_bool("Saving", "Compact_json", default=True)
+            userSettings = self.main_app.settings.settings_dict
+            macroSettings = {"settings": {
+                "Playback": userSettings["Playback"],
+                "Minimization": userSettings["Minimization"],
+                "After_Playback": userSettings["After_Playback"]
+            }}
+            macroData = {
+                **macroSettings,
+                **self.main_app.macro.macro_events
+            }
+            write_macro_file(self.main_app.current_file, macroData, compactJson)
         else:
             self.save_macro_as()
 
+    def export_script(self, event=None):
+        """Write the macro as a Python script playing it without PyMacroRecord, with the current playback settings"""
+        if not self.main_app.macro_recorded or self.main_app.macro.playback:
+            return
+        from macro.script_export import export_script, playback_options  # Only needed here
+        self.main_app.prevent_record = True
+        script_path = filedialog.asksaveasfilename(filetypes=[("Python Files", "*.py")], defaultextension=".py")
+        self.main_app.prevent_record = False
+        if not script_path:
+            return
+        base_dir = path.dirname(path.abspath(self.main_app.current_file)) if self.main_app.current_file else None
+        name = path.splitext(path.basename(script_path))[0]
+        try:
+            source = export_script(self.main_app.macro.macro_events, base_dir,
+                                   playback_options(self.main_app.settings.settings_dict),
+                                   self.main_app.macro.idle_gap(), name)
+            with open(script_path, "w", encoding="utf-8") as script_file:
+                script_file.write(source)
+        except (OSError, ValueError) as e:
+            messagebox.showerror(self.config_text["global"]["error"],
+                                 f"{self.config_text['file_menu']['export_script_error']}\n{e}")
+
+    @profiled("load_macro")
     def load_macro(self, event=None):
         if self.main_app.macro.playback:
             return
@@ -80,8 +104,7 @@ class RecordFileManagement:
                 self.config_text["file_menu"]["new_text"], state=NORMAL, command=self.new_macro
             )
             macroFile.close()
-            with open(macroFile.name, "r") as macroContent:
-                self.main_app.macro.import_record(load(macroContent))
+            self.main_app.macro.import_record(read_macro_file(macroFile.name))
             self.main_app.macro_recorded = True
             self.main_app.macro_saved = True
             self.main_app.current_file = macroFile.name
@@ -97,6 +120,17 @@ class RecordFileManagement:
         self.main_app.prevent_record = False
 
 
+    def include_macro_event(self, file_path):
+        """Build an includeMacro event linking file_path. The path is stored relative
+        to the current macro when it has been saved, so both can be moved together."""
+        _, digest = load_include(file_path)
+        if self.main_app.current_file is not None:
+            try:
+                file_path = path.relpath(file_path, path.dirname(path.abspath(self.main_app.current_file)))
+            except ValueError:  # Not on the same drive
+                pass
+        return {"type": "includeMacro", "path": file_path, "sha256": digest, "timestamp": 0}
+
     def new_macro(self, event=None):
         if not self.main_app.macro_recorded or self.main_app.macro.playback:
             return
@@ -3,11 +3,6 @@ from sys import platform
 
 from utils.get_file import resource_path
 
-try:
-    from win10toast import ToastNotifier
-except Exception:
-    print("Not on windows. win10toast not imported.")
-
 
 def show_notification_minim(main_app):
     if platform == "win32":
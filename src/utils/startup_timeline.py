@@ -0,0 +1,28 @@
+from os import environ
+from sys import modules
+from time import perf_counter
+
+# Set to 1 to print how long each step of the startup took
+STARTUP_ENV = "PYMACRORECORD_STARTUP"
+
+_started = perf_counter()
+_enabled = environ.get(STARTUP_ENV, "") not in ("", "0")
+_marks = []
+
+
+def mark(step):
+    """Note the end of a startup step, with the number of modules imported so far"""
+    if _enabled:
+        _marks.append((perf_counter(), step, len(modules)))
+
+
+def print_timeline():
+    if not _enabled:
+        return
+    print(f"{'total ms':>9} {'step ms':>8} {'modules':>8}  step")
+    previous_time, previous_modules = _started, 0
+    for time, step, module_count in _marks:
+        print(f"{(time - _started) * 1000:9.1f} {(time - previous_time) * 1000:8.1f} "
+              f"{module_count - previous_modules:+8d}  {step}")
+        previous_time, previous_modules = time, module_count
+    _marks.clear()
@@ -1,15 +1,39 @@
+import atexit
+from copy import deepcopy
 from json import dumps, load
-from os import getenv, mkdir, path
+from os import getenv, mkdir, path, replace
 from sys import platform
+from threading import RLock, Timer
 from tkinter import messagebox
 from tkinter.constants import BOTTOM, X
 
+# Seconds to wait after a change before writing userSettings.json, changes
+# made meanwhile are written together
+SAVE_DELAY = 1.0
+
+
+def _write_atomic(file_path, content):
+    """Write to a temporary file then rename it, the file is never half written"""
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "w") as temp_file:
+        temp_file.write(content)
+    replace(temp_path, file_path)
+
 
 class UserSettings:
-    """Class to interact with userSettings.json"""
+    """Class to interact with userSettings.json
+
+    The settings are kept in settings_dict, writes to the file are delayed by
+    SAVE_DELAY and done on a background thread. flush() writes pending changes
+    right away, it is called when the application exits.
+    """
     def __init__(self, main_app):
         self.first_time = False
         self.main_app = main_app
+        self.__listeners = []
+        self.__lock = RLock()
+        self.__save_timer = None
+        self.__dirty = False
 
         if platform == "win32":
             self.path_setting = path.join(getenv("LOCALAPPDATA"), "PyMacroRecord")
@@ -26,6 +50,7 @@ class UserSettings:
 
         self.settings_dict = self.__get_config()
         self.check_new_options()
+        atexit.register(self.flush)
 
     def init_settings(self):
         """
@@ -34,10 +59,18 @@ class UserSettings:
         """
         if not path.isdir(self.path_setting):
             mkdir(self.path_setting)
+        _write_atomic(self.user_setting, dumps(self.default_settings(), indent=4))
 
-        userSettings = {
+    @staticmethod
+    def default_settings():
+        return {
             "Playback": {
                 "Speed": 1,
+                # Waits longer than Threshold seconds are played as Cap seconds, 0 is off
+                "Compress_Idle": {
+                    "Threshold": 0,
+                    "Cap": 1,
+                },
                 "Repeat": {
                     "Times": 1,
                     "For": 0,
@@ -53,6 +86,7 @@ class UserSettings:
                 "Mouse_Click": True,
                 "Keyboard": True,
                 "Show_Events_On_Status_Bar": False,
+                "Compress_Text": False,
             },
 
             "Saving": {
@@ -91,13 +125,14 @@ class UserSettings:
                 "Check_update": True,
                 "Fixed_timestamp": 0,
                 "Remind_new_ver_at": 0,
+                "Input_Backend": "pynput",
+                "Profiling": False,
+                "Network_Cache_Hours": 24,
+                # Port of the local control API, 0 is off
+                "Control_Port": 0,
             }
         }
 
-        userSettings_json = dumps(userSettings, indent=4)
-        with open(self.user_setting, "w") as settingFile:
-            settingFile.write(userSettings_json)
-
     def __get_config(self):
         """Get settings of users"""
         with open(self.user_setting, "r") as settingFile:
@@ -105,16 +140,81 @@ class UserSettings:
         return settingFile_json
 
     def update_settings(self):
-        with open(self.user_setting, "w") as settingFile:
-            settingFile.write(dumps(self.settings_dict, indent=4))
+        """Schedule a write of the settings, see SAVE_DELAY"""
+        with self.__lock:
+            self.__dirty = True
+            if self.__save_timer is None:
+                self.__save_timer = Timer(SAVE_DELAY, self.flush)
+                self.__save_timer.daemon = True
+                self.__save_timer.start()
+
+    def flush(self):
+        """Write pending changes now"""
+        with self.__lock:
+            if self.__save_timer is not None:
+                self.__save_timer.cancel()
+                self.__save_timer = None
+            if not self.__dirty:
+                return
+            try:
+                content = dumps(self.settings_dict, indent=4)
+            except RuntimeError:  # Changed by another thread while serializing
+                self.update_settings()
+                return
+            self.__dirty = False
+            try:
+                _write_atomic(self.user_setting, content)
+            except OSError as e:
+                print(f"cannot write settings: {e}")
 
     def reset_settings(self):
         if messagebox.askyesno(self.main_app.text_content["global"]["confirm"], self.main_app.text_content["options_menu"]["others_menu"]["reset_settings_confirmation"]):
-            self.init_settings()
+            with self.__lock:
+                # Replaced in memory too, or a pending write would bring the old settings back
+                self.settings_dict = self.default_settings()
+                self.__dirty = True
+                self.flush()
+            for callback in self.__listeners:
+                callback(None)
+
+    def get(self, category, option=None, option2=None, default=None):
+        """Value of a setting, default when it is missing"""
+        value = self.settings_dict.get(category, default)
+        for key in (option, option2):
+            if key is None:
+                break
+            if not isinstance(value, dict) or key not in value:
+                return default
+            value = value[key]
+        return value
+
+    def get_bool(self, category, option=None, option2=None, default=False):
+        return bool(self.get(category, option, option2, default))
+
+    def get_int(self, category, option=None, option2=None, default=0):
+        try:
+            return int(self.get(category, option, option2, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_float(self, category, option=None, option2=None, default=0.0):
+        try:
+            return float(self.get(category, option, option2, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_str(self, category, option=None, option2=None, default=""):
+        value = self.get(category, option, option2, default)
+        return value if isinstance(value, str) else default
 
     def get_path(self):
         return self.path_setting
 
+    def add_listener(self, callback):
+        """Call callback(category) after each change_settings(), callback(None)
+        after a reset, when every category changed"""
+        self.__listeners.append(callback)
+
     def change_settings(self, category, option=None, option2=None, newValue=None):
         """Change settings of user"""
         if option == "Show_Events_On_Status_Bar":
@@ -124,6 +224,13 @@ class UserSettings:
                 self.main_app.status_text.pack(side=BOTTOM, fill=X)
         if category not in self.settings_dict:
             self.settings_dict[category] = ""
+        with self.__lock:
+            self.__change(category, option, option2, newValue)
+        self.update_settings()
+        for callback in self.__listeners:
+            callback(category)
+
+    def __change(self, category, option, option2, newValue):
         if newValue is None:
             if option is None:
                 self.settings_dict[category] = not self.settings_dict[category]
@@ -139,10 +246,12 @@ class UserSettings:
                 self.settings_dict[category][option] = newValue
         elif option is None and option2 is None:
             self.settings_dict[category] = newValue
-        self.update_settings()
 
     def check_new_options(self):
+        """Add the options missing from settings of older versions, the file is
+        only written when one was added"""
         userSettings = self.settings_dict
+        before = deepcopy(userSettings)
         if "Others" not in userSettings:
             userSettings["Others"] = {"Check_update": True}
         if "Fixed_timestamp" not in userSettings["Others"]:
@@ -165,8 +274,21 @@ class UserSettings:
             userSettings["Playback"]["Repeat"]["Infinite"] = False
         if "Show_Events_On_Status_Bar" not in userSettings["Recordings"]:
             userSettings["Recordings"]["Show_Events_On_Status_Bar"] = False
+        if "Compress_Text" not in userSettings["Recordings"]:
+            userSettings["Recordings"]["Compress_Text"] = False
+        if "Input_Backend" not in userSettings["Others"]:
+            userSettings["Others"]["Input_Backend"] = "pynput"
+        if "Profiling" not in userSettings["Others"]:
+            userSettings["Others"]["Profiling"] = False
+        if "Network_Cache_Hours" not in userSettings["Others"]:
+            userSettings["Others"]["Network_Cache_Hours"] = 24
+        if "Control_Port" not in userSettings["Others"]:
+            userSettings["Others"]["Control_Port"] = 0
+        if "Compress_Idle" not in userSettings["Playback"]:
+            userSettings["Playback"]["Compress_Idle"] = {"Threshold": 0, "Cap": 1}
         if "Loading" not in userSettings:
             userSettings["Loading"] = {}
             if "Always_import_macro_settings" not in userSettings["Loading"]:
                 userSettings["Loading"]["Always_import_macro_settings"] = False
-        self.update_settings()
+        if userSettings != before:
+            self.update_settings()
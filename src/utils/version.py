@@ -1,7 +1,11 @@
+from json import loads
+from os import environ
 from threading import Thread
 
-from requests import get
-from requests.exceptions import RequestException
+# Set to check another server, such as a local test server
+UPDATE_URL_ENV = "PYMACRORECORD_UPDATE_URL"
+RELEASES_URL = 'https://api.github.com/repos/LOUDO56/PyMacroRecord/releases/latest'
+CACHE_NAME = "latest_release"
 
 
 class Version:
@@ -9,12 +13,28 @@ class Version:
         self.main_app = main_app
         self.version = "1.4.3"
         self.new_version = ""
+        self.userSettings = userSettings
+        self.cache = main_app.network_cache
         if userSettings["Others"]["Check_update"]:
             self.update = ""
-            Thread(target=self._check_async, daemon=True).start()
+            # The last answer is shown until the next check ends, none is made while it is fresh
+            body = self.cache.cached(CACHE_NAME)
+            if body is not None:
+                self.update = self.read_release(body)
+            elif not self.cache.should_fetch(CACHE_NAME):
+                self.update = self.main_app.text_content["help_menu"]["about_settings"]["version_check_update_text"]["failed"]
         else:
             self.update = self.main_app.text_content["help_menu"]["about_settings"]["version_check_update_text"]["disabled"]
 
+    def start_check(self):
+        """Check for a new version in the background, when enabled"""
+        if not self.userSettings["Others"]["Check_update"]:
+            return
+        if self.cache.should_fetch(CACHE_NAME):
+            Thread(target=self._check_async, daemon=True).start()
+        else:
+            self.main_app.on_version_checked()
+
     def _check_async(self):
         self.update = self.checkVersion()
         try:
@@ -23,23 +43,22 @@ class Version:
             pass
 
     def checkVersion(self):
-        api_url = 'https://api.github.com/repos/LOUDO56/PyMacroRecord/releases/latest'
+        body = self.cache.fetch(CACHE_NAME, environ.get(UPDATE_URL_ENV) or RELEASES_URL)
+        if body is None:
+            body = self.cache.cached(CACHE_NAME)
+        if body is None:
+            return self.main_app.text_content["help_menu"]["about_settings"]["version_check_update_text"]["failed"]
+        return self.read_release(body)
 
+    def read_release(self, body):
+        """Update text of the answer of the releases API"""
+        vt = self.main_app.text_content["help_menu"]["about_settings"]["version_check_update_text"]
         try:
-            response = get(api_url, timeout=10)
-
-            if response.status_code == 200:
-                release_data = response.json()
-                self.new_version = release_data.get('tag_name', '').replace('v', '')
-                return (
-                    self.main_app.text_content["help_menu"]["about_settings"]["version_check_update_text"]["outdated"]
-                    if self.new_version and self.new_version != self.version
-                    else self.main_app.text_content["help_menu"]["about_settings"]["version_check_update_text"]["up_to_date"]
-                )
-            else:
-                return self.main_app.text_content["help_menu"]["about_settings"]["version_check_update_text"]["failed"]
-        except RequestException:
-            return self.main_app.text_content["help_menu"]["about_settings"]["version_check_update_text"]["failed"]
+            release_data = loads(body)
+        except ValueError:
+            return vt["failed"]
+        self.new_version = release_data.get('tag_name', '').replace('v', '')
+        return vt["outdated"] if self.new_version and self.new_version != self.version else vt["up_to_date"]
 
     def refresh_locale_text(self):
         """Recompute localized update text for current language without rechecking network."""
@@ -1,6 +1,4 @@
-from .help import *
-from .main import *
-from .options import *
-from .others import *
-from .popup import *
-from .window import *
+# Popups are not imported here, the menu bar imports each one the first time it is opened
+from .main import MainApp, MenuBar
+from .popup import Popup
+from .window import Window
@@ -0,0 +1,64 @@
+from tkinter import StringVar, Label, Frame, Button, LEFT, X, messagebox
+from tkinter.ttk import Combobox, Entry
+from windows.popup import Popup
+
+
+class BlockPopup(Popup):
+    """Wrap the selected rows in a loop or move them into a subroutine."""
+
+    def __init__(self, main_app, macro_editor):
+        t = main_app.text_content.get("editor", {})
+        super().__init__(t.get("block_title", "Loop / Subroutine"), 300, 170, main_app)
+
+        self.main_app     = main_app
+        self.macro_editor = macro_editor
+        self.t            = t
+
+        self._kinds = [t.get("block_loop", "Loop"), t.get("block_subroutine", "Subroutine")]
+        self._kind_var = StringVar(value=self._kinds[0])
+        Combobox(self, textvariable=self._kind_var, values=self._kinds,
+                 state="readonly").pack(fill=X, padx=10, pady=(10, 2))
+
+        Label(self, text=t.get("block_value_label", "Times (loop) or name (subroutine)"),
+              anchor="w").pack(fill=X, padx=10, pady=(6, 2))
+        self._value_var = StringVar(value="2")
+        Entry(self, textvariable=self._value_var).pack(fill=X, padx=10)
+
+        btn_frame = Frame(self)
+        btn_frame.pack(fill=X, padx=10, pady=8)
+        confirm_text = main_app.text_content.get("global", {}).get("confirm_button", "Confirm")
+        cancel_text  = main_app.text_content.get("global", {}).get("cancel_button", "Cancel")
+        Button(btn_frame, text=confirm_text, command=self._confirm).pack(side=LEFT, padx=4)
+        Button(btn_frame, text=cancel_text,  command=self.destroy).pack(side=LEFT, padx=4)
+
+    def _confirm(self):
+        selected = self.macro_editor.get_selected_event_range()
+        if selected is None:
+            self.destroy()
+            return
+        start, end = selected
+        data_editor = self.main_app.macro_editor
+        value = self._value_var.get().strip()
+
+        if self._kind_var.get() == self._kinds[0]:
+            try:
+                times = int(value)
+            except ValueError:
+                times = 0
+            if times <= 0:
+                messagebox.showerror(self.t.get("block_title", "Loop / Subroutine"),
+                                     self.t.get("block_error_times", "Times must be a whole number above 0."))
+                return
+            if not data_editor.wrap_in_loop(start, end, times):
+                messagebox.showerror(self.t.get("block_title", "Loop / Subroutine"),
+                                     self.t.get("block_error_loop", "Select whole loops only."))
+                return
+        else:
+            if not value or not data_editor.extract_subroutine(start, end, value):
+                messagebox.showerror(self.t.get("block_title", "Loop / Subroutine"),
+                                     self.t.get("block_error_subroutine",
+                                                "Give a name and select whole loops only."))
+                return
+
+        self.macro_editor.refresh(self.main_app.macro.macro_events)
+        self.destroy()
@@ -1,4 +1,5 @@
-from tkinter import StringVar, Label, Entry, Frame, Button, TOP, LEFT, X, EW
+from tkinter import BooleanVar, StringVar, Label, Entry, Frame, Button, Checkbutton, TOP, LEFT, X, EW
+from macro.macro_editor import set_wait_for
 from windows.popup import Popup
 
 
@@ -30,12 +31,27 @@ class EditEventPopup(Popup):
                 self._build_keyboard(content_frame, ev)
             elif etype == "scrollEvent":
                 self._build_scroll(content_frame, ev)
+            elif etype == "typeText":
+                self._build_type_text(content_frame, ev)
+            elif etype == "waitFor":
+                self._build_wait_for(content_frame, ev)
+            elif etype == "loopStart":
+                self._add_field(content_frame, t.get("times", "times").capitalize(), "times", ev.get("times", 1))
+                self._build_generic(content_frame, ev)
+            elif etype == "callSubroutine":
+                self._add_field(content_frame, t.get("subroutine_name", "Subroutine"), "name", ev.get("name", ""))
+                self._build_generic(content_frame, ev)
             else:
                 self._build_generic(content_frame, ev)
 
         # Comment field always shown
         self._add_field(content_frame, t.get("comment", "Comment"), "comment",
                         events[group["start"] if group["kind"] == "move_group" else group["index"]].get("comment", ""))
+        if group["kind"] == "single":
+            # Not shortened by the Compress_Idle playback setting
+            self._keep_delay = BooleanVar(value=events[group["index"]].get("keep_delay", False))
+            Checkbutton(content_frame, text=t.get("keep_delay", "Keep this delay when compressing idle time"),
+                        variable=self._keep_delay, anchor="w").pack(fill=X, pady=2)
 
         btn_frame = Frame(self)
         btn_frame.pack(side=TOP, fill=X, padx=10, pady=(0, 10))
@@ -80,6 +96,21 @@ class EditEventPopup(Popup):
         self._add_field(parent, "dy", "dy", ev.get("dy", 0))
         self._add_field(parent, t.get("timestamp", "Delay (s)"), "timestamp", ev.get("timestamp", 0))
 
+    def _build_type_text(self, parent, ev):
+        t = self.t
+        self._add_field(parent, t.get("text", "Text"), "text", ev.get("text", ""))
+        self._add_field(parent, t.get("timestamp", "Delay (s)"), "timestamp", ev.get("timestamp", 0))
+
+    def _build_wait_for(self, parent, ev):
+        t = self.t
+        self._add_field(parent, t.get("wait_for_region", "Region x,y,w,h"), "region",
+                        ",".join(str(value) for value in ev.get("region", ())))
+        self._add_field(parent, t.get("wait_for_target", "Colour or image"), "target",
+                        ev.get("image") or ev.get("color", ""))
+        self._add_field(parent, t.get("wait_for_tolerance", "Tolerance"), "tolerance", ev.get("tolerance", 0))
+        self._add_field(parent, t.get("wait_for_timeout", "Timeout (s)"), "timeout", ev.get("timeout", 30))
+        self._add_field(parent, t.get("timestamp", "Delay (s)"), "timestamp", ev.get("timestamp", 0))
+
     def _build_generic(self, parent, ev):
         t = self.t
         self._add_field(parent, t.get("timestamp", "Delay (s)"), "timestamp", ev.get("timestamp", 0))
@@ -120,6 +151,10 @@ class EditEventPopup(Popup):
                     ev["timestamp"] = float(self._fields["timestamp"].get())
                 if "comment" in self._fields:
                     ev["comment"] = self._fields["comment"].get()
+                if self._keep_delay.get():
+                    ev["keep_delay"] = True
+                else:
+                    ev.pop("keep_delay", None)
 
                 if etype in ("leftClickEvent", "rightClickEvent", "middleClickEvent"):
                     ev["x"] = int(float(self._fields["x"].get()))
@@ -127,6 +162,25 @@ class EditEventPopup(Popup):
                 elif etype == "scrollEvent":
                     ev["dx"] = int(float(self._fields["dx"].get()))
                     ev["dy"] = int(float(self._fields["dy"].get()))
+                elif etype == "typeText":
+                    new_text = self._fields["text"].get()
+                    if len(new_text) != len(ev.get("text", "")):
+                        ev.pop("timings", None)  # per-character waits no longer line up
+                    ev["text"] = new_text
+                elif etype == "waitFor":
+                    set_wait_for(ev, self._fields["region"].get(), self._fields["target"].get(),
+                                 self._fields["tolerance"].get(), self._fields["timeout"].get())
+                elif etype == "loopStart":
+                    ev["times"] = max(1, int(float(self._fields["times"].get())))
+                elif etype == "callSubroutine":
+                    subroutines = self.main_app.macro.macro_events.get("subroutines", {})
+                    old_name = ev.get("name")
+                    new_name = self._fields["name"].get().strip()
+                    # A new name renames the subroutine everywhere it is called,
+                    # the name of another subroutine calls that one instead
+                    if not self.main_app.macro_editor.rename_subroutine(old_name, new_name) \
+                            and new_name in subroutines:
+                        ev["name"] = new_name
 
         except (ValueError, KeyError):
             pass
@@ -1,29 +1,56 @@
-from tkinter import StringVar, Label, Frame, Button, LEFT, X
-from tkinter.ttk import Entry
+from tkinter import StringVar, Label, Frame, Button, LEFT, X, messagebox
+from tkinter.ttk import Combobox, Entry
+
+from macro.macro_editor import set_wait_for
 from windows.popup import Popup
 
 
 class InsertDelayPopup(Popup):
     def __init__(self, main_app, macro_editor):
         t = main_app.text_content.get("editor", {})
-        super().__init__(t.get("insert_delay_title", "Insert Delay"), 280, 120, main_app)
+        super().__init__(t.get("insert_delay_title", "Insert Delay"), 300, 260, main_app)
 
         self.main_app    = main_app
         self.macro_editor = macro_editor
         self.t           = t
 
-        Label(self, text=t.get("insert_delay_label", "Delay (seconds):"),
-              anchor="w").pack(fill=X, padx=10, pady=(10, 2))
+        # A fixed delay, or a wait until a colour or an image shows on screen
+        self._kinds = [t.get("insert_kind_delay", "Delay"), t.get("action_wait_for", "Wait For")]
+        self._kind_var = StringVar(value=self._kinds[0])
+        kind_box = Combobox(self, textvariable=self._kind_var, values=self._kinds, state="readonly")
+        kind_box.pack(fill=X, padx=10, pady=(10, 2))
+        kind_box.bind("<<ComboboxSelected>>", lambda e: self._show_kind())
 
+        Label(self, text=t.get("insert_delay_label", "Delay (seconds):"),
+              anchor="w").pack(fill=X, padx=10, pady=(6, 2))
         self._delay_var = StringVar(value="1.0")
         Entry(self, textvariable=self._delay_var).pack(fill=X, padx=10)
 
-        btn_frame = Frame(self)
-        btn_frame.pack(fill=X, padx=10, pady=8)
+        self._wait_frame = Frame(self)
+        self._region_var  = StringVar(value="0,0,100,100")
+        self._target_var  = StringVar(value="#ffffff")
+        self._timeout_var = StringVar(value="30")
+        for label, var in ((t.get("wait_for_region", "Region x,y,w,h"), self._region_var),
+                           (t.get("wait_for_target", "Colour or image"), self._target_var),
+                           (t.get("wait_for_timeout", "Timeout (s)"), self._timeout_var)):
+            Label(self._wait_frame, text=label, anchor="w").pack(fill=X, pady=(4, 0))
+            Entry(self._wait_frame, textvariable=var).pack(fill=X)
+
+        self._btn_frame = Frame(self)
+        self._btn_frame.pack(fill=X, padx=10, pady=8)
         confirm_text = main_app.text_content.get("global", {}).get("confirm_button", "Confirm")
         cancel_text  = main_app.text_content.get("global", {}).get("cancel_button", "Cancel")
-        Button(btn_frame, text=confirm_text, command=self._confirm).pack(side=LEFT, padx=4)
-        Button(btn_frame, text=cancel_text,  command=self.destroy).pack(side=LEFT, padx=4)
+        Button(self._btn_frame, text=confirm_text, command=self._confirm).pack(side=LEFT, padx=4)
+        Button(self._btn_frame, text=cancel_text,  command=self.destroy).pack(side=LEFT, padx=4)
+
+    def _waits_for_screen(self):
+        return self._kind_var.get() == self._kinds[1]
+
+    def _show_kind(self):
+        if self._waits_for_screen():
+            self._wait_frame.pack(fill=X, padx=10, before=self._btn_frame)
+        else:
+            self._wait_frame.pack_forget()
 
     def _confirm(self):
         try:
@@ -34,7 +61,17 @@ class InsertDelayPopup(Popup):
         events = self.main_app.macro.macro_events.get("events", [])
         gi     = self.macro_editor.get_selected_group_index()
 
-        new_event = {"type": "delayEvent", "timestamp": delay}
+        if self._waits_for_screen():
+            new_event = {"type": "waitFor", "timestamp": delay}
+            try:
+                set_wait_for(new_event, self._region_var.get(), self._target_var.get(),
+                             timeout=self._timeout_var.get())
+            except ValueError:
+                messagebox.showerror(self.main_app.text_content.get("global", {}).get("error", "Error"),
+                                     self.t.get("wait_for_error", "Give a region x,y,width,height and a #rrggbb colour or an image path."))
+                return
+        else:
+            new_event = {"type": "delayEvent", "timestamp": delay}
 
         if gi is None:
             # Append at end
@@ -1,6 +1,9 @@
 from tkinter import BOTH, END, VERTICAL, HORIZONTAL, RIGHT, BOTTOM, Y, X
 from tkinter.ttk import Frame, Treeview, Scrollbar
 
+from macro.macro_editor import display_value
+from utils.profiling import profiled
+
 
 def build_groups(events):
     """Group consecutive cursorMove events into single entries."""
@@ -56,13 +59,14 @@ class MacroEditor(Frame):
         t = text_content.get("editor", {})
 
         columns = ("id", "action", "value", "comment")
-        self.tree = Treeview(self, columns=columns, show="headings", selectmode="browse")
+        self.tree = Treeview(self, columns=columns, show="tree headings", selectmode="extended")
 
         self.tree.heading("id", text=t.get("col_id", "ID"))
         self.tree.heading("action", text=t.get("col_action", "Action"))
         self.tree.heading("value", text=t.get("col_value", "Value"))
         self.tree.heading("comment", text=t.get("col_comment", "Comment"))
 
+        self.tree.column("#0", width=40, minwidth=40, stretch=False)
         self.tree.column("id", width=50, minwidth=40, stretch=False)
         self.tree.column("action", width=160, minwidth=100)
         self.tree.column("value", width=300, minwidth=150)
@@ -70,8 +74,10 @@ class MacroEditor(Frame):
 
         self.tree.tag_configure("disabled", foreground="#999999")
         self.tree.tag_configure("playing", background="#c8e6c9")
+        self.tree.tag_configure("block", foreground="#1a4f8b")
         self._event_to_group = {}
         self._playing_iid = None
+        self._collapsed = set()  # id() of the loopStart events whose block is folded
 
         vsb = Scrollbar(self, orient=VERTICAL, command=self.tree.yview)
         hsb = Scrollbar(self, orient=HORIZONTAL, command=self.tree.xview)
@@ -85,9 +91,12 @@ class MacroEditor(Frame):
         self.tree.bind("<ButtonPress-1>", self._on_drag_start)
         self.tree.bind("<B1-Motion>", self._on_drag_motion)
         self.tree.bind("<ButtonRelease-1>", self._on_drag_release)
+        self.tree.bind("<<TreeviewOpen>>", lambda e: self._on_block_toggle(False))
+        self.tree.bind("<<TreeviewClose>>", lambda e: self._on_block_toggle(True))
 
     # ------------------------------------------------------------------ refresh
 
+    @profiled("editor_refresh")
     def refresh(self, macro_events):
         self.tree.delete(*self.tree.get_children())
         self._groups = []
@@ -115,14 +124,25 @@ class MacroEditor(Frame):
             "scrollEvent":     t.get("action_scroll",       "Scroll"),
             "keyboardEvent":   t.get("action_key_press",    "Key Press"),
             "delayEvent":      t.get("action_delay",        "Delay"),
+            "typeText":        t.get("action_type_text",    "Type Text"),
+            "loopStart":       t.get("action_loop",         "Loop"),
+            "loopEnd":         t.get("action_loop_end",     "End Loop"),
+            "callSubroutine":  t.get("action_call",         "Call"),
+            "includeMacro":    t.get("action_include",      "Include"),
+            "waitFor":         t.get("action_wait_for",     "Wait For"),
         }
+        times_label   = t.get("times",        "times")
         steps_label   = t.get("steps",        "steps")
         disabled_tag  = t.get("disabled_tag", "[off]")
         key_press_lbl = t.get("action_key_press",   "Key Press")
         key_rel_lbl   = t.get("action_key_release", "Key Release")
 
+        subroutines = macro_events.get("subroutines", {}) if macro_events else {}
+        open_blocks = []  # iids of the loopStart rows containing the current row
         for gi, group in enumerate(self._groups):
             row_id = gi + 1
+            parent = open_blocks[-1] if open_blocks else ""
+            is_block = False
             is_disabled = _is_group_disabled(events, group)
 
             if group["kind"] == "move_group":
@@ -152,6 +172,31 @@ class MacroEditor(Frame):
                 elif etype == "delayEvent":
                     action = action_map["delayEvent"]
                     value  = f"{ev.get('timestamp', 0):.3f} s"
+                elif etype == "typeText":
+                    action = action_map["typeText"]
+                    value  = repr(ev.get("text", ""))
+                elif etype == "waitFor":
+                    action = action_map["waitFor"]
+                    value  = display_value(ev)
+                elif etype == "loopStart":
+                    action = action_map["loopStart"]
+                    value  = f"{ev.get('times', 1)} {times_label}"
+                    is_block = True
+                elif etype == "loopEnd":
+                    action = action_map["loopEnd"]
+                    value  = ""
+                    is_block = True
+                    if open_blocks:
+                        open_blocks.pop()
+                elif etype == "callSubroutine":
+                    action = action_map["callSubroutine"]
+                    name   = ev.get("name", "")
+                    value  = f"{name}  [{len(subroutines.get(name, []))} {steps_label}]"
+                    is_block = True
+                elif etype == "includeMacro":
+                    action = action_map["includeMacro"]
+                    value  = ev.get("path", "")
+                    is_block = True
                 else:
                     action = etype
                     value  = ""
@@ -159,9 +204,12 @@ class MacroEditor(Frame):
             if is_disabled:
                 action = f"{action}  {disabled_tag}"
 
-            tags = ("disabled",) if is_disabled else ()
-            self.tree.insert("", END, iid=str(gi),
+            tags = ("disabled",) if is_disabled else ("block",) if is_block else ()
+            first_event = events[group["start"] if group["kind"] == "move_group" else group["index"]]
+            self.tree.insert(parent, END, iid=str(gi), open=id(first_event) not in self._collapsed,
                              values=(row_id, action, value, comment), tags=tags)
+            if first_event["type"] == "loopStart":
+                open_blocks.append(str(gi))
 
         # status bar
         n_actions    = len(self._groups)
@@ -177,6 +225,24 @@ class MacroEditor(Frame):
         sel = self.tree.selection()
         return int(sel[0]) if sel else None
 
+    def get_selected_event_range(self):
+        """(first, last) event index covered by the selected rows, or None"""
+        sel = [int(iid) for iid in self.tree.selection()]
+        if not sel:
+            return None
+        first = self._groups[min(sel)]
+        last = self._groups[max(sel)]
+        return (first["start"] if first["kind"] == "move_group" else first["index"],
+                last["end"] if last["kind"] == "move_group" else last["index"])
+
+    def _visual_order(self, parent=""):
+        """All row iids in display order, children right after their block row"""
+        order = []
+        for iid in self.tree.get_children(parent):
+            order.append(iid)
+            order.extend(self._visual_order(iid))
+        return order
+
     # ------------------------------------------------------------------ playback highlight
 
     def highlight_event(self, event_index):
@@ -273,16 +339,16 @@ class MacroEditor(Frame):
         if not self._drag_item:
             return
         target = self.tree.identify_row(event.y)
-        if target and target != self._drag_item:
+        if target and target != self._drag_item and self._drag_item not in self._ancestors(target):
             target_index = self.tree.index(target)
-            self.tree.move(self._drag_item, "", target_index)
+            self.tree.move(self._drag_item, self.tree.parent(target), target_index)
 
     def _on_drag_release(self, event):
         if not self._drag_item:
             return
         from_gi  = int(self._drag_item)
-        children = self.tree.get_children()
-        to_gi    = list(children).index(self._drag_item)
+        children = self._visual_order()
+        to_gi    = children.index(self._drag_item)
         self._drag_item = None
         if from_gi != to_gi:
             # children already in new visual order — rebuild events accordingly
@@ -295,6 +361,27 @@ class MacroEditor(Frame):
         if 0 <= to_gi < len(self._groups):
             self.tree.selection_set(str(to_gi))
 
+    def _on_block_toggle(self, collapsed):
+        iid = self.tree.focus()
+        if not iid:
+            return
+        group = self._groups[int(iid)]
+        if group["kind"] != "single":
+            return
+        event = self.main_app.macro.macro_events.get("events", [])[group["index"]]
+        if collapsed:
+            self._collapsed.add(id(event))
+        else:
+            self._collapsed.discard(id(event))
+
+    def _ancestors(self, iid):
+        ancestors = []
+        parent = self.tree.parent(iid)
+        while parent:
+            ancestors.append(parent)
+            parent = self.tree.parent(parent)
+        return ancestors
+
     # ------------------------------------------------------------------ edit popup
 
     def _on_double_click(self, event):
@@ -1,5 +1,7 @@
 from tkinter import StringVar, Label, Frame, Button, LEFT, X, messagebox
 from tkinter.ttk import Combobox, Entry
+
+from macro.macro_editor import find_replace
 from windows.popup import Popup
 
 
@@ -12,6 +14,8 @@ _TYPE_KEYS = [
     ("action_scroll",       "scrollEvent"),
     ("action_key_press",    "keyboardEvent"),
     ("action_delay",        "delayEvent"),
+    ("action_type_text",    "typeText"),
+    ("action_wait_for",     "waitFor"),
 ]
 
 
@@ -104,46 +108,8 @@ class SearchReplacePopup(Popup):
                     "Delay must be a number.")
                 return
 
-        replaced = 0
-
-        for gi, group in enumerate(groups):
-            # Collect events for this group
-            if group["kind"] == "move_group":
-                ev_indices = list(range(group["start"], group["end"] + 1))
-            else:
-                ev_indices = [group["index"]]
-
-            # Check type filter — use representative event
-            rep = events[ev_indices[0]]
-            if type_filter is not None and rep["type"] != type_filter:
-                continue
-
-            # Check value contains filter (against display value of first event)
-            if find_val:
-                display = self._display_value(rep)
-                if find_val.lower() not in display.lower():
-                    continue
-
-            # Apply replacements
-            matched = False
-            for idx in ev_indices:
-                ev = events[idx]
-
-                if repl_delay is not None:
-                    ev["timestamp"] = repl_delay
-                    matched = True
-
-                if repl_comment:
-                    ev["comment"] = repl_comment
-                    matched = True
-
-                if key_from and key_to and ev.get("type") == "keyboardEvent":
-                    if ev.get("key") == key_from:
-                        ev["key"] = key_to
-                        matched = True
-
-            if matched:
-                replaced += 1
+        replaced = find_replace(events, groups, type_filter, find_val,
+                                repl_comment, repl_delay, key_from, key_to)
 
         self.macro_editor.refresh(self.main_app.macro.macro_events)
         repl_label    = t.get("fr_replaced", "Replaced")
@@ -151,16 +117,3 @@ class SearchReplacePopup(Popup):
         messagebox.showinfo(t.get("find_replace_title", "Find & Replace"),
                             f"{repl_label}: {replaced} {matches_label}")
         self.destroy()
-
-    @staticmethod
-    def _display_value(ev):
-        etype = ev.get("type", "")
-        if etype == "cursorMove":
-            return f"({ev.get('x',0)},{ev.get('y',0)})"
-        if etype in ("leftClickEvent", "rightClickEvent", "middleClickEvent"):
-            return f"({ev.get('x',0)},{ev.get('y',0)})"
-        if etype == "scrollEvent":
-            return f"dx={ev.get('dx',0)}, dy={ev.get('dy',0)}"
-        if etype == "keyboardEvent":
-            return str(ev.get("key", ""))
-        return ""
@@ -1,8 +1,6 @@
-import copy
-import json
 import sys
-from json import load
-from os import path
+from json import dumps
+from os import open as os_open, path
 from sys import argv, platform
 from threading import Thread
 from time import time
@@ -16,34 +14,29 @@ from tkinter import (
     PhotoImage,
     W,
     X,
+    filedialog,
+    messagebox,
 )
 from tkinter.ttk import Button, Frame, Label, Separator
 
-from PIL import Image
-from pystray import Icon, MenuItem
-
 from hotkeys.hotkeys_manager import HotkeysManager
 from macro import Macro
+from macro.macro_editor import find_block_partner
 from utils.get_file import resource_path
-from utils.not_windows import NotWindows
+from utils.language_catalogue import LanguageCatalogue
+from utils.network_cache import NetworkCache
+from utils.macro_file import read_macro_file
+from utils.profiling import configure_profiling
 from utils.record_file_management import RecordFileManagement
+from utils.startup_timeline import mark, print_timeline
 from utils.user_settings import UserSettings
 from utils.version import Version
 from utils.warning_pop_up_save import confirm_save
 from windows.editor.macro_editor import MacroEditor
 from windows.main.menu_bar import MenuBar
-from windows.others.new_ver_avalaible import NewVerAvailable
 from windows.window import Window
 
 
-def deepcopy_dict_missing_entries(dst: dict, src: dict):
-    # recursively copy entries that are in src but not in dst
-    for k, v in src.items():
-        if k not in dst:
-            dst[k] = copy.deepcopy(v)
-        elif isinstance(v, dict):
-            deepcopy_dict_missing_entries(dst[k], v)
-
 class MainApp(Window):
     """Main windows of the application"""
 
@@ -54,9 +47,13 @@ class MainApp(Window):
         if platform == "win32":
             self.iconbitmap(resource_path(path.join("assets", "logo.ico")))
 
+        mark("window")
         self.settings = UserSettings(self)
+        configure_profiling(self.settings.get_bool("Others", "Profiling"), self.settings.get_path())
+        mark("settings")
 
         self.load_language()
+        mark("language")
 
         # For save message purpose
         self.macro_saved = False
@@ -64,9 +61,12 @@ class MainApp(Window):
         self.current_file = None
         self.prevent_record = False
 
+        self.network_cache = NetworkCache(path.join(self.settings.get_path(), "network_cache.json"),
+                                          self.settings.get_float("Others", "Network_Cache_Hours", default=24) * 3600)
         self.version = Version(self.settings.settings_dict, self)
 
         self.menu = MenuBar(self)  # Menu Bar
+        mark("menu bar")
         self.macro = Macro(self)
 
         from macro.macro_editor import MacroEditor as MacroEditorData
@@ -75,6 +75,7 @@ class MainApp(Window):
         self.validate_cmd = self.register(self.validate_input)
 
         self.hotkeyManager = HotkeysManager(self)
+        mark("macro and hotkeys")
 
         self.status_text = Label(self, text='', relief=SUNKEN, anchor=W)
         if self.settings.settings_dict["Recordings"]["Show_Events_On_Status_Bar"]:
@@ -139,15 +140,26 @@ class MainApp(Window):
                                      command=self._toolbar_find_replace, state=DISABLED)
         self.findReplaceBtn.pack(side=LEFT, padx=2)
 
+        self.optimizeBtn = Button(toolbar, text=t_ed.get("toolbar_optimize", "Optimize"),
+                                  command=self._toolbar_optimize, state=DISABLED)
+        self.optimizeBtn.pack(side=LEFT, padx=2)
+
+        self.blockBtn = Button(toolbar, text=t_ed.get("toolbar_block", "Loop / Sub"),
+                               command=self._toolbar_block, state=DISABLED)
+        self.blockBtn.pack(side=LEFT, padx=2)
+
+        self.includeBtn = Button(toolbar, text=t_ed.get("toolbar_include", "Include"),
+                                 command=self._toolbar_include, state=DISABLED)
+        self.includeBtn.pack(side=LEFT, padx=2)
+
         # Macro editor table
         self.editor = MacroEditor(self, self.text_content)
         self.editor.pack(expand=True, fill=BOTH)
+        mark("toolbar and editor")
 
         # Import record if opened with .pmr extension
         if len(argv) > 1:
-            with open(sys.argv[1], 'r') as record:
-                loaded_content = load(record)
-            self.macro.import_record(loaded_content)
+            self.macro.import_record(read_macro_file(sys.argv[1]))
             self.playBtn.configure(state="normal", command=self.macro.start_playback)
             self.macro_recorded = True
             self.macro_saved = True
@@ -162,33 +174,49 @@ class MainApp(Window):
         self.bind('<Control-n>', record_management.new_macro)
 
         self.protocol("WM_DELETE_WINDOW", self.quit_software)
+        self.attributes("-topmost", 0)
+        self.after_idle(self.after_first_frame)
+        mark("main window")
+        self.mainloop()
+
+    def after_first_frame(self):
+        """Start what the first frame does not need: tray icon and update check"""
+        mark("first frame")
         if platform.lower() != "darwin":
             Thread(target=self.systemTray).start()
-
-        self.attributes("-topmost", 0)
+        self.version.start_check()
+        if self.settings.get_int("Others", "Control_Port") > 0:
+            self.start_control_server(self.settings.get_int("Others", "Control_Port"))
+        print_timeline()
 
         if platform != "win32" and self.settings.first_time:
+            from utils.not_windows import NotWindows
             NotWindows(self)
 
-        if self.settings.settings_dict["Others"]["Check_update"]:
-            if self.version.new_version != "" and self.version.version != self.version.new_version:
-                if time() > self.settings.settings_dict["Others"]["Remind_new_ver_at"]:
-                    NewVerAvailable(self, self.version.new_version)
-        self.mainloop()
+    def start_control_server(self, port):
+        """Listen to the control API on 127.0.0.1:port. Its port and token are
+        written to control.json in the settings folder, readable by this user only."""
+        from macro.control_server import AppController, ControlServer
+        try:
+            self.control_server = ControlServer(AppController(self), self.macro.progress, port).start()
+            connection_file = path.join(self.settings.get_path(), "control.json")
+            with open(connection_file, "w", opener=lambda file, flags: os_open(file, flags, 0o600)) as f:
+                f.write(dumps({"port": self.control_server.port, "token": self.control_server.token}))
+        except OSError as e:
+            print(f"cannot start the control server: {e}")
+            return
+        print(f"control server listening on 127.0.0.1:{self.control_server.port}")
 
     def load_language(self):
+        if not hasattr(self, "languages"):
+            self.languages = LanguageCatalogue(path.join(self.settings.get_path(), "langs_cache"))
         self.lang = self.settings.settings_dict["Language"]
-        with open(resource_path(path.join('langs', self.lang + '.json')), encoding='utf-8') as f:
-            self.text_content = json.load(f)
-        self.text_content = self.text_content["content"]
-
-        if self.lang != "en":
-            with open(resource_path(path.join('langs', 'en.json')), encoding='utf-8') as f:
-                en = json.load(f)
-            deepcopy_dict_missing_entries(self.text_content, en["content"])
+        self.text_content = self.languages.texts(self.lang)
 
     def systemTray(self):
         """Just to show little icon on system tray"""
+        from PIL import Image  # Imported here, off the startup path
+        from pystray import Icon, MenuItem
         image = Image.open(resource_path(path.join("assets", "logo.ico")))
         menu = (
             MenuItem('Show', action=self.deiconify, default=True),
@@ -213,7 +241,10 @@ class MainApp(Window):
                 RecordFileManagement(self, self.menu).save_macro()
             elif wantToSave is None:
                 return
-        if platform.lower() != "darwin":
+        self.settings.flush()
+        if getattr(self, "control_server", None) is not None:
+            self.control_server.stop()
+        if platform.lower() != "darwin" and getattr(self, "icon", None) is not None:
             self.icon.stop()
         if platform.lower() == "linux":
             self.destroy()
@@ -233,6 +264,7 @@ class MainApp(Window):
             try:
                 if self.version.new_version != "" and self.version.version != self.version.new_version:
                     if time() > self.settings.settings_dict["Others"]["Remind_new_ver_at"]:
+                        from windows.others.new_ver_avalaible import NewVerAvailable
                         NewVerAvailable(self, self.version.new_version)
             except Exception:
                 pass
@@ -240,7 +272,8 @@ class MainApp(Window):
     def _set_edit_delete_state(self, state):
         for btn in (self.editBtn, self.deleteBtn, self.playFromBtn,
                     self.moveUpBtn, self.moveDownBtn, self.toggleBtn,
-                    self.addDelayBtn, self.findReplaceBtn):
+                    self.addDelayBtn, self.findReplaceBtn, self.optimizeBtn,
+                    self.blockBtn, self.includeBtn):
             btn.configure(state=state)
 
     def _toolbar_edit(self):
@@ -259,7 +292,9 @@ class MainApp(Window):
         if group["kind"] == "move_group":
             del events[group["start"]:group["end"] + 1]
         else:
-            del events[group["index"]]
+            # Removing one end of a loop removes the other one too, the content stays
+            partner = find_block_partner(events, group["index"])
+            self.macro_editor.delete_events([group["index"]] + ([partner] if partner is not None else []))
         self.editor.refresh(self.macro.macro_events)
 
     def _toolbar_play_from_here(self):
@@ -277,6 +312,43 @@ class MainApp(Window):
         from windows.editor.insert_delay_popup import InsertDelayPopup
         InsertDelayPopup(self, self.editor)
 
+    def _toolbar_block(self):
+        from windows.editor.block_popup import BlockPopup
+        BlockPopup(self, self.editor)
+
+    def _toolbar_include(self):
+        file_path = filedialog.askopenfilename(
+            filetypes=[("PyMacroRecord Files", "*.pmr"), ("Json Files", "*.json")],
+        )
+        if not file_path:
+            return
+        try:
+            event = RecordFileManagement(self, self.menu).include_macro_event(file_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror(self.text_content["global"]["error"], str(e))
+            return
+        gi = self.editor.get_selected_group_index()
+        if gi is None:
+            insert_at = len(self.macro.macro_events.get("events", []))
+        else:
+            group = self.editor._groups[gi]
+            insert_at = group["end"] + 1 if group["kind"] == "move_group" else group["index"] + 1
+        self.macro_editor.insert_event(insert_at, event)
+        self.editor.refresh(self.macro.macro_events)
+
     def _toolbar_find_replace(self):
         from windows.editor.search_replace_popup import SearchReplacePopup
         SearchReplacePopup(self, self.editor)
+
+    def _toolbar_optimize(self):
+        t_ed = self.text_content.get("editor", {})
+        report = self.macro_editor.optimize()
+        self.editor.refresh(self.macro.macro_events)
+        lines = [
+            f"{t_ed.get('optimize_pass_' + p['name'], p['name'])}: -{p['events_removed']} "
+            f"({p['time_merged']:.3f} s)"
+            for p in report["passes"]
+        ]
+        lines.append(f"{t_ed.get('optimize_total', 'Total')}: "
+                     f"{report['events_before']} \u2192 {report['events_after']}")
+        messagebox.showinfo(t_ed.get("optimize_title", "Optimize"), "\n".join(lines))
@@ -1,14 +1,9 @@
-from sys import argv
-from tkinter import DISABLED, BooleanVar, Menu
+from sys import argv, platform
+from tkinter import DISABLED, BooleanVar, Menu, StringVar
 from webbrowser import open as OpenUrl
 
+from utils.profiling import configure_profiling
 from utils.record_file_management import RecordFileManagement
-from windows.help.about import About
-from windows.options.playback import Delay, Repeat, Speed, TimeGui
-from windows.options.settings import AfterPlayBack, Hotkeys, SelectLanguage
-from windows.others.donors import Donors
-from windows.others.timestamp import Timestamp
-from windows.others.translators import Translators
 
 
 class MenuBar(Menu):
@@ -37,6 +32,7 @@ class MenuBar(Menu):
         else:
             self.file_menu.add_command(label=self.text_config["file_menu"]["save_text"], accelerator="Ctrl+S", state=DISABLED)
             self.file_menu.add_command(label=self.text_config["file_menu"]["save_as_text"], accelerator="Ctrl+Shift+S", state=DISABLED)
+        self.file_menu.add_command(label=self.text_config["file_menu"]["export_script_text"], command=record_file_management.export_script)
 
         # Options Section
         self.options_menu = Menu(my_menu, tearoff=0)
@@ -45,12 +41,16 @@ class MenuBar(Menu):
         # Playback Sub
         playback_sub = Menu(self.options_menu, tearoff=0)
         self.options_menu.add_cascade(label=self.text_config["options_menu"]["playback_menu"]["playback_text"], menu=playback_sub)
-        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["speed_text"], command=lambda: Speed(self, parent))
-        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["repeat_text"], command=lambda: Repeat(self, parent))
-        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["interval_text"], command=lambda: TimeGui(self, parent, "Interval"))
-        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["for_text"], command=lambda: TimeGui(self, parent, "For"))
-        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["scheduled_text"], command=lambda: TimeGui(self, parent, "Scheduled"))
-        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["delay_text"], command=lambda: Delay(self, parent))
+        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["speed_text"], command=lambda: self.open_speed(parent))
+        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["repeat_text"], command=lambda: self.open_repeat(parent))
+        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["interval_text"], command=lambda: self.open_time_gui(parent, "Interval"))
+        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["for_text"], command=lambda: self.open_time_gui(parent, "For"))
+        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["scheduled_text"], command=lambda: self.open_time_gui(parent, "Scheduled"))
+        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["delay_text"], command=lambda: self.open_delay(parent))
+        playback_sub.add_separator()
+        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["playlist_text"], command=lambda: self.open_playlist(parent))
+        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["schedules_text"], command=lambda: self.open_schedules(parent))
+        playback_sub.add_command(label=self.text_config["options_menu"]["playback_menu"]["timing_text"], command=lambda: self.open_timing_report(parent))
 
         # Recordings Sub
         self.mouseMove = BooleanVar(value=userSettings["Recordings"]["Mouse_Move"])
@@ -71,6 +71,14 @@ class MenuBar(Menu):
             variable=self.showEventsOnStatusBar,
             command=lambda: settings.change_settings("Recordings", "Show_Events_On_Status_Bar"),
         )
+        self.compressText = BooleanVar(value=userSettings["Recordings"]["Compress_Text"])
+        recordings_sub.add_checkbutton(
+            label=self.text_config["options_menu"]["recordings_menu"]["compress_text"],
+            variable=self.compressText,
+            command=lambda: settings.change_settings("Recordings", "Compress_Text"),
+        )
+        recordings_sub.add_command(label=self.text_config["options_menu"]["recordings_menu"]["stats_text"],
+                                   command=lambda: self.open_recording_stats(parent))
 
         # Settings Sub
         self.options_sub = Menu(self.options_menu, tearoff=0)
@@ -79,8 +87,8 @@ class MenuBar(Menu):
         self.options_sub.add_checkbutton(label=self.text_config["options_menu"]["json_compact"], command=lambda: settings.change_settings("Saving", "Compact_json"), variable=self.compactJson)
         self.options_sub.add_checkbutton(label=self.text_config["options_menu"]["settings_menu"]["always_import_macro_settings"], command=lambda: settings.change_settings("Loading", "Always_import_macro_settings"), variable=self.always_import_macro_settings)
         self.options_menu.add_cascade(label=self.text_config["options_menu"]["settings_menu"]["settings_text"], menu=self.options_sub)
-        self.options_sub.add_command(label=self.text_config["options_menu"]["settings_menu"]["hotkeys_text"], command=lambda: Hotkeys(self, parent))
-        self.options_sub.add_command(label=self.text_config["options_menu"]["settings_menu"]["lang_text"], command=lambda: SelectLanguage(self, parent))
+        self.options_sub.add_command(label=self.text_config["options_menu"]["settings_menu"]["hotkeys_text"], command=lambda: self.open_hotkeys(parent))
+        self.options_sub.add_command(label=self.text_config["options_menu"]["settings_menu"]["lang_text"], command=lambda: self.open_select_language(parent))
 
         minimization_sub = Menu(self.options_sub, tearoff=0)
         self.options_sub.add_cascade(label=self.text_config["options_menu"]["settings_menu"]["minimization_text"], menu=minimization_sub)
@@ -92,7 +100,7 @@ class MenuBar(Menu):
                                          command=lambda: settings.change_settings("Minimization", "When_Recording"))
 
         # options_sub.add_checkbutton(label="Run on startup", variable=runStartUp, command=lambda: changeSettings("Run_On_StartUp"))
-        self.options_sub.add_command(label=self.text_config["options_menu"]["settings_menu"]["after_playback_text"], command=lambda: AfterPlayBack(self, parent))
+        self.options_sub.add_command(label=self.text_config["options_menu"]["settings_menu"]["after_playback_text"], command=lambda: self.open_after_playback(parent))
 
         # Others Sub
         self.others_sub = Menu(self.options_menu, tearoff=0)
@@ -100,7 +108,19 @@ class MenuBar(Menu):
         self.Check_update = BooleanVar(value=userSettings["Others"]["Check_update"])
         self.others_sub.add_checkbutton(label=self.text_config["options_menu"]["others_menu"]["check_update_text"], variable=self.Check_update, command=lambda: settings.change_settings("Others", "Check_update"))
         self.others_sub.add_command(label=self.text_config["options_menu"]["others_menu"]["reset_settings_text"], command=settings.reset_settings)
-        self.others_sub.add_command(label=self.text_config["options_menu"]["others_menu"]["fixed_timestamp_text"], command=lambda: Timestamp(self, parent))
+        self.others_sub.add_command(label=self.text_config["options_menu"]["others_menu"]["fixed_timestamp_text"], command=lambda: self.open_timestamp(parent))
+        self.profiling = BooleanVar(value=userSettings["Others"]["Profiling"])
+        self.others_sub.add_checkbutton(label=self.text_config["options_menu"]["others_menu"]["profiling_text"], variable=self.profiling,
+                                        command=lambda: [settings.change_settings("Others", "Profiling"),
+                                                         configure_profiling(self.profiling.get(), settings.get_path())])
+        if "linux" in platform.lower():
+            backend_sub = Menu(self.others_sub, tearoff=0)
+            self.others_sub.add_cascade(label=self.text_config["options_menu"]["others_menu"]["input_backend_text"], menu=backend_sub)
+            self.inputBackend = StringVar(value=userSettings["Others"]["Input_Backend"])
+            for backend in ("pynput", "xlib"):
+                backend_sub.add_radiobutton(label=self.text_config["options_menu"]["others_menu"][f"input_backend_{backend}"],
+                                            variable=self.inputBackend, value=backend,
+                                            command=lambda: parent.macro.set_backend(self.inputBackend.get()))
 
         # Help section
         self.help_section = Menu(my_menu, tearoff=0)
@@ -108,10 +128,72 @@ class MenuBar(Menu):
         self.help_section.add_command(label=self.text_config["help_menu"]["tutorial_text"], command=lambda: OpenUrl("https://github.com/LOUDO56/PyMacroRecord/blob/main/TUTORIAL.md"))
         self.help_section.add_command(label=self.text_config["help_menu"]["website_text"],
                                       command=lambda: OpenUrl("https://www.pymacrorecord.com"))
-        self.help_section.add_command(label=self.text_config["help_menu"]["about_text"], command=lambda: About(self, parent, parent.version.version, parent.version.update))
+        self.help_section.add_command(label=self.text_config["help_menu"]["about_text"], command=lambda: self.open_about(parent))
 
         # Other section
         self.other_section = Menu(my_menu, tearoff=0)
         my_menu.add_cascade(label=self.text_config["others_menu"]["others_text"], menu=self.other_section)
-        self.other_section.add_command(label=self.text_config["others_menu"]["donors_text"], command=lambda: Donors(self, parent))
-        self.other_section.add_command(label=self.text_config["others_menu"]["translators_text"], command=lambda: Translators(self, parent))
+        self.other_section.add_command(label=self.text_config["others_menu"]["donors_text"], command=lambda: self.open_donors(parent))
+        self.other_section.add_command(label=self.text_config["others_menu"]["translators_text"], command=lambda: self.open_translators(parent))
+
+    # Popups are imported the first time they are opened, not with the main window
+
+    def open_speed(self, parent):
+        from windows.options.playback.speed import Speed
+        Speed(self, parent)
+
+    def open_repeat(self, parent):
+        from windows.options.playback.repeat import Repeat
+        Repeat(self, parent)
+
+    def open_time_gui(self, parent, mode):
+        from windows.options.playback.time_gui import TimeGui
+        TimeGui(self, parent, mode)
+
+    def open_delay(self, parent):
+        from windows.options.playback.delay import Delay
+        Delay(self, parent)
+
+    def open_playlist(self, parent):
+        from windows.options.playback.playlist import Playlist
+        Playlist(self, parent)
+
+    def open_schedules(self, parent):
+        from windows.options.playback.schedules import Schedules
+        Schedules(self, parent)
+
+    def open_timing_report(self, parent):
+        from windows.options.playback.timing_report import TimingReport
+        TimingReport(self, parent)
+
+    def open_recording_stats(self, parent):
+        from windows.options.recordings.recording_stats import RecordingStatsPanel
+        RecordingStatsPanel(self, parent)
+
+    def open_hotkeys(self, parent):
+        from windows.options.settings.hotkeys import Hotkeys
+        Hotkeys(self, parent)
+
+    def open_select_language(self, parent):
+        from windows.options.settings.select_language import SelectLanguage
+        SelectLanguage(self, parent)
+
+    def open_after_playback(self, parent):
+        from windows.options.settings.after_playback import AfterPlayBack
+        AfterPlayBack(self, parent)
+
+    def open_timestamp(self, parent):
+        from windows.others.timestamp import Timestamp
+        Timestamp(self, parent)
+
+    def open_about(self, parent):
+        from windows.help.about import About
+        About(self, parent, parent.version.version, parent.version.update)
+
+    def open_donors(self, parent):
+        from windows.others.donors import Donors
+        Donors(self, parent)
+
+    def open_translators(self, parent):
+        from windows.others.translators import Translators
+        Translators(self, parent)
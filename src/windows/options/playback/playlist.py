@@ -0,0 +1,140 @@
+from os import path
+from tkinter import BOTTOM, END, LEFT, TOP, X, filedialog, messagebox
+from tkinter.ttk import Button, Frame, Label, Spinbox, Treeview
+
+from macro.playlist import load_playlist, new_playlist_item, save_playlist
+from windows.popup import Popup
+
+
+class Playlist(Popup):
+    def __init__(self, parent, main_app):
+        self.text = main_app.text_content["options_menu"]["playback_menu"]["playlist_settings"]
+        super().__init__(self.text["title"], 560, 360, parent)
+        main_app.prevent_record = True
+        self.main_app = main_app
+        self.items = main_app.macro.playlist_items
+
+        self.tree = Treeview(self, columns=("file", "repeat", "speed", "result"), show="headings",
+                             selectmode="browse", height=8)
+        self.tree.heading("file", text=self.text["file_text"])
+        self.tree.heading("repeat", text=self.text["repeat_text"])
+        self.tree.heading("speed", text=self.text["speed_text"])
+        self.tree.heading("result", text=self.text["result_text"])
+        self.tree.column("file", width=230)
+        self.tree.column("repeat", width=60)
+        self.tree.column("speed", width=60)
+        self.tree.column("result", width=170)
+        self.tree.pack(side=TOP, fill=X, padx=10, pady=5)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.show_selected())
+
+        itemArea = Frame(self)
+        Label(itemArea, text=self.text["repeat_text"]).pack(side=LEFT, padx=5)
+        self.repeatInput = Spinbox(itemArea, from_=1, to=100000000, width=7, validate="key",
+                                   validatecommand=(main_app.validate_cmd, "%d", "%P"))
+        self.repeatInput.pack(side=LEFT)
+        Label(itemArea, text=self.text["speed_text"]).pack(side=LEFT, padx=5)
+        self.speedInput = Spinbox(itemArea, from_=0.1, to=10, increment=0.1, width=7, validate="key",
+                                  validatecommand=(main_app.validate_cmd, "%d", "%P"))
+        self.speedInput.pack(side=LEFT)
+        Button(itemArea, text=self.text["apply_text"], command=self.apply_to_selected).pack(side=LEFT, padx=10)
+        itemArea.pack(side=TOP, pady=5)
+
+        listArea = Frame(self)
+        Button(listArea, text=self.text["add_text"], command=self.add_items).pack(side=LEFT, padx=3)
+        Button(listArea, text=self.text["remove_text"], command=self.remove_selected).pack(side=LEFT, padx=3)
+        Button(listArea, text="▲", width=3, command=lambda: self.move_selected(-1)).pack(side=LEFT, padx=3)
+        Button(listArea, text="▼", width=3, command=lambda: self.move_selected(1)).pack(side=LEFT, padx=3)
+        Button(listArea, text=self.text["load_text"], command=self.load).pack(side=LEFT, padx=3)
+        Button(listArea, text=self.text["save_text"], command=self.save).pack(side=LEFT, padx=3)
+        listArea.pack(side=TOP, pady=5)
+
+        buttonArea = Frame(self)
+        Button(buttonArea, text=self.text["play_text"], command=self.play).pack(side=LEFT, padx=10)
+        Button(buttonArea, text=main_app.text_content["global"]["close_button"], command=self.destroy).pack(side=LEFT, padx=10)
+        buttonArea.pack(side=BOTTOM, pady=10)
+
+        self.refresh()
+        self.wait_window()
+        main_app.prevent_record = False
+
+    def refresh(self, select=None):
+        results = {result["path"]: result for result in self.main_app.macro.playlist_results}
+        self.tree.delete(*self.tree.get_children())
+        for index, item in enumerate(self.items):
+            result = results.get(item["path"])
+            result_text = ""
+            if result is not None:
+                result_text = result.get("status", "")
+                if "duration" in result:
+                    result_text += f" {result['duration']:.2f}s"
+            self.tree.insert("", END, iid=str(index),
+                             values=(path.basename(item["path"]), item["repeat"], item["speed"], result_text))
+        if select is not None and 0 <= select < len(self.items):
+            self.tree.selection_set(str(select))
+
+    def selected_index(self):
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
+
+    def show_selected(self):
+        index = self.selected_index()
+        if index is None:
+            return
+        for spinbox, key in ((self.repeatInput, "repeat"), (self.speedInput, "speed")):
+            spinbox.delete(0, END)
+            spinbox.insert(0, self.items[index][key])
+
+    def apply_to_selected(self):
+        index = self.selected_index()
+        if index is None:
+            return
+        try:
+            repeat = int(self.repeatInput.get())
+            speed = float(self.speedInput.get())
+        except ValueError:
+            repeat, speed = 0, 0
+        if repeat <= 0 or not 0 < speed <= 10:
+            messagebox.showerror(self.main_app.text_content["global"]["error"], self.text["error_new_value"])
+            return
+        self.items[index]["repeat"] = repeat
+        self.items[index]["speed"] = speed
+        self.refresh(index)
+
+    def add_items(self):
+        files = filedialog.askopenfilenames(
+            filetypes=[("PyMacroRecord Files", "*.pmr"), ("Json Files", "*.json")],
+        )
+        for file_path in files:
+            self.items.append(new_playlist_item(file_path))
+        self.refresh(len(self.items) - 1)
+
+    def remove_selected(self):
+        index = self.selected_index()
+        if index is not None:
+            del self.items[index]
+            self.refresh(min(index, len(self.items) - 1))
+
+    def move_selected(self, offset):
+        index = self.selected_index()
+        if index is None or not 0 <= index + offset < len(self.items):
+            return
+        self.items[index], self.items[index + offset] = self.items[index + offset], self.items[index]
+        self.refresh(index + offset)
+
+    def load(self):
+        file_path = filedialog.askopenfilename(filetypes=[("PyMacroRecord Playlists", "*.pmrl")])
+        if file_path:
+            self.items[:] = load_playlist(file_path)
+            self.refresh()
+
+    def save(self):
+        file_path = filedialog.asksaveasfilename(filetypes=[("PyMacroRecord Playlists", "*.pmrl")],
+                                                 defaultextension=".pmrl")
+        if file_path:
+            save_playlist(file_path, self.items)
+
+    def play(self):
+        if not self.items:
+            return
+        self.destroy()
+        self.main_app.macro.start_playlist([dict(item) for item in self.items])
@@ -0,0 +1,143 @@
+from os import path
+from tkinter import BOTTOM, END, LEFT, TOP, X, filedialog, messagebox
+from tkinter.ttk import Button, Combobox, Entry, Frame, Label, Spinbox, Treeview
+
+from macro.scheduler import MISSED_POLICIES, ScheduleError, new_job, parse_schedule
+from windows.popup import Popup
+
+
+class Schedules(Popup):
+    def __init__(self, parent, main_app):
+        self.text = main_app.text_content["options_menu"]["playback_menu"]["schedules_settings"]
+        super().__init__(self.text["title"], 640, 380, parent)
+        main_app.prevent_record = True
+        self.main_app = main_app
+        self.macro = main_app.macro
+        self.jobs = self.macro.scheduled_jobs
+
+        self.tree = Treeview(self, columns=("file", "schedule", "repeat", "speed", "missed", "next"),
+                             show="headings", selectmode="browse", height=8)
+        for column, width in (("file", 150), ("schedule", 120), ("repeat", 55), ("speed", 55),
+                              ("missed", 80), ("next", 140)):
+            self.tree.heading(column, text=self.text[f"{column}_text"])
+            self.tree.column(column, width=width)
+        self.tree.pack(side=TOP, fill=X, padx=10, pady=5)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.show_selected())
+
+        Label(self, text=self.text["help_text"], font=("Segoe UI", 8)).pack(side=TOP)
+        jobArea = Frame(self)
+        Label(jobArea, text=self.text["schedule_text"]).pack(side=LEFT, padx=5)
+        self.scheduleInput = Entry(jobArea, width=16)
+        self.scheduleInput.pack(side=LEFT)
+        Label(jobArea, text=self.text["repeat_text"]).pack(side=LEFT, padx=5)
+        self.repeatInput = Spinbox(jobArea, from_=1, to=100000000, width=6, validate="key",
+                                   validatecommand=(main_app.validate_cmd, "%d", "%P"))
+        self.repeatInput.pack(side=LEFT)
+        Label(jobArea, text=self.text["speed_text"]).pack(side=LEFT, padx=5)
+        self.speedInput = Spinbox(jobArea, from_=0.1, to=10, increment=0.1, width=5, validate="key",
+                                  validatecommand=(main_app.validate_cmd, "%d", "%P"))
+        self.speedInput.pack(side=LEFT)
+        Label(jobArea, text=self.text["missed_text"]).pack(side=LEFT, padx=5)
+        self.missed_names = {self.text[f"missed_{policy}"]: policy for policy in MISSED_POLICIES}
+        self.missedInput = Combobox(jobArea, values=list(self.missed_names), state="readonly", width=10)
+        self.missedInput.pack(side=LEFT)
+        jobArea.pack(side=TOP, pady=5)
+
+        listArea = Frame(self)
+        Button(listArea, text=self.text["add_text"], command=self.add_job).pack(side=LEFT, padx=3)
+        Button(listArea, text=self.text["apply_text"], command=self.apply_to_selected).pack(side=LEFT, padx=3)
+        Button(listArea, text=self.text["remove_text"], command=self.remove_selected).pack(side=LEFT, padx=3)
+        listArea.pack(side=TOP, pady=5)
+
+        buttonArea = Frame(self)
+        Button(buttonArea, text=main_app.text_content["global"]["close_button"], command=self.destroy).pack(side=LEFT, padx=10)
+        buttonArea.pack(side=BOTTOM, pady=10)
+
+        self.scheduleInput.insert(0, "at 09:00")
+        self.repeatInput.insert(0, 1)
+        self.speedInput.insert(0, 1)
+        self.missedInput.set(self.text["missed_skip"])
+        self.refresh()
+        self.wait_window()
+        main_app.prevent_record = False
+
+    def refresh(self, select=None):
+        next_runs = self.macro.scheduler.next_runs()
+        missed_texts = {policy: name for name, policy in self.missed_names.items()}
+        self.tree.delete(*self.tree.get_children())
+        for index, job in enumerate(self.jobs):
+            next_run = next_runs.get(id(job))
+            self.tree.insert("", END, iid=str(index), values=(
+                path.basename(job["path"]), job["schedule"], job["repeat"], job["speed"],
+                missed_texts.get(job.get("missed", "skip"), ""),
+                next_run.strftime("%Y-%m-%d %H:%M:%S") if next_run else self.text["never_text"],
+            ))
+        if select is not None and 0 <= select < len(self.jobs):
+            self.tree.selection_set(str(select))
+
+    def selected_index(self):
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
+
+    def show_selected(self):
+        index = self.selected_index()
+        if index is None:
+            return
+        job = self.jobs[index]
+        for widget, value in ((self.scheduleInput, job["schedule"]), (self.repeatInput, job["repeat"]),
+                              (self.speedInput, job["speed"])):
+            widget.delete(0, END)
+            widget.insert(0, value)
+        self.missedInput.set(next(name for name, policy in self.missed_names.items()
+                                  if policy == job.get("missed", "skip")))
+
+    def read_inputs(self):
+        """(schedule, repeat, speed, missed policy) of the inputs, None after showing an error"""
+        schedule = self.scheduleInput.get().strip()
+        try:
+            parse_schedule(schedule)
+            repeat = int(self.repeatInput.get())
+            speed = float(self.speedInput.get())
+        except ScheduleError as e:
+            messagebox.showerror(self.main_app.text_content["global"]["error"], f"{self.text['error_schedule']}\n{e}")
+            return None
+        except ValueError:
+            repeat, speed = 0, 0
+        if repeat <= 0 or not 0 < speed <= 10:
+            messagebox.showerror(self.main_app.text_content["global"]["error"], self.text["error_new_value"])
+            return None
+        return schedule, repeat, speed, self.missed_names.get(self.missedInput.get(), "skip")
+
+    def save(self, select=None):
+        self.macro.set_scheduled_jobs(self.jobs)
+        self.refresh(select)
+
+    def add_job(self):
+        inputs = self.read_inputs()
+        if inputs is None:
+            return
+        file_path = filedialog.askopenfilename(
+            filetypes=[("PyMacroRecord Files", "*.pmr"), ("Json Files", "*.json")],
+        )
+        if not file_path:
+            return
+        schedule, repeat, speed, missed = inputs
+        self.jobs.append(new_job(file_path, schedule, repeat, speed, missed))
+        self.save(len(self.jobs) - 1)
+
+    def apply_to_selected(self):
+        index = self.selected_index()
+        inputs = self.read_inputs() if index is not None else None
+        if inputs is None:
+            return
+        job = self.jobs[index]
+        if job["schedule"] != inputs[0]:
+            job["last_run"] = None  # Counted again from now
+        job["schedule"], job["repeat"], job["speed"], job["missed"] = inputs
+        self.save(index)
+
+    def remove_selected(self):
+        index = self.selected_index()
+        if index is not None:
+            del self.jobs[index]
+            self.save(min(index, len(self.jobs) - 1))
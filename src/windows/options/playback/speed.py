@@ -1,20 +1,51 @@
-from tkinter import BOTTOM, LEFT, TOP, messagebox
+from tkinter import BOTTOM, LEFT, TOP, StringVar, messagebox
 from tkinter.ttk import Button, Frame, Label, Spinbox
 
 from windows.popup import Popup
 
 
+def format_duration(seconds):
+    minutes, seconds = divmod(round(seconds, 1), 60)
+    hours, minutes = divmod(int(minutes), 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:04.1f}"
+    return f"{minutes}:{seconds:04.1f}"
+
+
 class Speed(Popup):
     def __init__(self, parent, main_app):
-        super().__init__(main_app.text_content["options_menu"]["playback_menu"]["speed_settings"]["title"], 300, 150, parent)
+        self.text = main_app.text_content["options_menu"]["playback_menu"]["speed_settings"]
+        super().__init__(self.text["title"], 340, 300, parent)
         main_app.prevent_record = True
         self.settings = main_app.settings
-        Label(self, text=main_app.text_content["options_menu"]["playback_menu"]["speed_settings"]["sub_text"], font=('Segoe UI', 10)).pack(side=TOP, pady=10)
+        self.macro = main_app.macro
+        Label(self, text=self.text["sub_text"], font=('Segoe UI', 10)).pack(side=TOP, pady=10)
         userSettings = main_app.settings.settings_dict
-        setNewSpeedInput = Spinbox(self, from_=0.1, to=10, width=7, validate="key",
+        self.speedVar = StringVar(value=str(userSettings["Playback"]["Speed"]))
+        setNewSpeedInput = Spinbox(self, from_=0.1, to=10, width=7, textvariable=self.speedVar, validate="key",
                               validatecommand=(main_app.validate_cmd, "%d", "%P"))
-        setNewSpeedInput.insert(0, str(userSettings["Playback"]["Speed"]))
-        setNewSpeedInput.pack(pady=20)
+        setNewSpeedInput.pack(pady=10)
+
+        # Idle gaps longer than the threshold are played with the cap length
+        Label(self, text=self.text["compress_idle_text"], font=('Segoe UI', 9)).pack(side=TOP)
+        idleArea = Frame(self)
+        self.thresholdVar = StringVar(value=str(self.settings.get_float("Playback", "Compress_Idle", "Threshold")))
+        self.capVar = StringVar(value=str(self.settings.get_float("Playback", "Compress_Idle", "Cap", default=1)))
+        Label(idleArea, text=self.text["threshold_text"]).pack(side=LEFT, padx=5)
+        Spinbox(idleArea, from_=0, to=3600, increment=0.5, width=6, textvariable=self.thresholdVar, validate="key",
+                validatecommand=(main_app.validate_cmd, "%d", "%P")).pack(side=LEFT)
+        Label(idleArea, text=self.text["cap_text"]).pack(side=LEFT, padx=5)
+        Spinbox(idleArea, from_=0, to=3600, increment=0.1, width=6, textvariable=self.capVar, validate="key",
+                validatecommand=(main_app.validate_cmd, "%d", "%P")).pack(side=LEFT)
+        idleArea.pack(side=TOP, pady=5)
+
+        self.recorded = self.macro.estimate_duration(1) if self.macro.macro_events.get("events") else None
+        self.durationLabel = Label(self, font=('Segoe UI', 9))
+        self.durationLabel.pack(side=TOP, pady=5)
+        for var in (self.speedVar, self.thresholdVar, self.capVar):
+            var.trace_add("write", lambda *args: self.preview())
+        self.preview()
+
         buttonArea = Frame(self)
         Button(buttonArea, text=main_app.text_content["global"]["confirm_button"], command=lambda: self.setNewSpeedNumber(setNewSpeedInput.get(), main_app)).pack(side=LEFT,
                                                                                                            padx=10)
@@ -23,10 +54,37 @@ class Speed(Popup):
         self.wait_window()
         main_app.prevent_record = False
 
+    def read_idle_gap(self):
+        """(threshold, cap) of the inputs, raises ValueError when they are not numbers"""
+        threshold, cap = float(self.thresholdVar.get() or 0), float(self.capVar.get() or 0)
+        if threshold < 0 or cap < 0:
+            raise ValueError
+        return threshold, cap
+
+    def preview(self):
+        """Show how long one repeat of the current macro lasts as recorded and with these settings"""
+        try:
+            speed = float(self.speedVar.get())
+            threshold, cap = self.read_idle_gap()
+        except ValueError:
+            speed = 0
+        if self.recorded is None or speed <= 0:
+            self.durationLabel.configure(text="")
+            return
+        played = self.macro.estimate_duration(speed, self.macro.idle_gap(threshold, cap))
+        self.durationLabel.configure(text=self.text["duration_text"].format(
+            recorded=format_duration(self.recorded), played=format_duration(played)))
+
     def setNewSpeedNumber(self, val, main_app):
         """Function to set the new Speed numbers and to check if the value is good"""
-        if float(val) <= 0 or float(val) > 10:
-            messagebox.showerror(main_app.text_content["global"]["error"], main_app.text_content["options_menu"]["playback_menu"]["speed_settings"]["error_new_value"])
+        try:
+            threshold, cap = self.read_idle_gap()
+        except ValueError:
+            threshold = cap = -1
+        if float(val) <= 0 or float(val) > 10 or threshold < 0:
+            messagebox.showerror(main_app.text_content["global"]["error"], self.text["error_new_value"])
         else:
             self.settings.change_settings("Playback", "Speed", None, float(val))
+            # The whole dict is written, Playback settings from older versions have no Compress_Idle key
+            self.settings.change_settings("Playback", "Compress_Idle", None, {"Threshold": threshold, "Cap": cap})
             self.destroy()
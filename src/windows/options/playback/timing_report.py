@@ -0,0 +1,43 @@
+from tkinter import BOTTOM, LEFT, TOP, filedialog
+from tkinter.ttk import Button, Frame, Label
+
+from macro.telemetry import export_timing_csv, export_timing_json, format_histogram
+from windows.popup import Popup
+
+
+class TimingReport(Popup):
+    def __init__(self, parent, main_app):
+        text = main_app.text_content["options_menu"]["playback_menu"]["timing_settings"]
+        super().__init__(text["title"], 460, 380, parent)
+        main_app.prevent_record = True
+        macro = main_app.macro
+        report = macro.last_timing_report
+        if report is None:
+            Label(self, text=text["no_playback"], font=("Segoe UI", 10)).pack(side=TOP, pady=20)
+        else:
+            Label(self, text=text["sub_text"].format(samples=report["samples"], duration=report["duration"]),
+                  font=("Segoe UI", 10)).pack(side=TOP, pady=5)
+            Label(self, text=f"{text['mean']}: {report['mean_ms']} ms    p50: {report['p50_ms']} ms    "
+                             f"p99: {report['p99_ms']} ms    {text['max']}: {report['max_ms']} ms").pack(side=TOP, pady=5)
+            Label(self, text=format_histogram(report), font=("Courier", 9)).pack(side=TOP, pady=5)
+            drift = report["drift"]
+            Label(self, text=f"{text['drift']}: {drift[0][1]} ms -> {drift[-1][1]} ms").pack(side=TOP, pady=5)
+
+        buttonArea = Frame(self)
+        if report is not None:
+            Button(buttonArea, text=text["export_csv"],
+                   command=lambda: self.export(lambda file: export_timing_csv(macro.last_timing, file), ".csv")
+                   ).pack(side=LEFT, padx=10)
+            Button(buttonArea, text=text["export_json"],
+                   command=lambda: self.export(lambda file: export_timing_json(report, file), ".json")
+                   ).pack(side=LEFT, padx=10)
+        Button(buttonArea, text=main_app.text_content["global"]["close_button"], command=self.destroy).pack(side=LEFT, padx=10)
+        buttonArea.pack(side=BOTTOM, pady=10)
+        self.wait_window()
+        main_app.prevent_record = False
+
+    def export(self, write, extension):
+        file_path = filedialog.asksaveasfilename(filetypes=[(extension[1:].upper(), f"*{extension}")],
+                                                 defaultextension=extension)
+        if file_path:
+            write(file_path)
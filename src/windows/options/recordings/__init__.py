@@ -0,0 +1 @@
+from .recording_stats import RecordingStatsPanel
@@ -0,0 +1,46 @@
+from tkinter import BOTTOM, LEFT, TOP
+from tkinter.ttk import Button, Frame, Label
+
+from windows.popup import Popup
+
+
+class RecordingStatsPanel(Popup):
+    """Capture statistics of the running recording, or of the current macro"""
+
+    def __init__(self, parent, main_app):
+        self.text = main_app.text_content["options_menu"]["recordings_menu"]["stats_settings"]
+        super().__init__(self.text["title"], 420, 330, parent)
+        self.main_app = main_app
+        self.statsLabel = Label(self, font=("Courier", 9), justify=LEFT)
+        self.statsLabel.pack(side=TOP, pady=10, padx=10)
+        buttonArea = Frame(self)
+        Button(buttonArea, text=main_app.text_content["global"]["close_button"], command=self.destroy).pack(side=LEFT, padx=10)
+        buttonArea.pack(side=BOTTOM, pady=10)
+        self.refresh()
+        self.wait_window()
+
+    def refresh(self):
+        macro = self.main_app.macro
+        if macro.record:
+            stats = macro.recording_stats.to_dict()
+        else:
+            stats = macro.macro_events.get("metadata", {}).get("recording")
+        self.statsLabel.configure(text=self.format(stats) if stats else self.text["no_stats"])
+        if macro.record:
+            # Updated live while recording
+            self.after(500, lambda: self.winfo_exists() and self.refresh())
+
+    def format(self, stats):
+        lines = [
+            f"{self.text['events']}: {stats['events']} ({self.text['dropped']}: {stats['dropped']})",
+            f"{self.text['rate']}: {stats['rate_per_s']}/s, {self.text['peak']} {stats['peak_rate_per_s']}/s",
+            f"{self.text['callback']}: {stats['callback_mean_us']} us, max {stats['callback_max_us']} us",
+            f"{self.text['status_bar']}: {stats['status_bar_updates']} x {stats['status_bar_mean_us']} us",
+            "",
+        ]
+        histogram = stats["callback_histogram"]
+        counts = histogram["counts"]
+        labels = [f"<= {bound} us" for bound in histogram["bounds_us"]] + [f"> {histogram['bounds_us'][-1]} us"]
+        most = max(counts) or 1
+        lines += [f"{label:>11} {'#' * round(count * 25 / most):<25} {count}" for label, count in zip(labels, counts)]
+        return "\n".join(lines)
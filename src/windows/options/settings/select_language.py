@@ -1,5 +1,3 @@
-import json
-import os
 from tkinter import (
     BOTTOM,
     LEFT,
@@ -7,7 +5,6 @@ from tkinter import (
 )
 from tkinter.ttk import Button, Frame, LabelFrame, OptionMenu
 
-from utils.get_file import resource_path
 from windows.popup import Popup
 
 
@@ -16,14 +13,8 @@ class SelectLanguage(Popup):
         super().__init__(main_app.text_content["options_menu"]["settings_menu"]["lang_settings"]["title"], 250, 150, parent)
         main_app.prevent_record = True
         self.settings = main_app.settings
-        self.options = {}
-        short_to_long_lang = {}
-        for lang in os.listdir(resource_path('langs')):
-            file_lang = os.path.join(resource_path('langs'), lang)
-            with open(file_lang, encoding='UTF-8') as f:
-                content = json.load(f)
-                self.options[content["information"]["lang_long"]] = content["information"]["lang_short"]
-                short_to_long_lang[content["information"]["lang_short"]] = content["information"]["lang_long"]
+        short_to_long_lang = main_app.languages.languages()
+        self.options = {long: short for short, long in short_to_long_lang.items()}
 
         self.menuOptions = LabelFrame(self, text=main_app.text_content["options_menu"]["settings_menu"]["lang_settings"]["sub_text"])
         SelectLanguageVar = StringVar()
@@ -1,4 +1,5 @@
 from sys import platform
+from os import environ
 from threading import Thread
 from tkinter import BOTTOM, LEFT, TOP
 from tkinter import TclError
@@ -6,8 +7,6 @@ from tkinter.font import Font
 from tkinter.ttk import Button, Frame, Label, Style
 from webbrowser import open_new
 
-from requests import RequestException, get
-
 from windows.popup import Popup
 
 
@@ -37,6 +36,11 @@ class HyperlinkLabel(Label):
             self.bind("<Button-1>", lambda e: command() if command else open_new(url))
 
 
+# Set to get the donors from another server, such as a local test server
+DONORS_URL_ENV = "PYMACRORECORD_DONORS_URL"
+DONORS_URL = 'https://pymacrorecord.com/donors.txt'
+
+
 class Donors(Popup):
     def __init__(self, parent, main_app):
         width = 330
@@ -62,7 +66,11 @@ class Donors(Popup):
         Button(self, text=main_app.text_content["global"]["close_button"], command=self.destroy).pack(side=BOTTOM, pady=5)
         self.donorsArea.pack(side=TOP)
         Label(self.donorsArea, text=main_app.text_content["others_menu"]["donors_settings"]["load_donors"]).pack(side=TOP, pady=2)
-        Thread(target=self._fetch_donors, daemon=True).start()
+        if main_app.network_cache.should_fetch("donors"):
+            Thread(target=self._fetch_donors, daemon=True).start()
+        else:
+            self._set_donors(main_app.network_cache.cached("donors"))
+            self.after(0, self._on_donors_ready)
         self.wait_window()
         parent.prevent_record = False
 
@@ -93,17 +101,15 @@ class Donors(Popup):
         self.pageArea.pack(side=BOTTOM)
 
     def _fetch_donors(self):
-        donors_link = 'https://pymacrorecord.com/donors.txt'
-        try:
-            response = get(donors_link, timeout=10)
-            text = response.text if response is not None else ""
-            lst = [s.strip() for s in text.split(';') if s.strip()]
-            lst.reverse()
-            self.donors_list = lst
-        except RequestException:
-            self.donors_list = []
-        finally:
-            self.after(0, self._on_donors_ready)
+        cache = self._main_app.network_cache
+        text = cache.fetch("donors", environ.get(DONORS_URL_ENV) or DONORS_URL)
+        self._set_donors(text if text is not None else cache.cached("donors"))
+        self.after(0, self._on_donors_ready)
+
+    def _set_donors(self, text):
+        lst = [s.strip() for s in (text or "").split(';') if s.strip()]
+        lst.reverse()
+        self.donors_list = lst
 
     def _on_donors_ready(self):
         try:
@@ -4,7 +4,6 @@ from tkinter import BOTTOM, LEFT, TOP
 from tkinter.ttk import Button, Frame, Label
 from webbrowser import open as OpenUrl
 
-from utils.user_settings import UserSettings
 from windows.popup import Popup
 
 
@@ -29,11 +28,9 @@ class NewVerAvailable(Popup):
         self.main_app.prevent_record = False
 
     def remind_later(self):
-        user_settings = UserSettings(self.main_app)
-        user_settings.change_settings("Others", "Remind_new_ver_at", None, time() + 432000)  # Add 5 days
+        self.main_app.settings.change_settings("Others", "Remind_new_ver_at", None, time() + 432000)  # Add 5 days
         self.destroy()
 
     def ignore_new_ver(self):
-        user_settings = UserSettings(self.main_app)
-        user_settings.change_settings("Others", "Remind_new_ver_at", None, time() + 5259600)  # Add 2 months
+        self.main_app.settings.change_settings("Others", "Remind_new_ver_at", None, time() + 5259600)  # Add 2 months
         self.destroy()
@@ -0,0 +1,29 @@
+import sys
+from os import environ, path
+from shutil import which
+
+import pytest
+
+sys.path.insert(0, path.join(path.dirname(path.dirname(path.abspath(__file__))), "src"))
+
+
+@pytest.fixture(scope="session")
+def xvfb_display():
+    """Display name of an Xvfb server shared by the session, set as DISPLAY.
+    Tests using it are skipped where Xvfb is not installed."""
+    from macro.parallel import start_xvfb
+
+    if which("Xvfb") is None:
+        pytest.skip("Xvfb is not installed")
+    number = next(number for number in range(90, 200) if not path.exists(f"/tmp/.X{number}-lock"))
+    display = f":{number}"
+    server = start_xvfb(display)
+    previous = environ.get("DISPLAY")
+    environ["DISPLAY"] = display
+    yield display
+    if previous is None:
+        environ.pop("DISPLAY", None)
+    else:
+        environ["DISPLAY"] = previous
+    server.terminate()
+    server.wait()
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+from backends.memory_backend import MemoryBackend
+from macro.macro_editor import MacroEditor
+from macro.playback_plan import compile_plan
+from macro.player import Player
+
+
+def key_press(name):
+    return {"type": "keyboardEvent", "key": name, "pressed": True, "timestamp": 0}
+
+
+def editor(macro_events):
+    return MacroEditor(SimpleNamespace(macro_events=macro_events, main_app=SimpleNamespace(macro_saved=True)))
+
+
+def pressed_keys(macro_events):
+    backend = MemoryBackend()
+    player = Player(backend)
+    player.playing = True
+    player.run(compile_plan(macro_events, backend.special_keys))
+    return [entry[2] for entry in backend.log if entry[1] == "key" and entry[3]]
+
+
+def test_wrap_in_loop():
+    macro_events = {"events": [key_press("a"), key_press("b"), key_press("c")]}
+    assert editor(macro_events).wrap_in_loop(1, 1, 3)
+    assert pressed_keys(macro_events) == ["a", "b", "b", "b", "c"]
+
+
+def test_wrap_in_loop_refuses_part_of_a_loop():
+    events = [{"type": "loopStart", "times": 2, "timestamp": 0}, key_press("a"), {"type": "loopEnd", "timestamp": 0},
+              key_press("b")]
+    macro_events = {"events": list(events)}
+    data_editor = editor(macro_events)
+    assert not data_editor.wrap_in_loop(2, 3, 3)
+    assert not data_editor.wrap_in_loop(0, 1, 3)
+    assert macro_events["events"] == events
+    assert data_editor.wrap_in_loop(0, 3, 3)
+    assert pressed_keys(macro_events) == ["a", "a", "b"] * 3
+
+
+def test_rename_subroutine_renames_nested_calls():
+    macro_events = {"events": [{"type": "callSubroutine", "name": "outer", "timestamp": 0}],
+                    "subroutines": {"outer": [{"type": "callSubroutine", "name": "inner", "timestamp": 0},
+                                              key_press("b")],
+                                    "inner": [key_press("a")]}}
+    data_editor = editor(macro_events)
+    assert data_editor.rename_subroutine("inner", "typing")
+    assert set(macro_events["subroutines"]) == {"outer", "typing"}
+    assert pressed_keys(macro_events) == ["a", "b"]
+
+
+def test_rename_subroutine_needs_an_existing_name():
+    macro_events = {"events": [], "subroutines": {"a": [], "b": []}}
+    data_editor = editor(macro_events)
+    assert not data_editor.rename_subroutine("missing", "c")
+    assert not data_editor.rename_subroutine("a", "b")
+    assert set(macro_events["subroutines"]) == {"a", "b"}
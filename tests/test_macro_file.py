@@ -0,0 +1,33 @@
+from json import dumps
+
+from backends.memory_backend import MemoryBackend
+from macro.playback_plan import compile_plan
+from utils.macro_file import rebase_includes
+
+
+def test_rebase_includes_for_save_as(tmp_path):
+    (tmp_path / "old" / "parts").mkdir(parents=True)
+    (tmp_path / "new" / "deeper").mkdir(parents=True)
+    (tmp_path / "old" / "parts" / "login.pmr").write_text(dumps({"events": [
+        {"type": "keyboardEvent", "key": "a", "pressed": True, "timestamp": 0}]}))
+    absolute = str(tmp_path / "old" / "parts" / "login.pmr")
+    macro_events = {"events": [{"type": "includeMacro", "path": "parts/login.pmr", "timestamp": 0},
+                               {"type": "includeMacro", "path": absolute, "timestamp": 0},
+                               {"type": "callSubroutine", "name": "again", "timestamp": 0}],
+                    "subroutines": {"again": [{"type": "includeMacro", "path": "parts/login.pmr", "timestamp": 0}]}}
+    new_dir = str(tmp_path / "new" / "deeper")
+    rebase_includes(macro_events, str(tmp_path / "old"), new_dir)
+    assert macro_events["events"][0]["path"].replace("\\", "/") == "../../old/parts/login.pmr"
+    assert macro_events["events"][1]["path"] == absolute
+    assert macro_events["subroutines"]["again"][0]["path"] == macro_events["events"][0]["path"]
+    assert len(compile_plan(macro_events, MemoryBackend.special_keys, new_dir)) > 0
+
+
+def test_changed_include_is_reported(tmp_path):
+    include = tmp_path / "login.pmr"
+    include.write_text(dumps({"events": []}))
+    macro_events = {"events": [{"type": "includeMacro", "path": "login.pmr", "sha256": "0" * 64, "timestamp": 0}]}
+    plan = compile_plan(macro_events, MemoryBackend.special_keys, str(tmp_path))
+    assert [(event, path) for event, path, _ in plan.changed_includes] == [(macro_events["events"][0], str(include))]
+    macro_events["events"][0]["sha256"] = plan.changed_includes[0][2]
+    assert compile_plan(macro_events, MemoryBackend.special_keys, str(tmp_path)).changed_includes == []
@@ -0,0 +1,111 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+from threading import Event, Thread
+from types import SimpleNamespace
+
+import pytest
+
+import utils.network_cache as network_cache
+from utils.network_cache import BACKOFF_START, NetworkCache
+from utils.version import CACHE_NAME, UPDATE_URL_ENV, Version
+
+TTL = 3600
+UPDATE_TEXTS = {"failed": "failed", "outdated": "outdated", "up_to_date": "up to date", "disabled": "disabled"}
+
+
+class ReleasesServer(ThreadingHTTPServer):
+    """Local stand-in of the releases API, counting the requests it gets"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _ReleasesHandler)
+        self.requests = 0
+        self.status = 200
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/releases/latest"
+
+
+class _ReleasesHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests += 1
+        body = dumps({"tag_name": "v9.9.9"}).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ReleasesServer()
+    Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv(UPDATE_URL_ENV, server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Time of the cache, moved forward by the tests"""
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(network_cache, "time", lambda: clock.now)
+    return clock
+
+
+def check_update(cache):
+    """Run the update check of the application start, returns its Version once done"""
+    checked = Event()
+    main_app = SimpleNamespace(network_cache=cache, on_version_checked=checked.set, after=lambda ms, function: function(),
+                               text_content={"help_menu": {"about_settings": {"version_check_update_text": UPDATE_TEXTS}}})
+    version = Version({"Others": {"Check_update": True}}, main_app)
+    version.start_check()
+    assert checked.wait(5)
+    return version
+
+
+def cache_with_release(tmp_path, fetched_at):
+    file_path = tmp_path / "network_cache.json"
+    file_path.write_text(dumps({CACHE_NAME: {"body": dumps({"tag_name": "v1.4.3"}), "fetched_at": fetched_at}}))
+    return NetworkCache(str(file_path), TTL)
+
+
+def test_fresh_cache_sends_no_request(tmp_path, server, clock):
+    version = check_update(cache_with_release(tmp_path, clock.now - TTL + 60))
+    assert server.requests == 0
+    assert version.update == "up to date"
+
+
+def test_stale_cache_sends_one_request(tmp_path, server, clock):
+    cache = cache_with_release(tmp_path, clock.now - TTL - 60)
+    version = check_update(cache)
+    assert server.requests == 1
+    assert version.update == "outdated"
+    # Fresh again, read from the file by the next start
+    check_update(NetworkCache(cache.file_path, TTL))
+    assert server.requests == 1
+
+
+def test_failures_back_off_exponentially(tmp_path, server, clock):
+    server.status = 500
+    cache = NetworkCache(str(tmp_path / "network_cache.json"), TTL)
+    waits = []
+    for failures in range(1, 5):
+        assert check_update(cache).update == "failed"
+        assert server.requests == failures
+        retry_in = cache._entries[CACHE_NAME]["retry_at"] - clock.now
+        waits.append(retry_in)
+        # No request until the wait is over
+        clock.now += retry_in - 1
+        check_update(cache)
+        assert server.requests == failures
+        clock.now += 1
+    assert waits == [BACKOFF_START, 2 * BACKOFF_START, 4 * BACKOFF_START, 8 * BACKOFF_START]
+
+    server.status = 200
+    assert check_update(cache).update == "outdated"
+    assert cache._entries[CACHE_NAME]["failures"] == 0
@@ -0,0 +1,110 @@
+import pytest
+
+from macro.macro_editor import (
+    OPTIMIZER_PASSES,
+    optimize_events,
+    pass_coalesce_scrolls,
+    pass_merge_delays,
+    pass_text_bursts,
+    playback_signature,
+)
+
+
+def move(x, y, timestamp=0.01, **fields):
+    return {"type": "cursorMove", "x": x, "y": y, "timestamp": timestamp, **fields}
+
+
+def click(x, y, pressed, timestamp=0.05):
+    return {"type": "leftClickEvent", "x": x, "y": y, "pressed": pressed, "timestamp": timestamp}
+
+
+def key(name, pressed, timestamp=0.08, **fields):
+    return {"type": "keyboardEvent", "key": name, "pressed": pressed, "timestamp": timestamp, **fields}
+
+
+def delay(timestamp, **fields):
+    return {"type": "delayEvent", "timestamp": timestamp, **fields}
+
+
+def scroll(dy, timestamp=0.01, dx=0):
+    return {"type": "scrollEvent", "dx": dx, "dy": dy, "timestamp": timestamp}
+
+
+def typed(text, gap=0.09, hold=0.04):
+    events = []
+    for char in text:
+        name = "Key.space" if char == " " else char
+        events += [key(name, True, gap), key(name, False, hold)]
+    return events
+
+
+def assert_same_playback(before, after):
+    """Same final cursor, same ordered presses and releases, same net scroll and total time"""
+    expected, played = playback_signature(before), playback_signature(after)
+    assert played["cursor"] == expected["cursor"]
+    assert played["inputs"] == expected["inputs"]
+    assert played["scroll"] == expected["scroll"]
+    assert played["duration"] == pytest.approx(expected["duration"], abs=1e-9)
+
+
+def unreleased(events):
+    """Keys and buttons pressed and not released by the end of events"""
+    down = set()
+    for kind, name, pressed in playback_signature(events)["inputs"]:
+        (down.add if pressed else down.discard)((kind, name))
+    return down
+
+
+def test_merge_delays():
+    events = [move(10, 10), delay(0.1), delay(0.2), delay(0.3), key("a", True), delay(0.25, comment="wait"),
+              delay(0.5, keep_delay=True), delay(0.5), delay(0.4), key("a", False), delay(1), delay(2)]
+    merged, time_merged = pass_merge_delays(events)
+    assert_same_playback(events, merged)
+    assert [ev["timestamp"] for ev in merged if ev["type"] == "delayEvent"] == pytest.approx([0.6, 0.25, 0.5, 0.9, 3])
+    assert time_merged == pytest.approx(0.2 + 0.3 + 0.4 + 2)
+    assert events[1]["timestamp"] == 0.1  # The input events are not changed
+
+
+def test_coalesce_scrolls():
+    events = [move(50, 50), scroll(-1), scroll(-1), scroll(-2), scroll(-1, 0.04),
+              scroll(1),  # Other direction
+              scroll(1, 0.2),  # Too far apart
+              click(50, 50, True), click(50, 50, False), scroll(0, dx=3), scroll(0, dx=2)]
+    coalesced, _ = pass_coalesce_scrolls(events)
+    assert_same_playback(events, coalesced)
+    assert [(ev["dx"], ev["dy"]) for ev in coalesced if ev["type"] == "scrollEvent"] == [(0, -5), (0, 1), (0, 1),
+                                                                                          (5, 0)]
+    assert not unreleased(coalesced)
+
+
+def test_text_bursts():
+    events = ([move(5, 5)] + typed("hi there") + [key("Key.enter", True), key("Key.enter", False)]
+              + typed("ok", gap=0, hold=0) + [key("x", True, disabled=True), key("x", False, disabled=True)]
+              + typed("a") + [key("Key.shift", True)] + typed("B") + [key("Key.shift", False)])
+    bursts, _ = pass_text_bursts(events)
+    assert_same_playback(events, bursts)
+    texts = [ev for ev in bursts if ev["type"] == "typeText"]
+    assert [ev["text"] for ev in texts] == ["hi there", "ok"]
+    assert texts[0]["timings"][0] == [0.0, 0.04] and "timings" not in texts[1]
+    assert not unreleased(bursts)
+
+
+def test_unmatched_press_is_kept():
+    events = [key("a", True), key("b", True), key("b", False), key("a", False)]
+    bursts, _ = pass_text_bursts(events)
+    assert_same_playback(events, bursts)
+    assert all(ev["type"] == "keyboardEvent" for ev in bursts)
+
+
+@pytest.mark.parametrize("name", OPTIMIZER_PASSES)
+def test_pass_keeps_playback(name):
+    events = ([move(0, 0), move(0, 0), move(3, 4, disabled=True), move(8, 8), click(8, 8, True),
+               click(8, 8, False), delay(0.2), delay(0.3)] + [scroll(-1) for _ in range(4)]
+              + [{"type": "loopStart", "times": 2, "timestamp": 0}] + typed("loop") + [delay(0.1)]
+              + [{"type": "loopEnd", "timestamp": 0}, delay(0.1)] + typed("end"))
+    optimized, report = optimize_events(events, [name])
+    assert not report["passes"][0]["reverted"]
+    assert report["events_removed"] > 0
+    assert_same_playback(events, optimized)
+    # Nothing is merged across the loop markers
+    assert [ev["type"] for ev in optimized].count("loopStart") == 1
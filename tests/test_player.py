@@ -0,0 +1,29 @@
+from time import perf_counter
+
+from backends.memory_backend import MemoryBackend
+from macro.playback_plan import compile_plan
+from macro.player import Player
+
+# 20 characters held 50 ms, 50 ms apart: two seconds of typing in one event
+SLOW_TEXT = {"events": [{"type": "typeText", "text": "abcdefghijklmnopqrst", "timestamp": 0,
+                         "timings": [[0.05, 0.05]] * 20}]}
+
+
+def pressed_after(log):
+    """Keys left down at the end of a MemoryBackend log"""
+    down = set()
+    for entry in log:
+        if entry[1] == "key":
+            (down.add if entry[3] else down.discard)(entry[2])
+    return down
+
+
+def test_for_deadline_cuts_type_text():
+    backend = MemoryBackend()
+    player = Player(backend)
+    player.playing = True
+    started = perf_counter()
+    player.run(compile_plan(SLOW_TEXT, backend.special_keys), float("inf"), end_at=started + 0.33)
+    assert perf_counter() - started < 0.33 + 0.03
+    assert backend.log and backend.log[-1][0] - started < 0.33 + 0.01
+    assert not pressed_after(backend.log)
@@ -0,0 +1,41 @@
+from time import perf_counter
+
+from backends.memory_backend import MemoryBackend
+from macro.script_export import export_script, load_script
+from test_player import SLOW_TEXT, pressed_after
+
+
+def exported(tmp_path, macro_events):
+    script_path = tmp_path / "macro.py"
+    script_path.write_text(export_script(macro_events), encoding="utf-8")
+    return load_script(str(script_path))
+
+
+def test_for_deadline_cuts_type_text(tmp_path):
+    script = exported(tmp_path, SLOW_TEXT)
+    backend = MemoryBackend()
+    started = perf_counter()
+    script.play(backend, float("inf"), end_at=started + 0.33)
+    assert perf_counter() - started < 0.33 + 0.03
+    assert not pressed_after(backend.log)
+
+
+def test_float_coordinates_are_rounded(tmp_path):
+    macro_events = {"events": [{"type": "cursorMove", "x": 10.5, "y": 20.25, "timestamp": 0.01},
+                               {"type": "leftClickEvent", "x": 30.75, "y": 40.4, "pressed": True, "timestamp": 0},
+                               {"type": "leftClickEvent", "x": 30.75, "y": 40.4, "pressed": False, "timestamp": 0}]}
+    backend = MemoryBackend()
+    exported(tmp_path, macro_events).play(backend)
+    assert [entry[1:] for entry in backend.log if entry[1] == "move"] == [("move", 10, 20), ("move", 31, 40),
+                                                                          ("move", 31, 40)]
+
+
+def test_run_releases_button_held_at_deadline(tmp_path):
+    # A drag lasting a second, cut by a For deadline of 0.2 s
+    drag = {"events": [{"type": "leftClickEvent", "x": 5, "y": 5, "pressed": True, "timestamp": 0},
+                       {"type": "cursorMove", "x": 50, "y": 50, "timestamp": 1},
+                       {"type": "leftClickEvent", "x": 50, "y": 50, "pressed": False, "timestamp": 0}]}
+    backend = MemoryBackend()
+    exported(tmp_path, drag).run(backend, for_seconds=0.2)
+    assert [entry[1:] for entry in backend.log if entry[1] == "button"] == [("button", "left", True),
+                                                                            ("button", "left", False)]
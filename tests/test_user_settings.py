@@ -0,0 +1,19 @@
+from types import SimpleNamespace
+
+import utils.user_settings as user_settings
+from utils.user_settings import UserSettings
+
+
+def test_reset_notifies_listeners(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    (tmp_path / ".config").mkdir()
+    monkeypatch.setattr(user_settings.messagebox, "askyesno", lambda *args: True)
+    main_app = SimpleNamespace(text_content={"global": {"confirm": ""},
+                                             "options_menu": {"others_menu": {"reset_settings_confirmation": ""}}})
+    settings = UserSettings(main_app)
+    changed = []
+    settings.add_listener(changed.append)
+    settings.change_settings("Hotkeys", "Playback_Start", None, ["Key.f9"])
+    settings.reset_settings()
+    assert changed == ["Hotkeys", None]
+    assert settings.settings_dict["Hotkeys"] == UserSettings.default_settings()["Hotkeys"]
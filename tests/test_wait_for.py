@@ -0,0 +1,130 @@
+from threading import Timer
+from time import perf_counter
+
+import pytest
+from PIL import Image, features
+
+from backends.memory_backend import MemoryBackend
+from macro.macro_editor import set_wait_for
+from macro.playback_plan import OP_WAIT_FOR, compile_plan
+from macro.player import WAIT_FOR_POLL, PlaybackObserver, Player
+
+SCREEN = (320, 240)
+REGION = "20,20,160,120"
+# Seconds before the synthetic screens show what the macro waits for
+SHOWN_AFTER = 0.2
+
+
+def button_image():
+    """10x10 template whose first pixel is also all over the screen background"""
+    image = Image.new("RGB", (10, 10), "white")
+    image.paste((30, 120, 200), (2, 2, 8, 8))
+    return image
+
+
+class SyntheticScreen:
+    """Blank screen showing drawn once SHOWN_AFTER seconds have passed, grab() replaces the screen capture"""
+
+    def __init__(self, drawn=None):
+        self.blank = Image.new("RGB", SCREEN, "white")
+        self.drawn = drawn
+        self.shown_at = perf_counter() + SHOWN_AFTER
+
+    def grab(self, region):
+        x, y, width, height = region
+        screen = self.drawn if self.drawn is not None and perf_counter() >= self.shown_at else self.blank
+        return screen.crop((x, y, x + width, y + height))
+
+
+class ErrorObserver(PlaybackObserver):
+    error = None
+
+    def on_error(self, error):
+        self.error = error
+
+
+def wait_then_press(target, timeout=5, on_timeout="continue"):
+    wait_for = set_wait_for({"type": "waitFor", "timestamp": 0}, REGION, target, timeout=timeout)
+    wait_for["on_timeout"] = on_timeout
+    return {"events": [wait_for,
+                       {"type": "keyboardEvent", "key": "a", "pressed": True, "timestamp": 0},
+                       {"type": "keyboardEvent", "key": "a", "pressed": False, "timestamp": 0}]}
+
+
+def play(macro_events, base_dir=None, screen=None):
+    """(result of Player.run, seconds until the key press or None, observer)"""
+    backend = MemoryBackend()
+    plan = compile_plan(macro_events, backend.special_keys, base_dir)
+    if screen is not None:
+        for op in plan.ops:
+            if op[0] == OP_WAIT_FOR:
+                op[3].grab = screen.grab
+    player = Player(backend)
+    observer = ErrorObserver()
+    player.playing = True
+    started = perf_counter()
+    result = player.run(plan, observer=observer)
+    presses = [entry[0] - started for entry in backend.log if entry[1] == "key" and entry[3]]
+    return result, presses[0] if presses else None, observer
+
+
+def assert_shown_then_played(pressed_after):
+    assert SHOWN_AFTER <= pressed_after < SHOWN_AFTER + WAIT_FOR_POLL + 0.03
+
+
+def test_waits_for_color():
+    drawn = Image.new("RGB", SCREEN, "white")
+    drawn.paste((255, 0, 0), (100, 90, 110, 100))
+    result, pressed_after, _ = play(wait_then_press("#ff0000"), screen=SyntheticScreen(drawn))
+    assert result == 1
+    assert_shown_then_played(pressed_after)
+
+
+def test_color_outside_region_does_not_match():
+    drawn = Image.new("RGB", SCREEN, "white")
+    drawn.paste((255, 0, 0), (250, 200, 260, 210))
+    result, pressed_after, _ = play(wait_then_press("#ff0000", timeout=0.3), screen=SyntheticScreen(drawn))
+    assert result == 1
+    assert pressed_after >= 0.3
+
+
+def test_waits_for_image(tmp_path):
+    button_image().save(tmp_path / "button.png")
+    drawn = Image.new("RGB", SCREEN, "white")
+    drawn.paste(button_image(), (77, 53))
+    result, pressed_after, _ = play(wait_then_press("button.png"), str(tmp_path), SyntheticScreen(drawn))
+    assert result == 1
+    assert_shown_then_played(pressed_after)
+
+
+def test_timeout_continues():
+    result, pressed_after, observer = play(wait_then_press("#ff0000", timeout=0.3), screen=SyntheticScreen())
+    assert result == 1 and observer.error is None
+    assert 0.3 <= pressed_after < 0.3 + 0.03
+
+
+def test_timeout_stops_playback():
+    result, pressed_after, observer = play(wait_then_press("#ff0000", timeout=0.3, on_timeout="stop"),
+                                           screen=SyntheticScreen())
+    assert result is None and pressed_after is None
+    assert isinstance(observer.error, TimeoutError)
+
+
+def test_waits_for_color_drawn_on_xvfb(xvfb_display):
+    xlib_display = pytest.importorskip("Xlib.display")
+    if not features.check("xcb"):
+        pytest.skip("Pillow cannot capture X screens here")
+    connection = xlib_display.Display(xvfb_display)
+    root = connection.screen().root
+
+    def draw():
+        root.fill_rectangle(root.create_gc(foreground=0xff0000), 100, 90, 10, 10)
+        connection.sync()
+
+    Timer(SHOWN_AFTER, draw).start()
+    try:
+        result, pressed_after, _ = play(wait_then_press("#ff0000"))
+    finally:
+        connection.close()
+    assert result == 1
+    assert_shown_then_played(pressed_after)
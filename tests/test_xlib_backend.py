@@ -0,0 +1,49 @@
+from time import perf_counter
+
+import pytest
+
+from macro.playback_plan import compile_plan
+from macro.player import Player
+from macro.telemetry import TimingRecorder, timing_report
+
+pytest.importorskip("Xlib")
+
+MOVES = 5000
+# 5000 cursor positions a second, denser than any mouse records
+MOVE_GAP = 0.0002
+
+
+def dense_move_path():
+    return {"events": [{"type": "cursorMove", "x": 100 + index % 1000, "y": 100 + index * 7 % 800,
+                        "timestamp": MOVE_GAP} for index in range(MOVES)]}
+
+
+@pytest.fixture
+def xlib_backend(xvfb_display):
+    pytest.importorskip("pynput")
+    from backends.xlib_backend import XlibBackend
+
+    backend = XlibBackend(xvfb_display)
+    yield backend
+    backend.display.close()
+
+
+def test_dense_move_path_keeps_up(xlib_backend):
+    macro_events = dense_move_path()
+    player = Player(xlib_backend)
+    timing = TimingRecorder()
+    player.playing = True
+    started = perf_counter()
+    assert player.run(compile_plan(macro_events, xlib_backend.special_keys), timing=timing) == 1
+    elapsed = perf_counter() - started
+
+    pointer = xlib_backend.display.screen().root.query_pointer()
+    last = macro_events["events"][-1]
+    assert (pointer.root_x, pointer.root_y) == (last["x"], last["y"])
+
+    # The path lasts MOVES * MOVE_GAP seconds, sending it must not take longer
+    assert MOVES / elapsed > 4000
+    assert elapsed < MOVES * MOVE_GAP + 0.1
+    report = timing_report(timing)
+    assert report["samples"] == MOVES
+    assert report["p99_ms"] < 10